@@ -0,0 +1,134 @@
+"""
+End to end benchmark - user commands through the controllers, from input to
+queue & media list, against a mock network and the headless player backend.
+
+Scenarios: song search, song select, batch queue add (-qa), batch rsong queue
+add (-ra), album open and a 500 song playlist load (all pages queued).
+
+    python -m benchmarks.bench_flows [-r ROUNDS] [--network replay|server] [--latency SECS]
+                                     [--json out.json] [--compare base.json] [--trace]
+
+replay - responses recorded from the local stand-in server once, then served
+    from memory: the client side cost only (parsing, models, queue, player).
+server - every request goes over loopback HTTP to the stand-in server
+    (tests/mock_server.py) through AsyncPyRequests, as the app sends them.
+--latency adds secs per response (to the server's replies with `server`).
+--trace prints the time spent per network call, parser, queue & player operation.
+"""
+
+import threading
+from benchmarks.harness import measure, summarize, arguments, finish
+from tests.mock_server import MockJioSaavnServer
+from rkstreamer.services.network import AsyncPyRequests
+from rkstreamer.services.resilience import Resilience, RetryPolicy
+from rkstreamer.services.replay import Cassette, RecordingProvider, ReplayProvider, RewriteProvider
+from rkstreamer.services.headless import HeadlessPlayer
+from rkstreamer.utils.trace import tracer
+from rkstreamer.models import JioSaavnSongModel, JioSaavnAlbumModel, JioSaavnPlaylistModel
+from rkstreamer.views import JioSaavnSongView, JioSaavnAlbumView, JioSaavnPlaylistView
+from rkstreamer.controllers import (
+    JioSaavnSongController,
+    JioSaavnAlbumController,
+    JioSaavnPlaylistController
+)
+
+PLAYLIST_SIZE = 500
+
+
+def song_controller(client) -> JioSaavnSongController:
+    return JioSaavnSongController(
+        model=JioSaavnSongModel(client),
+        view=JioSaavnSongView(player=HeadlessPlayer()))
+
+
+def album_controller(client) -> JioSaavnAlbumController:
+    return JioSaavnAlbumController(
+        model=JioSaavnAlbumModel(client),
+        view=JioSaavnAlbumView(player=HeadlessPlayer()))
+
+
+def plist_controller(client) -> JioSaavnPlaylistController:
+    return JioSaavnPlaylistController(
+        model=JioSaavnPlaylistModel(client),
+        view=JioSaavnPlaylistView(player=HeadlessPlayer()))
+
+
+def searched(factory, query: str):
+    """Setup - controller with the search results of the query"""
+    def setup(client):
+        controller = factory(client)
+        controller.handle_input(query)
+        return controller
+    return setup
+
+
+def with_rsongs(client):
+    """Setup - a song selected & its recommendations in the rsong queue"""
+    controller = searched(song_controller, 'track -n:5')(client)
+    controller.handle_input('1')
+    controller.uow_add_rsongs_rqueue(controller.model.queue.fetch(1).id)
+    return controller
+
+
+def load_playlist(controller):
+    """Selects the playlist & waits for the background pages"""
+    controller.handle_input('1')
+    for thread in threading.enumerate():
+        if thread.name == 'rkstreamer-playlist':
+            thread.join()
+    assert len(controller.model.queue.get_queue.songs) == PLAYLIST_SIZE
+
+
+# name -> (setup(client) -> controller, run(controller))
+SCENARIOS = {
+    'song search': (song_controller, lambda ctrl: ctrl.handle_input('track -n:5')),
+    'song select': (searched(song_controller, 'track -n:5'), lambda ctrl: ctrl.handle_input('1')),
+    'queue add (-qa x5)': (searched(song_controller, 'track -n:5'),
+                           lambda ctrl: ctrl.handle_input('-qa1,2,3,4,5')),
+    'rsong queue add (-ra x5)': (with_rsongs, lambda ctrl: ctrl.handle_input('-ra1,2,3,4,5')),
+    'album open': (searched(album_controller, 'vaaranam'), lambda ctrl: ctrl.handle_input('1')),
+    f"playlist load ({PLAYLIST_SIZE})": (searched(plist_controller, 'hits'), load_playlist),
+}
+
+
+def http_client(server: MockJioSaavnServer) -> RewriteProvider:
+    """App network stack (no response cache) sent to the stand-in server - no retries"""
+    return RewriteProvider(
+        AsyncPyRequests(resilience=Resilience(retry=RetryPolicy(attempts=1))), server.hosts)
+
+
+def main() -> None:
+    parser = arguments(__doc__.split('\n\n')[0])
+    parser.add_argument('--network', choices=('replay', 'server'), default='replay')
+    parser.add_argument('--latency', type=float, default=0, help='secs per response')
+    parser.add_argument('--trace', action='store_true', help='print where the time went (spans)')
+    options = parser.parse_args()
+    scenarios = {name: scenario for name, scenario in SCENARIOS.items()
+                 if not options.only or any(only in name for only in options.only)}
+
+    with MockJioSaavnServer(playlist_size=PLAYLIST_SIZE) as server:
+        if options.network == 'server':
+            server.latency = options.latency
+            client = http_client(server)
+        else:
+            cassette = Cassette()
+            recorder = RecordingProvider(http_client(server), cassette)
+            for setup, run in scenarios.values():
+                measure(run, rounds=0, setup=lambda setup=setup: setup(recorder))
+            client = ReplayProvider(cassette, latency=options.latency)
+        print(f"{options.rounds} rounds, network: {options.network}"
+              f" (+{options.latency * 1000:g} ms per response)\n")
+        if options.trace:
+            tracer.enable()
+        results = {
+            name: summarize(measure(run, options.rounds, setup=lambda setup=setup: setup(client)))
+            for name, (setup, run) in scenarios.items()}
+    if options.network == 'replay' and client.misses:
+        raise SystemExit(f"{client.misses} requests weren't recorded")
+    finish(results, options)
+    if options.trace:
+        print(f"\n{tracer.summary()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark - response parsing of 500 item playlist/song list payloads.
+
+Compares the previous per-field `response.json()` comprehensions with the
+single pass columnar parser (json & orjson backends).
+
+    python benchmarks/bench_parser.py [items] [rounds]
+"""
+
+import sys
+import json
+import timeit
+from html import unescape
+from rkstreamer.services import parser
+from rkstreamer.services.playlist import JioSaavnPlaylistProvider
+
+
+class Response:
+    """Response with a raw body - json() decodes on every call like requests"""
+
+    def __init__(self, payload: dict) -> None:
+        self.content = json.dumps(payload).encode()
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def song_item(count: int) -> dict:
+    album = f"Album &amp; Friends {count % 20}"
+    return {'id': f"id{count}", 'title': f"Song {count}", 'language': 'tamil',
+            'subtitle': f"Artist {count % 7}, Singer - {album}",
+            'more_info': {'album': album, 'music': f"Composer {count % 5}",
+                          'duration': '240', 'encrypted_media_url': f"enc{count}" * 8,
+                          'album_url': f"https://www.jiosaavn.com/album/x/{count % 20}"}}
+
+
+def playlist_item(count: int) -> dict:
+    return {'song_for_player': f"Song {count} &quot;Live&quot;",
+            'download_url': f"https://h.saavncdn.com/{count}/{count}abcd.mp3"}
+
+
+def legacy_songs(response: Response) -> list:
+    """Previous album songs parser"""
+    return [{'name': unescape(song['title']),
+             'id': song['id'],
+             'album_name': unescape(song['more_info']['album']),
+             'music': song['more_info']['music'][:50] if song['more_info']['music'] else '',
+             'artists': unescape(song['subtitle'].replace(f" - {song['more_info']['album']}", '')),
+             'duration': song['more_info']['duration'],
+             'token': song['more_info']['encrypted_media_url'],
+             'album_id': song['more_info']['album_url'].split('/')[-1]}
+            for song in response.json()['list']]
+
+
+def legacy_playlist(response: Response, change_url) -> list:
+    """Previous playlist songs parser"""
+    return [{'name': unescape(song['song_for_player']),
+             'stream_url': change_url(song['download_url'])}
+            for song in response.json()['fullsongs']]
+
+
+def cold(parse, *args):
+    """Runs the parser with an empty unescape cache - every round is a new payload"""
+    parser._unescape_shared.cache_clear()  # pylint: disable=protected-access
+    return parse(*args)
+
+
+def bench(name: str, func, rounds: int) -> float:
+    best = min(timeit.repeat(func, number=rounds, repeat=5)) / rounds
+    print(f"{name:<32} {best * 1000:8.3f} ms")
+    return best
+
+
+def main(items: int = 500, rounds: int = 20) -> None:
+    songs = Response({'list': [song_item(count) for count in range(items)]})
+    plist = Response({'fullsongs': [playlist_item(count) for count in range(items)]})
+    change_url = JioSaavnPlaylistProvider(client=None)._change_plist_song_url
+    assert [dict(song, language='tamil') for song in legacy_songs(songs)] == \
+        list(parser.parse_songs(parser.decode(songs)['list']))
+
+    print(f"{items} items, best of 5 x {rounds} rounds"
+          f" (orjson: {'yes' if parser.orjson else 'no'})")
+    backend = parser.orjson
+    for label, run_legacy, run_columnar in (
+            ('songs', lambda: legacy_songs(songs),
+             lambda: cold(parser.parse_songs, parser.decode(songs)['list'])),
+            ('playlist', lambda: legacy_playlist(plist, change_url),
+             lambda: cold(parser.parse_playlist_songs,
+                          parser.decode(plist)['fullsongs'], change_url))):
+        legacy = bench(f"{label} - legacy", run_legacy, rounds)
+        parser.orjson = None
+        columnar = bench(f"{label} - columnar (json)", run_columnar, rounds)
+        parser.orjson = backend
+        if backend:
+            columnar = bench(f"{label} - columnar (orjson)", run_columnar, rounds)
+        print(f"{label} speedup: {legacy / columnar:.2f}x\n")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
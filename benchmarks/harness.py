@@ -0,0 +1,86 @@
+"""
+Benchmark harness - timed rounds, latency percentiles & saved results.
+
+Results can be saved (--json) and compared with an earlier run (--compare),
+so a change shows up as p50/p90/p99 deltas per scenario.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+from typing import Callable, Optional
+
+POINTS = (50, 90, 99)
+
+
+def percentile(samples: list, point: float) -> float:
+    """Nearest rank percentile of the samples"""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * point // 100))  # ceil
+    return ordered[int(rank) - 1]
+
+
+def measure(
+        run: Callable,
+        rounds: int,
+        setup: Optional[Callable] = None,
+        warmup: int = 1) -> list:
+    """Secs taken by run(state) per round - setup() builds a fresh state for every
+    round & isn't timed. Output printed by the code under test is discarded."""
+    samples = []
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        for count in range(warmup + rounds):
+            state = setup() if setup else None
+            start = time.perf_counter()
+            run(state)
+            elapsed = time.perf_counter() - start
+            if count >= warmup:
+                samples.append(elapsed)
+    return samples
+
+
+def summarize(samples: list) -> dict:
+    """Latency stats in ms"""
+    stats = {f"p{point}": percentile(samples, point) * 1000 for point in POINTS}
+    stats['mean'] = sum(samples) / len(samples) * 1000
+    stats['rounds'] = len(samples)
+    return stats
+
+
+def report(results: dict, baseline: Optional[dict] = None) -> None:
+    """Prints the stats table - with the p50 change against the baseline run"""
+    header = f"{'scenario':<24}" + ''.join(f"{f'p{point}':>10}" for point in POINTS) + f"{'mean':>10}"
+    print(header + (f"{'p50 vs base':>14}" if baseline else ''))
+    for name, stats in results.items():
+        row = f"{name:<24}" + ''.join(f"{stats[f'p{point}']:10.2f}" for point in POINTS)
+        row += f"{stats['mean']:10.2f}"
+        if baseline and name in baseline:
+            change = (stats['p50'] / baseline[name]['p50'] - 1) * 100
+            row += f"{change:+13.1f}%"
+        print(row)
+    print('(ms)')
+
+
+def arguments(description: str) -> argparse.ArgumentParser:
+    """Common command line options"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('-r', '--rounds', type=int, default=50, help='timed rounds per scenario')
+    parser.add_argument('-k', '--only', action='append', help='run only these scenarios')
+    parser.add_argument('--json', help='save the results to this file')
+    parser.add_argument('--compare', help='results file of an earlier run to compare with')
+    return parser
+
+
+def finish(results: dict, options: argparse.Namespace) -> None:
+    """Reports & saves the results"""
+    baseline = None
+    if options.compare:
+        with open(options.compare, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+    report(results, baseline)
+    if options.json:
+        with open(options.json, 'w', encoding='utf-8') as file:
+            json.dump({'python': sys.version.split()[0], 'results': results}, file, indent=1)
@@ -3,15 +3,18 @@ Design patterns implementation
 """
 
 from __future__ import annotations
-import threading
-from typing import Union, TYPE_CHECKING
+from typing import Optional, Union, TYPE_CHECKING
 from rkstreamer.interfaces.controllers import ISongController
 from rkstreamer.interfaces.patterns import Command
 from rkstreamer.controllers.enums import GotoAlbumEnum
+from rkstreamer.models.exceptions import NetworkError
+from rkstreamer.services.events import dispatcher
+from rkstreamer.services.recommend import RecommendationWorker, RQUEUE_SIZE
 if TYPE_CHECKING:
     from rkstreamer.types import (
         SongControllerType,
         SongType,
+        SongListType,
         SongModelType,
         SongViewType,
         AlbumModelType,
@@ -23,6 +26,9 @@ if TYPE_CHECKING:
 class ControllerUtils(ISongController):
     """Generic controller utils for handling songs"""
 
+    MONITOR_INTERVAL = 45  # secs between queue monitor runs.
+    PREFETCH_LEAD = 30  # secs before the track ends to prefetch the next song.
+
     def __init__(
             self,
             model: Union[SongModelType, AlbumModelType],
@@ -30,39 +36,106 @@ class ControllerUtils(ISongController):
 
         self.model = model
         self.view = view
+        self._prefetched_url = None
+        self._monitor_task = None
+        self._recommender = None
+        # timers run on the player's event dispatcher - simulated time on the headless player.
+        self.dispatcher = getattr(view, 'dispatcher', dispatcher)
 
         self.view.set_controller_callback(self.uow_update_song_status)
+        self.view.set_monitor_callback(self.monitor_queue_pull_rsong)
 
-        _ = threading.Timer(30, self.monitor_queue_pull_rsong)
-        _.daemon = True #Changed to supported daemon method
-        _.start()
+    @property
+    def recommender(self) -> RecommendationWorker:
+        """Background recommendations - seeds batched, ranked into the rsong list"""
+        if self._recommender is None:
+            self._recommender = RecommendationWorker(
+                self.model.get_related_songs_batch, self.model.queue.update_rqueue)
+        return self._recommender
 
     def uow_update_song_status(self, status: str, stream_url: str):
         """Updating song status in queue to "Played"
         if the song has been selected to play from search or from queue
-        This function fetchs the rsongs for the playing song and updates rsong list."""
+        The playing song is a seed of the recommendation worker, which fills the rsong list
+        in the background while it has room."""
         song = self.model.queue.update_qstatus(status, stream_url)
-        if song and len(self.model.queue.get_rsongs) <= 50:
-            self.uow_add_rsongs_rqueue(song.id)
+        if song:
+            self.model.record_play(song)
+        if song and len(self.model.queue.get_rsongs) < RQUEUE_SIZE:
+            self.recommender.submit(song.id)
 
     def monitor_queue_pull_rsong(self):
-        """Pull rsong by monitoring the queue songs status"""
+        """Pull rsong by monitoring the queue songs status - run on player events.
+        While a track is playing, the next run is scheduled at its prefetch point
+        (at most MONITOR_INTERVAL secs away, so seeks are picked up)."""
+        self.dispatcher.cancel(self._monitor_task)
+        self._monitor_task = None
         if self.model.queue.check_status(self.model.queue.get_queue):
-            get_rsong = self.model.queue.pop_rsong()
-            if get_rsong:
+            self.pull_rsong()
+        remaining = self.view.remaining_time()
+        self.prefetch_next_song(remaining)
+        if remaining is not None and remaining > self.PREFETCH_LEAD:
+            self._monitor_task = self.dispatcher.schedule(
+                min(self.MONITOR_INTERVAL, remaining - self.PREFETCH_LEAD),
+                self.monitor_queue_pull_rsong)
+
+    def pull_rsong(self) -> Optional[SongType]:
+        """Moves the first rsong to the queue & media list with its stream url"""
+        get_rsong = self.model.queue.pop_rsong()
+        if get_rsong:
+            try:
                 get_rsong.stream_url = self.model.get_song_url(get_rsong.token)
-                self.uow_add_songs_queue(get_rsong)
-        threading.Timer(45, self.monitor_queue_pull_rsong).start()
+            except NetworkError:
+                return None  # network is down - the queue runs out instead of the player exiting.
+            self.uow_add_songs_queue(get_rsong)
+        return get_rsong
+
+    def prefetch_next_song(self, remaining: Optional[float]):
+        """Prefetch stage - when the playing track is about to end, makes sure the next
+        queue entry is loaded (pulls a rsong if there's none), its stream url isn't about
+        to expire, and warms it"""
+        if remaining is None or remaining > self.PREFETCH_LEAD:
+            return
+        next_song = self.model.queue.get_next_song()
+        if next_song is None:
+            next_song = self.pull_rsong()
+        if next_song:
+            self.uow_renew_stream_url(next_song)
+        if next_song and next_song.stream_url != self._prefetched_url:
+            self._prefetched_url = next_song.stream_url
+            self.model.prefetch(next_song)
+
+    def uow_renew_stream_url(self, song: SongType):
+        """UOW: Swaps the queued song's stream url for a fresh one, in queue & media list,
+        when it's about to expire. The old url is kept if it can't be resolved"""
+        try:
+            stream_url = self.model.renew_stream_url(song)
+        except NetworkError:
+            return
+        if stream_url and stream_url != song.stream_url and \
+                self.view.replace_media(song.stream_url, stream_url):
+            self.model.queue.set_stream_url(song, stream_url)
 
     def uow_add_songs_queue(self, song: SongType):
         """UOW: Add songs to queue & media list. Doesn't play it"""
         self.model.queue.add(song)
         self.view.add_media(song)
 
+    def uow_add_songs_queue_batch(self, songs: SongListType, failed: SongListType):
+        """UOW: Add loaded songs to queue & media list in order, reports failed ones"""
+        for song in songs:
+            self.uow_add_songs_queue(song)
+        for song in failed:
+            print(f"\n\033[31mFailed to load: '{song.name}'\033[0m")
+
     def uow_add_rsongs_rqueue(self, data: str):
         """UOW: Add Recommended songs to RQueue
-        :data - song_id"""
-        recomm_songs = self.model.get_related_songs(data)
+        :data - song_id
+        Recommendations are skipped while their endpoints are failing."""
+        try:
+            recomm_songs = self.model.get_related_songs(data)
+        except NetworkError:
+            return
         if recomm_songs:
             self.model.queue.update_rqueue(recomm_songs)
 
@@ -85,7 +158,6 @@ class GotoAlbumCommand(Command):
     def __init__(self, controller: SongControllerType):
         self.controller = controller
         self._model = controller.model
-        self.model: AlbumModelType = self.controller.goto_album
         self.view: SongViewType = self.controller.view
         self.commands = {
             GotoAlbumEnum.ADD: GotoAlbumAddCommand(self.controller),
@@ -93,6 +165,11 @@ class GotoAlbumCommand(Command):
         }
         self.current_album_id = ''
 
+    @property
+    def model(self) -> AlbumModelType:
+        """Goto album model - built by the controller on first use"""
+        return self.controller.goto_album
+
     def execute(self, user_input):
         if user_input == '-g':
             album_id = self._model.queue.current_playing_song.album_id
@@ -123,13 +200,11 @@ class GotoAlbumAddCommand(Command):
         self.view: SongViewType = self.controller.view
 
     def execute(self, user_input: list):
-        for number in user_input:
-            album_song = self.controller.goto_album_songs.songs.get(
-                int(number))
-            if album_song:
-                album_song.stream_url = self.model.get_song_url(album_song.token)
-                album_song.status = 'Loaded'
-                self.controller.uow_add_songs_queue(album_song)
+        album_songs = [self.controller.goto_album_songs.songs.get(int(number))
+                       for number in user_input]
+        songs, failed = self.model.resolve_songs(
+            [album_song for album_song in album_songs if album_song])
+        self.controller.uow_add_songs_queue_batch(songs, failed)
 
 
 class GotoAlbumPlayCommand(Command):
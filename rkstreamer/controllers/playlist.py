@@ -1,12 +1,14 @@
 """Playlist controller implemenation"""
 
 import re
+import threading
 from typing import Union
 from rkstreamer.interfaces.patterns import Command
 from rkstreamer.interfaces.controllers import IController
 from rkstreamer.controllers.enums import ControllerEnum
 from rkstreamer.controllers.patterns import PlayerControlsCommand
-from rkstreamer.controllers.queue import SongQueueCommand
+from rkstreamer.controllers.queue import PlaylistQueueCommand
+from rkstreamer.models.exceptions import NetworkError
 from rkstreamer.utils.helper import parse_input, PLIST_PATTERN
 from rkstreamer.types import (
     PlaylistModelType,
@@ -24,12 +26,14 @@ class JioSaavnPlaylistController(IController):
         self.model = model
         self.view = view
         self.commands = {
-            ControllerEnum.QUEUE: SongQueueCommand(self),
+            ControllerEnum.QUEUE: PlaylistQueueCommand(self),
             ControllerEnum.CONTROLS: PlayerControlsCommand(self),
             ControllerEnum.PVIEW: PlaylistViewCommand(self),
             str: PlaylistSearchCommand(self),
             int: PlaylistSelectCommand(self),
         }
+        self._pages_lock = threading.Lock()
+        self._pages_generation = 0  # bumped per selected playlist - stale pages are dropped.
         self.view.set_controller_callback(self.uow_update_song_status)
 
     def handle_input(self, user_input: Union[str, int]):
@@ -47,8 +51,23 @@ class JioSaavnPlaylistController(IController):
             command.execute(user_input)
 
     def uow_update_song_status(self, status: str, stream_url: str):
-        """)override) Updating song status in queue to "Played"""
-        return self.model.queue.update_qstatus(status, stream_url)
+        """)override) Updating song status in queue to "Played"
+        As a track starts, the bitrate of the next one is picked"""
+        song = self.model.queue.update_qstatus(status, stream_url)
+        if song:
+            self.uow_pick_next_bitrate()
+        return song
+
+    def uow_pick_next_bitrate(self):
+        """UOW: re-picks the next track's bitrate from the throughput & stalls measured
+        so far - its url is swapped in queue & media list if the bitrate has changed"""
+        with self._pages_lock:
+            song = self.model.queue.get_next_song()
+            if song is None:
+                return
+            stream_url = self.model.song_url(song)
+            if stream_url != song.stream_url and self.view.replace_media(song.stream_url, stream_url):
+                self.model.queue.set_stream_url(song, stream_url)
 
     def uow_add_songs_queue(self, playlist):
         """UOW: (override) Add songs to queue & don't play it"""
@@ -59,11 +78,31 @@ class JioSaavnPlaylistController(IController):
         self.view.add_media_list(songs)
 
     def uow_play_songs(self, playlist):
-        """UOW: (override) play the songs"""
-        self.view.stop()
-        self.model.queue.flush_queue()  # clears the queue before setting the new plist
-        self.uow_add_songs_queue(playlist)
-        self.view.play()
+        """UOW: (override) play the songs - playback starts with the first page,
+        the remaining pages are appended as they load in the background"""
+        with self._pages_lock:
+            self._pages_generation += 1
+            self.view.stop()
+            self.model.queue.flush_queue()  # clears the queue before setting the new plist
+            self.uow_add_songs_queue(playlist)
+            self.view.play()
+        threading.Thread(
+            target=self.uow_append_pages,
+            args=(self.model.load_pages(), self._pages_generation),
+            name='rkstreamer-playlist', daemon=True).start()
+
+    def uow_append_pages(self, pages, generation: int):
+        """UOW: appends the loaded pages to queue & media list, in playlist order.
+        Stops once another playlist has been selected, or a page fails to load."""
+        try:
+            for songs in pages:
+                with self._pages_lock:
+                    if generation != self._pages_generation:
+                        return
+                    self.model.queue.extend(songs)
+                    self.view.append_media_list([song.stream_url for song in songs])
+        except NetworkError as exc:
+            print(f"\n\033[31mFailed to load the rest of the playlist: {exc}\033[0m")
 
     def uow_play_songs_remove_loaded_before(self, song: SongType):
         """UOW: plays the song from song queue - playlist mode so don't change the played status
@@ -12,6 +12,8 @@ if TYPE_CHECKING:
         AlbumControllerType,
         AlbumModelType,
         AlbumViewType,
+        PlaylistControllerType,
+        PlaylistModelType,
         CommandType
     )
 
@@ -50,10 +52,30 @@ class SongQueueAddCommand(Command):
         self.controller = controller
         self.model: SongModelType = self.controller.model
 
+    def execute(self, user_input: list):
+        songs, failed = self.model.select_many(user_input)
+        self.controller.uow_add_songs_queue_batch(songs, failed)
+
+
+class PlaylistQueueCommand(SongQueueCommand):
+    """Playlist queue command - add (-qa) adds the whole playlist"""
+
+    def __init__(self, controller: PlaylistControllerType):
+        super().__init__(controller)
+        self.commands[QueueEnum.ADD] = PlaylistQueueAddCommand(self.controller)
+
+
+class PlaylistQueueAddCommand(Command):
+    """Playlist Queue - Add command"""
+
+    def __init__(self, controller: PlaylistControllerType):
+        self.controller = controller
+        self.model: PlaylistModelType = self.controller.model
+
     def execute(self, user_input: list):
         for number in user_input:
-            song = self.model.select(int(number))
-            self.controller.uow_add_songs_queue(song)
+            playlist = self.model.select(int(number))
+            self.controller.uow_add_songs_queue(playlist)
 
 
 class SongQueueRemoveCommand(Command):
@@ -119,9 +141,8 @@ class AlbumQueueAddCommand(Command):
         self.model: AlbumModelType = self.controller.model
 
     def execute(self, user_input: list):
-        for number in user_input:
-            song = self.model.select_song_from_album(int(number))
-            self.controller.uow_add_songs_queue(song)
+        songs, failed = self.model.select_songs_from_album(user_input)
+        self.controller.uow_add_songs_queue_batch(songs, failed)
 
 
 class ReSongQueueCommand(Command):
@@ -161,11 +182,16 @@ class ReSongQueueAddCommand(Command):
         self.view: SongViewType = self.controller.view
 
     def execute(self, user_input: list):
-        for number in user_input:
-            rsong = self.model.queue.get_rsong_index(int(number))
-            rsong.stream_url = self.model.get_song_url(rsong.token)
-            rsong.status = 'Loaded'
-            self.controller.uow_add_songs_queue(rsong)
+        rsongs = self.model.queue.get_rsong_indices([int(number) for number in user_input])
+        try:
+            songs, failed = self.model.resolve_songs(list(rsongs.values()))
+        except Exception:
+            self.model.queue.restore_rsongs(rsongs)
+            raise
+        failed_ids = {id(song) for song in failed}
+        self.model.queue.restore_rsongs(
+            {index: song for index, song in rsongs.items() if id(song) in failed_ids})
+        self.controller.uow_add_songs_queue_batch(songs, failed)
 
 
 class ReSongQueueRemoveCommand(Command):
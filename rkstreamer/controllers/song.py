@@ -14,6 +14,7 @@ from rkstreamer.models.album import JioSaavnAlbumModel
 from rkstreamer.utils.helper import parse_input
 from rkstreamer.utils.helper import SONG_PATTERN
 from rkstreamer.types import (
+    AlbumModelType,
     SongModelType,
     SongViewType,
     SongControllerType,
@@ -27,8 +28,7 @@ class JioSaavnSongController(ControllerUtils):
     def __init__(self, model: SongModelType, view: SongViewType) -> None:
         self.model = model
         self.view = view
-        self.goto_album = JioSaavnAlbumModel(
-            network_provider=model.network_provider)
+        self._goto_album = None
         self.commands = {
             ControllerEnum.QUEUE: SongQueueCommand(self),
             ControllerEnum.CONTROLS: PlayerControlsCommand(self),
@@ -40,6 +40,16 @@ class JioSaavnSongController(ControllerUtils):
         self.goto_album_songs = {}
         super().__init__(model, view)
 
+    @property
+    def goto_album(self) -> AlbumModelType:
+        """Album model for goto album - built on first use"""
+        if self._goto_album is None:
+            self._goto_album = JioSaavnAlbumModel(
+                network_provider=self.model.network_provider,
+                database=self.model.database,
+                url_cache=self.model.url_cache)
+        return self._goto_album
+
     def handle_input(self, user_input: Union[str, int]):
         if user_input.startswith('-'):
             re_match = re.match(r'(-\w{1})', user_input)
@@ -9,3 +9,4 @@ from .network import *
 from .patterns import *
 from .player import *
 from .provider import *
+from .database import *
@@ -12,15 +12,15 @@ class IDatabaseProvider(ABC):
         """Connect to DB"""
 
     @abstractmethod
-    def check(self, name: str):
+    def check(self, name: str, key: str):
         """Checking DB content"""
 
     @abstractmethod
-    def read(self, name: str):
+    def read(self, name: str, key: str):
         """Reading DB content"""
 
     @abstractmethod
-    def write(self, name: str):
+    def write(self, name: str, records: list):
         """Writing DB content"""
 
     @abstractmethod
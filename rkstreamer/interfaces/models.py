@@ -50,10 +50,34 @@ class ISongModel(IModel):
     def get_song_url(self, data):
         """Get Song stream url"""
 
+    @abstractmethod
+    def get_song_urls(self, tokens):
+        """Get Songs stream urls as one batch"""
+
+    @abstractmethod
+    def resolve_songs(self, songs):
+        """Load the songs stream urls as one batch"""
+
     @abstractmethod
     def get_related_songs(self, data):
         """Load related songs"""
 
+    @abstractmethod
+    def get_related_songs_batch(self, song_ids):
+        """Load related songs of several songs as one batch"""
+
+    @abstractmethod
+    def record_play(self, song):
+        """Record the song in play history"""
+
+    @abstractmethod
+    def renew_stream_url(self, song):
+        """Fresh stream url for the song if its url is about to expire"""
+
+    @abstractmethod
+    def prefetch(self, song):
+        """Warm the song's stream ahead of playback"""
+
 
 class ISongQueue(IQueue):
     """Inferace for Song queue"""
@@ -66,6 +90,10 @@ class ISongQueue(IQueue):
     def update_qstatus(self, status, stream_url):
         """Update the main queue status"""
 
+    @abstractmethod
+    def get_next_song(self):
+        """Get the next loaded song after the playing one"""
+
     @abstractmethod
     def pop_rsong(self):
         """Get related song from Rqueue list"""
@@ -74,6 +102,14 @@ class ISongQueue(IQueue):
     def get_rsong_index(self, index: int):
         """Get related song by index"""
 
+    @abstractmethod
+    def get_rsong_indices(self, indices: list):
+        """Get related songs by indices, all or none"""
+
+    @abstractmethod
+    def restore_rsongs(self, rsongs):
+        """Put related songs back by index"""
+
     @abstractmethod
     def remove_rsong_index(self, index: int):
         """Remove related song by index"""
@@ -98,3 +134,11 @@ class IAlbumModel(IModel):
 
 class IPlaylistModel(IModel):
     """Interface for Playlist model"""
+
+    @abstractmethod
+    def load_pages(self):
+        """Load the remaining pages of the selected playlist"""
+
+    @abstractmethod
+    def song_url(self, song):
+        """Stream url of the playlist song at the bitrate picked now"""
@@ -17,6 +17,10 @@ class INetworkProvider(ABC):
     def get(self, **kwargs) -> NetworkProviderResponseType:
         """GET request method"""
 
+    @abstractmethod
+    def gather(self, requests_kwargs: list, return_exceptions: bool = False) -> list:
+        """Batch GET request method - responses are returned in request order"""
+
 
 class INetworkProviderResponse(ABC):
     """Interface for Response object returned by Network Providers"""
@@ -25,6 +29,11 @@ class INetworkProviderResponse(ABC):
     def json(self) -> dict:
         """Return JSONified response"""
 
+    @property
+    @abstractmethod
+    def content(self) -> bytes:
+        """Raw response body"""
+
     @property
     @abstractmethod
     def headers(self) -> dict:
@@ -24,6 +24,10 @@ class IView(ABC):
     def stop(self):
         """stop the media list"""
 
+    @abstractmethod
+    def activate(self):
+        """Loads the view's media list in the shared player"""
+
 
 class ISongView(IView):
     """Interface for Song View"""
@@ -48,6 +52,14 @@ class ISongView(IView):
     def add_media(self, media) -> None:
         """Play the given media"""
 
+    @abstractmethod
+    def replace_media(self, stream_url: str, new_url: str) -> bool:
+        """Swaps the media for the new url"""
+
+    @abstractmethod
+    def remaining_time(self):
+        """Remaining time of the playing track (secs)"""
+
     @abstractmethod
     def player_input(self, user_input: str):
         """Input to music player"""
@@ -56,6 +68,10 @@ class ISongView(IView):
     def set_controller_callback(self, callback_fn):
         """Updates the callback attribute to mlplayer's monitor state"""
 
+    @abstractmethod
+    def set_monitor_callback(self, callback_fn):
+        """Updates the queue monitor callback run on mlplayer's track events"""
+
 
 class IAlbumView(ISongView):
     """Album View"""
@@ -75,3 +91,6 @@ class IPlaylistView(ISongView):
     def add_media_list(self, songs_list):
         """Add songs list to player media list"""
 
+    @abstractmethod
+    def append_media_list(self, songs_list):
+        """Append songs list to the end of player media list"""
@@ -2,6 +2,35 @@
 Modules used by Models
 """
 
-from dataclasses import dataclass, field
+import sys
+from dataclasses import dataclass, field, fields
 
-__all__ = ['dataclass', 'field']
+
+def slotted(cls):
+    """Rebuilds the dataclass with __slots__ for the fields it declares (no instance __dict__).
+    Same as dataclass(slots=True) of py3.10+, usable on subclasses of slotted dataclasses."""
+    inherited = {name for base in cls.__mro__[1:] for name in getattr(base, '__slots__', ())}
+    names = tuple(_field.name for _field in fields(cls) if _field.name not in inherited)
+    namespace = {key: value for key, value in cls.__dict__.items()
+                 if key not in names and key not in ('__dict__', '__weakref__')}
+    namespace['__slots__'] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+def to_dict(record) -> dict:
+    """Shallow field -> value dict of the record (dataclasses.asdict deep copies)"""
+    return {_field.name: getattr(record, _field.name) for _field in fields(record)}
+
+
+def update(record, **changes) -> None:
+    """Updates the record's fields"""
+    for name, value in changes.items():
+        setattr(record, name, value)
+
+
+def intern(value):
+    """Interns the string - repeated artist/album/music names share one object"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+__all__ = ['dataclass', 'field', 'slotted', 'to_dict', 'update', 'intern']
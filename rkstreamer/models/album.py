@@ -2,19 +2,22 @@
 
 from typing import Optional
 from rkstreamer.interfaces.models import IAlbumModel
-from rkstreamer.models.song import JioSaavnSongQueue
-from rkstreamer.models.data import Album, AlbumSearch, Song
+from rkstreamer.models.song import JioSaavnSongQueue, SongModelMixin
+from rkstreamer.models.data import Album, AlbumSearch
+from rkstreamer.models._model import to_dict, update
 from rkstreamer.services.album import JioSaavnAlbumProvider
 from rkstreamer.services.song import JioSaavnSongProvider
+from rkstreamer.services.cache import StreamUrlCache
 from rkstreamer.types import (
     AlbumType,
     AlbumSearchType,
+    AlbumRawType,
     AlbumListRawType,
     AlbumSearchIndexType,
+    DatabaseProviderType,
     NetworkProviderType,
     SongQueueModelType,
     SongType,
-    SongListRawType,
     SongListType,
     SongIndexType
 )
@@ -23,22 +26,26 @@ from rkstreamer.models.exceptions import (
 )
 
 
-class JioSaavnAlbumModel(IAlbumModel):
+class JioSaavnAlbumModel(SongModelMixin, IAlbumModel):
     """Album model implemented for Jio Saavn service"""
 
-    def __init__(self, network_provider: NetworkProviderType) -> None:
+    def __init__(
+            self,
+            network_provider: NetworkProviderType,
+            database: Optional[DatabaseProviderType] = None,
+            url_cache: Optional[StreamUrlCache] = None) -> None:
         self.network_provider = network_provider
+        self.database = database
+        self.url_cache = url_cache
         self.stream_provider = JioSaavnAlbumProvider(
             client=self.network_provider)
-        self.song_provider = JioSaavnSongProvider(client=self.network_provider)
+        self.song_provider = JioSaavnSongProvider(
+            client=self.network_provider, url_cache=url_cache)
         self.queue: SongQueueModelType = JioSaavnSongQueue()
         self.indexed_search_albums = {}
         self.indexed_album_songs = {}
         self._recomm_song_index = 1
 
-    def _create_song(self, **kwargs) -> SongType:
-        return Song(**kwargs)
-
     def _create_search_album(self, **kwargs) -> AlbumSearchType:
         return AlbumSearch(**kwargs)
 
@@ -55,14 +62,16 @@ class JioSaavnAlbumModel(IAlbumModel):
                                     for count, album in enumerate(albums, 1)}
         return self.indexed_album_songs
 
-    def _create_recomm_song(self, songs: SongListRawType) -> SongIndexType:
-        recomm_songs = {}
-        _songs: SongListType = [self._create_song(**song) for song in songs]
-        for song in _songs:
-            if song not in self.queue.rsongs_copy_:
-                recomm_songs.update({self._recomm_song_index: song})
-                self._recomm_song_index += 1
-        return recomm_songs
+    def _read_album(self, album_id: str) -> Optional[AlbumRawType]:
+        """Reads the album & its songs from the library, if stored"""
+        if self.database:
+            return self.database.read('albums', album_id)
+        return None
+
+    def _write_album(self, album: AlbumRawType) -> None:
+        """Stores the album & its songs in the library"""
+        if self.database:
+            self.database.write('albums', [album])
 
     def search(self, search_string: str, **kwargs) -> AlbumSearchIndexType:
         search_result = self.stream_provider.search_albums(
@@ -72,16 +81,24 @@ class JioSaavnAlbumModel(IAlbumModel):
     def select(self, selection: int, **kwargs) -> AlbumType:
         selected_album = self.indexed_search_albums.get(int(selection))
         if selected_album:
-            album_songs_raw = self.stream_provider.select_album(
-                selected_album.id, **kwargs)
-            selected_album.__dict__.update(
-                {'songs': self._create_album_song_index(album_songs_raw)})
-            return self._create_album(**selected_album.__dict__)
+            stored_album = self._read_album(selected_album.id)
+            if stored_album:
+                album_songs_raw = stored_album['songs']
+            else:
+                album_songs_raw = self.stream_provider.select_album(
+                    selected_album.id, **kwargs)
+                self._write_album(to_dict(selected_album) | {'songs': album_songs_raw})
+            return self._create_album(
+                **to_dict(selected_album),
+                songs=self._create_album_song_index(album_songs_raw))
         raise InvalidInput("Invalid album selection input provided.")
 
     def select_album_using_id(self, album_id: str) -> AlbumType:
         """Select album using ID"""
-        album_songs_raw = self.stream_provider.select_album_id(album_id)
+        album_songs_raw = self._read_album(album_id)
+        if not album_songs_raw:
+            album_songs_raw = self.stream_provider.select_album_id(album_id)
+            self._write_album(album_songs_raw)
         album_songs_raw.update(
             {'songs': self._create_album_song_index(album_songs_raw['songs'])})
         return self._create_album(**album_songs_raw)
@@ -92,19 +109,15 @@ class JioSaavnAlbumModel(IAlbumModel):
         if selected_song:
             song_url = self.song_provider.select_song(selected_song.token)
             if song_url:
-                selected_song.__dict__.update({'stream_url': song_url})
-                selected_song.__dict__.update({'status': 'Loaded'})
+                update(selected_song, stream_url=song_url, status='Loaded')
                 return selected_song
         raise InvalidInput("Invalid album song selection input provided.")
 
-    def get_related_songs(self, data: str) -> SongIndexType:
-        """Gets recommended songs using song_id and updates the RQueue"""
-        recomm_songs_raw: SongListRawType = self.song_provider.get_recomm_songs(
-            data)
-        if recomm_songs_raw:
-            return self._create_recomm_song(recomm_songs_raw)
-
-    def get_song_url(self, data: str) -> str:
-        """Get the song's stream url using Enc Url Token - used for rsongs download"""
-        stream_url = self.song_provider.select_song(data)
-        return stream_url
+    def select_songs_from_album(self, selections: list) -> tuple[SongListType, SongListType]:
+        """Selecting songs from the album, stream urls are resolved as one batch.
+        Returns the loaded songs & the songs that failed to load, in selection order"""
+        selected_songs = [self.indexed_album_songs.get(int(selection))
+                          for selection in selections]
+        if not all(selected_songs):
+            raise InvalidInput("Invalid album song selection input provided.")
+        return self.resolve_songs(selected_songs)
@@ -1,10 +1,11 @@
 """Data Models"""
 
-from ._model import dataclass, field
+from ._model import dataclass, field, slotted, intern
 
+@slotted
 @dataclass(unsafe_hash=True)
 class SongBase():
-    """Base for song model"""
+    """Base for song model - metadata repeated across tracks is interned"""
     name: str = field(hash=True, compare=True)
     id: str = field(hash=False, compare=False, default=None, repr=False)
     artists: str = field(hash=False, compare=False, default=None)
@@ -13,7 +14,14 @@ class SongBase():
     album_id: str = field(hash=False, compare=False, default=None, repr=False)
     duration: int = field(hash=False, compare=False, default=None, repr=False)
 
+    def __post_init__(self):
+        self.artists = intern(self.artists)
+        self.music = intern(self.music)
+        self.album_name = intern(self.album_name)
+        self.album_id = intern(self.album_id)
 
+
+@slotted
 @dataclass(unsafe_hash=True)
 class SongSearch(SongBase):
     """Song Search model'"""
@@ -21,7 +29,13 @@ class SongSearch(SongBase):
     token: str = field(hash=False, compare=False, default=None, repr=False)
     language: str = field(hash=False, compare=False, default=None, repr=False)
 
+    def __post_init__(self):
+        SongBase.__post_init__(self)
+        self.status = intern(self.status)
+        self.language = intern(self.language)
+
 
+@slotted
 @dataclass(unsafe_hash=True)
 class Song(SongSearch):
     """Song model"""
@@ -1,5 +1,8 @@
 """Models - Exception module"""
 
+# Network errors are raised by the services - re-exported for the controllers.
+from rkstreamer.services.exceptions import NetworkError, CircuitOpenError
+
 class InvalidInput(Exception):
     """Invalid/unexpected input provided"""
 
@@ -1,6 +1,8 @@
 """Models - Playlist"""
 
+from typing import Iterator, Optional
 from rkstreamer.models.data import Playlist, PlaylistSearch, Song
+from rkstreamer.models._model import to_dict
 from rkstreamer.models.song import JioSaavnSongQueue
 from rkstreamer.interfaces.models import IPlaylistModel
 from rkstreamer.services.playlist import JioSaavnPlaylistProvider
@@ -8,7 +10,10 @@ from rkstreamer.types import (
     PlaylistType,
     PlaylistSearchType,
     PlaylistSearchIndexType,
-    NetworkProviderType
+    SongType,
+    SongListType,
+    NetworkProviderType,
+    DatabaseProviderType
 )
 from rkstreamer.models.exceptions import InvalidInput
 
@@ -16,12 +21,17 @@ from rkstreamer.models.exceptions import InvalidInput
 class JioSaavnPlaylistModel(IPlaylistModel):
     """Playlist model implemented for Jio Saavn service"""
 
-    def __init__(self, network_provider: NetworkProviderType) -> None:
+    def __init__(
+            self,
+            network_provider: NetworkProviderType,
+            database: Optional[DatabaseProviderType] = None) -> None:
+        self.database = database
         self.stream_provider = JioSaavnPlaylistProvider(
             client=network_provider)
         self.queue = JioSaavnSongQueue()
         self.indexed_playlists = {}
         self.playlist_songs = []
+        self._pending_pages = iter(())
 
     def _create_playlist(self, **kwargs) -> PlaylistType:
         return Playlist(**kwargs)
@@ -37,15 +47,35 @@ class JioSaavnPlaylistModel(IPlaylistModel):
     def search(self, search_string: str, **kwargs) -> PlaylistSearchIndexType:
         response = self.stream_provider.search_playlists(
             search_string, **kwargs)
+        if self.database:
+            self.database.write('playlists', response)
         return self._create_search_playlist_index(response)
 
     def select(self, selection: int, **kwargs) -> PlaylistType:
+        """Select playlist - the playlist is returned with its first page of songs,
+        the remaining pages are left to load_pages(). View lists all the songs."""
         selected_plist = self.indexed_playlists.get(int(selection))
         if selected_plist:
-            plist_songs = self.stream_provider.select_playlist(
-                selected_plist.token, **kwargs)
+            pages = self.stream_provider.select_playlist_pages(
+                selected_plist.token, song_count=selected_plist.song_count, **kwargs)
+            plist_songs = next(pages)
             if plist_songs:
-                selected_plist.__dict__.update(
-                    {'songs': [Song(**song, status='Loaded') for song in plist_songs]})
-                return self._create_playlist(**selected_plist.__dict__)
+                if kwargs.get('view'):
+                    for page in pages:
+                        plist_songs.extend(page)
+                else:
+                    self._pending_pages = pages
+                return self._create_playlist(
+                    **to_dict(selected_plist),
+                    songs=list(plist_songs.records(Song, status='Loaded')))
         raise InvalidInput("Invalid playlist selection input provided.")
+
+    def load_pages(self) -> Iterator[SongListType]:
+        """Yields the songs of the selected playlist's remaining pages as they load"""
+        pages, self._pending_pages = self._pending_pages, iter(())
+        for page in pages:
+            yield list(page.records(Song, status='Loaded'))
+
+    def song_url(self, song: SongType) -> str:
+        """Stream url of the song at the bitrate picked now - as it comes up next"""
+        return self.stream_provider.rebitrate(song.stream_url)
@@ -2,10 +2,18 @@
 Models - Song
 """
 
+import threading
+from collections import Counter
 from typing import Optional
 from rkstreamer.models.data import Song, SongSearch, SongQueue
+from rkstreamer.models._model import to_dict, update
 from rkstreamer.interfaces.models import ISongModel, ISongQueue
 from rkstreamer.services.song import JioSaavnSongProvider
+from rkstreamer.services.cache import StreamUrlCache
+from rkstreamer.services.recommend import SeenSongs, rank, RQUEUE_SIZE
+from rkstreamer.utils.helper import PREFETCH_BYTES
+from rkstreamer.utils.indexed import IndexedList
+from rkstreamer.utils.trace import traced
 from rkstreamer.types import (
     SongListRawType,
     SongListType,
@@ -16,7 +24,8 @@ from rkstreamer.types import (
     SongQueueType,
     SongQueueIndexType,
     SongQueueModelType,
-    NetworkProviderType)
+    NetworkProviderType,
+    DatabaseProviderType)
 from rkstreamer.models.exceptions import (
     AddMediaError,
     RemoveMediaError,
@@ -26,32 +35,104 @@ from rkstreamer.models.exceptions import (
 )
 
 
-class JioSaavnSongModel(ISongModel):
-    """Song model implemented for Jio Saavn Service"""
-
-    def __init__(self, network_provider: NetworkProviderType) -> None:
-        self.network_provider = network_provider
-        self.stream_provider = JioSaavnSongProvider(
-            client=self.network_provider)
-        self.queue: SongQueueModelType = JioSaavnSongQueue()
-        self.indexed_search_songs: SongSearchIndexType = {}
-        self._recomm_song_index = 1
+class SongModelMixin():
+    """Stream urls, recommendations & play history of songs - shared by the models
+    queueing songs. Needs song_provider, url_cache, database, queue & _recomm_song_index"""
 
     def _create_song(self, **kwargs) -> SongType:
         return Song(**kwargs)
 
-    def _create_search_song(self, **kwargs) -> SongSearchType:
-        return SongSearch(**kwargs)
-
     def _create_recomm_song(self, songs: SongListRawType) -> SongIndexType:
-        recomm_songs = {}
+        """Indexes the songs not recommended, queued or played before - by song id,
+        as many as the RQueue has room for. They're marked seen once update_rqueue takes them"""
+        recomm_songs, keys = {}, set()
+        room = RQUEUE_SIZE - len(self.queue.get_rsongs)
         _songs: SongListType = [self._create_song(**song) for song in songs]
         for song in _songs:
-            if song not in self.queue.rsongs_copy_:
+            if len(recomm_songs) >= room:
+                break
+            key = song_key(song)
+            if key not in self.queue.rsongs_seen and key not in keys:
+                keys.add(key)
                 recomm_songs.update({self._recomm_song_index: song})
                 self._recomm_song_index += 1
         return recomm_songs
 
+    def get_song_url(self, data: str) -> str:
+        """Get the song's stream url using Enc Url Token - used for rsongs download"""
+        stream_url = self.song_provider.select_song(data)
+        return stream_url
+
+    def get_song_urls(self, tokens: list, **kwargs) -> list:
+        """Get the stream urls for the Enc Url Tokens as one batch, None for failed ones"""
+        return self.song_provider.select_songs(tokens, **kwargs)
+
+    def resolve_songs(self, songs: SongListType, **kwargs) -> tuple[SongListType, SongListType]:
+        """Updates the songs with stream url & 'Loaded' status using one batch.
+        Returns the loaded songs & the songs that failed to load"""
+        loaded, failed = [], []
+        for song, stream_url in zip(
+                songs, self.get_song_urls([song.token for song in songs], **kwargs)):
+            if stream_url:
+                song.stream_url = stream_url
+                song.status = 'Loaded'
+                loaded.append(song)
+            else:
+                failed.append(song)
+        return loaded, failed
+
+    def get_related_songs(self, data: str) -> SongIndexType:
+        """Gets recommended songs using song_id and updates the RQueue"""
+        recomm_songs_raw: SongListRawType = self.song_provider.get_recomm_songs(
+            data)
+        if recomm_songs_raw:
+            return self._create_recomm_song(recomm_songs_raw)
+
+    def get_related_songs_batch(self, song_ids: list) -> SongIndexType:
+        """Recommendations for several songs, fetched as one batch & ranked"""
+        return self._create_recomm_song(
+            rank(self.song_provider.get_recomm_songs_batch(song_ids)))
+
+    def renew_stream_url(self, song: SongType) -> Optional[str]:
+        """Resolves the song's stream url again if it expires within the url cache's
+        expiry margin - None if it doesn't (or the song has no Enc Url Token)"""
+        if self.url_cache is None or not song.token or \
+                not self.url_cache.expiring(song.stream_url):
+            return None
+        return self.song_provider.select_song(song.token)
+
+    def prefetch(self, song: SongType) -> int:
+        """Warms the song's stream url by fetching its first PREFETCH_BYTES"""
+        return self.song_provider.warm_stream(song.stream_url, PREFETCH_BYTES)
+
+    def record_play(self, song: SongType) -> None:
+        """Records the playing song in the library play history"""
+        if self.database:
+            self.database.write('history', [{'id': song.id, 'name': song.name}])
+
+
+class JioSaavnSongModel(SongModelMixin, ISongModel):
+    """Song model implemented for Jio Saavn Service"""
+
+    def __init__(
+            self,
+            network_provider: NetworkProviderType,
+            database: Optional[DatabaseProviderType] = None,
+            url_cache: Optional[StreamUrlCache] = None) -> None:
+        self.network_provider = network_provider
+        self.database = database
+        self.url_cache = url_cache
+        self.stream_provider = JioSaavnSongProvider(
+            client=self.network_provider, url_cache=url_cache)
+        self.song_provider = self.stream_provider
+        self.queue: SongQueueModelType = JioSaavnSongQueue()
+        self.indexed_search_songs: SongSearchIndexType = {}
+        self.search_bitrate = None  # -b: flag of the search indexed - caps its songs' bitrate.
+        self._recomm_song_index = 1
+
+    def _create_search_song(self, **kwargs) -> SongSearchType:
+        return SongSearch(**kwargs)
+
     def _create_search_song_index(self, songs: SongListRawType) -> SongSearchIndexType:
         self.indexed_search_songs = {count: self._create_search_song(**song)
                                      for count, song in enumerate(songs, 1)}
@@ -61,6 +142,9 @@ class JioSaavnSongModel(ISongModel):
         """Search Song using the search string and creates a Song Search data model"""
         search_result: SongListRawType = self.stream_provider.search_songs(
             search_string, **kwargs)
+        if self.database:
+            self.database.write('songs', search_result)
+        self.search_bitrate = kwargs.get('bitrate')
         return self._create_search_song_index(search_result)
 
     def select(self, selection: int, **kwargs) -> Optional[SongType]:
@@ -68,34 +152,47 @@ class JioSaavnSongModel(ISongModel):
         selected_song = self.indexed_search_songs.get(int(selection))
         if selected_song:
             song_url = self.stream_provider.select_song(
-                selected_song.token, **kwargs)
+                selected_song.token, **{'bitrate': self.search_bitrate, **kwargs})
             if song_url:
-                selected_song.__dict__.update({'stream_url': song_url})
-                selected_song.__dict__.update({'status': 'Loaded'})
-                return self._create_song(**selected_song.__dict__)
+                update(selected_song, status='Loaded')
+                return self._create_song(**to_dict(selected_song), stream_url=song_url)
         raise InvalidInput("Invalid song selection input provided.")
 
-    def get_song_url(self, data: str) -> str:
-        """Get the song's stream url using Enc Url Token - used for rsongs download"""
-        stream_url = self.stream_provider.select_song(data)
-        return stream_url
+    def select_many(self, selections: list) -> tuple[SongListType, SongListType]:
+        """Select Songs from the Song Search Index, stream urls are resolved as one batch.
+        Returns the loaded songs & the songs that failed to load, in selection order"""
+        selected_songs = [self.indexed_search_songs.get(int(selection))
+                          for selection in selections]
+        if not all(selected_songs):
+            raise InvalidInput("Invalid song selection input provided.")
+        return self.resolve_songs(
+            [self._create_song(**to_dict(song)) for song in selected_songs],
+            bitrate=self.search_bitrate)
 
-    def get_related_songs(self, data: str) -> SongIndexType:
-        """Gets recommended songs using song_id and updates the RQueue"""
-        recomm_songs_raw: SongListRawType = self.stream_provider.get_recomm_songs(
-            data)
-        if recomm_songs_raw:
-            return self._create_recomm_song(recomm_songs_raw)
+
+PLAYED = '\033[31mPlayed\033[0m'
+
+
+def song_key(song: SongType):
+    """Queue key of the song - song id, name if the id is unknown"""
+    return song.id or song.name
 
 
 class JioSaavnSongQueue(ISongQueue):
-    """Song queue implemented for Jio Saavn"""
+    """Song queue implemented for Jio Saavn.
+    Songs are kept in an IndexedList - lookup by song id & stream url,
+    '#n' positions & the next loaded song in O(log n), status counts kept as they change."""
 
     def __init__(self) -> None:
-        self.queue: SongQueueType = SongQueue([])
-        self._indexed_queue = {}
-        self.rsongs_copy_ = set()
+        self.queue: SongQueueType = SongQueue(IndexedList(key=song_key))
+        self._urls = {}  # stream url -> song
+        self._counted = {}  # song key -> (status, stream url) counted in status_counts
+        self.status_counts = Counter()
+        self.rsongs_seen = SeenSongs()  # ids recommended, queued or played - not recommended again.
         self.rsongs_list = {}
+        self._rlock = threading.Lock()  # rsongs are added by the recommendation worker.
+        # queue & its indexes - extended by the page loader, updated by the player events.
+        self._lock = threading.RLock()
         self.current_playing_song = None
 
     def _create_song(self, **kwargs) -> SongType:
@@ -103,101 +200,150 @@ class JioSaavnSongQueue(ISongQueue):
 
     def _check_media(self, song: SongType) -> bool:
         """Checks the presence of media"""
-        if song in self.queue.songs:
-            return True
-        return False
+        return song in self.queue.songs
+
+    def _track(self, song: SongType) -> None:
+        """Brings the status counts, loaded mark & stream url index up to date for the song"""
+        key = song_key(song)
+        with self._lock:
+            old_status, old_url = self._counted.get(key, (None, None))
+            if old_status != song.status:
+                if old_status is not None:
+                    self.status_counts[old_status] -= 1
+                self.status_counts[song.status] += 1
+            if old_url != song.stream_url:
+                if self._urls.get(old_url) is song:
+                    del self._urls[old_url]
+                if song.stream_url:
+                    self._urls[song.stream_url] = song
+            self._counted[key] = (song.status, song.stream_url)
+            self.queue.songs.mark(song, song.status == 'Loaded')
+
+    def _set_status(self, song: SongType, status: str) -> None:
+        with self._lock:
+            song.status = status
+            self._track(song)
+
+    @traced('queue')
+    def set_stream_url(self, song: SongType, stream_url: str) -> None:
+        """Changes the queued song's stream url - e.g. to another bitrate"""
+        with self._lock:
+            song.stream_url = stream_url
+            self._track(song)
+
+    def _append(self, song: SongType) -> bool:
+        """Appends the song if it's not queued, False if it's present"""
+        with self._lock:
+            if not self.queue.songs.append(song):
+                queued = self.queue.songs.get(song_key(song))
+                self._track(queued)  # resync - song may have been reloaded.
+                return False
+            self._track(song)
+        self.rsongs_seen.add(song_key(song))
+        return True
 
-    def _normalize_queue_index(self) -> None:
-        """Updates the queue with index"""
-        self._indexed_queue = dict(enumerate(self.queue.songs, 1))
+    def _discard(self, song: SongType) -> None:
+        """Removes the song & its status count/url index entries"""
+        with self._lock:
+            self.queue.songs.remove(song)
+            status, stream_url = self._counted.pop(song_key(song))
+            self.status_counts[status] -= 1
+            if self._urls.get(stream_url) is song:
+                del self._urls[stream_url]
 
+    @traced('queue')
     def add_playlist(self, entity: SongType) -> None:
         """Add playlist songs"""
         for song in entity.songs:
-            if not self._check_media(song):
-                self.queue.songs.append(song)
-                self._normalize_queue_index()
+            self._append(song)
         print(f"\n\033[01m\033[32mAdded: '{entity.name}'\033[0m")
         # print()
 
+    @traced('queue')
     def change_loaded_status(self) -> None:
         """Change loaded status for all songs with 'loaded' status"""
-        for song in self.queue.songs:
-            if song.status == 'Loaded':
-                song.status = '\033[31mPlayed\033[0m'
+        with self._lock:
+            for song in self.queue.songs.marked_before():
+                self._set_status(song, PLAYED)
 
+    @traced('queue')
     def change_loaded_status_before(self, entity: SongType) -> None:
         """Change loaded status for songs that before the called one."""
-        for song in self.queue.songs:
-            if entity == song:
-                break  # loop until this song is found.
-            if song.status == 'Loaded':
-                song.status = '\033[31mPlayed\033[0m'
-                # change the status for all songs thats above this one.
+        # all loaded songs if the called one isn't queued.
+        with self._lock:
+            for song in self.queue.songs.marked_before(self.queue.songs.get(song_key(entity))):
+                self._set_status(song, PLAYED)
 
+    @traced('queue')
     def flush_queue(self) -> None:
         """Flushes the queue"""
-        self.queue.songs.clear()
-        self._normalize_queue_index()
+        with self._lock:
+            self.queue.songs.clear()
+            self._urls.clear()
+            self._counted.clear()
+            self.status_counts.clear()
 
+    @traced('queue')
     def add(self, entity: SongType) -> None:
         """Add Song to Queue"""
-        if not self._check_media(entity):
-            self.queue.songs.append(entity)
-            self._normalize_queue_index()
+        if self._append(entity):
             print(f"\n\033[01m\033[32mAdded: '{entity.name}'\033[0m")
             # print()
         if not self._check_media(entity):
             raise AddMediaError("Failed to add media to queue")
-        if entity not in self._indexed_queue.values():
-            raise AddMediaError("Failed to add media to queue index")
 
+    @traced('queue')
     def remove(self, index: int) -> SongListType:
-        """Remove Songs by Index value"""
+        """Remove Songs by Index value - indexes are the ones displayed before removal"""
         removed_songs = []
-        for value in list(index):
-            song = self.fetch(value)
-            if self._check_media(song):
-                self.queue.songs.remove(song)
-                self._indexed_queue.pop(int(value))
-                removed_songs.append(song)
-                print(f"\n\033[93mRemoved: '{song.name}'\033[0m")
-                # print()
-            else:
+        for song in [self.fetch(value) for value in list(index)]:
+            if not self._check_media(song):
                 raise MediaNotFound("Media not found in queue to delete")
-            if song in self._indexed_queue.values():
+            self._discard(song)
+            removed_songs.append(song)
+            print(f"\n\033[93mRemoved: '{song.name}'\033[0m")
+            # print()
+            if self._check_media(song):
                 raise RemoveMediaError(
                     "Failed to remove media from queue index")
-        self._normalize_queue_index()
         return removed_songs
 
+    @traced('queue')
     def fetch(self, index: int) -> SongType:
         """Fetch the song from Queue Index"""
-        song = self._indexed_queue.get(int(index))
-        if not song:
-            raise GetMediaError("Failed to get media from queue index")
-        return song
+        try:
+            index = int(index)
+            if index < 1:
+                raise IndexError(index)
+            return self.queue.songs[index - 1]
+        except IndexError:
+            raise GetMediaError("Failed to get media from queue index") from None
+
+    @traced('queue')
+    def extend(self, songs: SongListType) -> None:
+        """Appends the songs that aren't queued yet"""
+        for song in songs:
+            self._append(song)
 
     def add_related_songs(self, songs: SongListRawType) -> None:
         """Add recommended songs to queue index"""
-        queue_length = len(self.queue.songs)
-        for song in songs:
-            if not self._check_media(song):
-                self.queue.songs.append(song)
-        for count, song in enumerate(self.queue.songs, queue_length+1):
-            self._indexed_queue.update({count: song})
+        self.extend(songs)
 
+    @traced('queue')
     def update_qstatus(self, status: str, stream_url: str) -> Optional[SongType]:
         """Update 'played' status for songs in Queue and returns Song object if it's successful.
         Also, Updates the current_playing_song attr."""
-        for song in self.queue.songs:
-            if stream_url == song.stream_url:
-                self.current_playing_song = song
-                if song.status == 'Loaded':
-                    print(f"\n\033[31m>>> Playing '{song.name}' <<<\033[0m")
-                    song.status = status
-                    return song
-        return None
+        with self._lock:
+            song = self._urls.get(stream_url)
+            if song is None or song.stream_url != stream_url:
+                return None
+            self.current_playing_song = song
+            self._track(song)
+            if song.status != 'Loaded':
+                return None
+            self._set_status(song, status)
+        print(f"\n\033[31m>>> Playing '{song.name}' <<<\033[0m")
+        return song
 
     @property
     def get_queue(self) -> SongQueueType:
@@ -207,41 +353,68 @@ class JioSaavnSongQueue(ISongQueue):
     @property
     def get_indexed_queue(self) -> SongQueueIndexType:
         """returns the indexed queue"""
-        return self._indexed_queue
+        return dict(enumerate(self.queue.songs, 1))
 
     def check_status(self, queue: SongQueueType) -> bool:
         """Checks the queue status for 'played' songs"""
-        for song in queue.songs:
-            if song.status == '\033[31mPlayed\033[0m':
-                continue
-            else:
-                return False
-        return True
-
+        if queue is self.queue:
+            return self.status_counts[PLAYED] == len(queue.songs)
+        return all(song.status == PLAYED for song in queue.songs)
+
+    def get_next_song(self) -> Optional[SongType]:
+        """Returns the first 'Loaded' song queued after the current playing song"""
+        with self._lock:
+            current = self.current_playing_song
+            if current is not None and current not in self.queue.songs:
+                current = None
+            return self.queue.songs.next_marked(current)
+
+    @traced('queue')
     def pop_rsong(self) -> Optional[SongType]:
         """Pop rsong from its queue and move it to main queue.
         Change the song status to 'Loaded'"""
-        if self.rsongs_list:
-            first_rsong = next(iter(self.rsongs_list))
-            rsong = self.rsongs_list.pop(first_rsong)
-            # rsong = self.rsongs_list.pop(0)
-            rsong.status = 'Loaded'
-            return rsong
+        with self._rlock:
+            if self.rsongs_list:
+                first_rsong = next(iter(self.rsongs_list))
+                rsong = self.rsongs_list.pop(first_rsong)
+                # rsong = self.rsongs_list.pop(0)
+                rsong.status = 'Loaded'
+                return rsong
         return None
 
+    @traced('queue')
     def get_rsong_index(self, index: int) -> Optional[SongType]:
         """Get RS song from the given index"""
         try:
-            rsong = self.rsongs_list.pop(index)
+            with self._rlock:
+                rsong = self.rsongs_list.pop(index)
             return rsong
         except (IndexError,KeyError):
             raise GetMediaError("Failed to get song from RS Queue") from None
         return None
 
+    @traced('queue')
+    def get_rsong_indices(self, indices: list) -> SongIndexType:
+        """Get the RS songs of the given indices (repeats taken once) - all or none:
+        nothing is popped if any of the indices isn't in the RS Queue"""
+        indices = list(dict.fromkeys(indices))
+        with self._rlock:
+            if not all(index in self.rsongs_list for index in indices):
+                raise GetMediaError("Failed to get song from RS Queue")
+            return {index: self.rsongs_list.pop(index) for index in indices}
+
+    @traced('queue')
+    def restore_rsongs(self, rsongs: SongIndexType) -> None:
+        """Puts RS songs taken with get_rsong_indices back in place"""
+        with self._rlock:
+            self.rsongs_list = dict(sorted((self.rsongs_list | rsongs).items()))
+
+    @traced('queue')
     def remove_rsong_index(self, index: int) -> Optional[SongType]:
         """Removes the RS song from its queue"""
         try:
-            rsong = self.rsongs_list.pop(index)
+            with self._rlock:
+                rsong = self.rsongs_list.pop(index)
             if rsong:
                 print(f"\n\033[33mRemoved: '{rsong.name}'\033[0m")
         except (IndexError,KeyError):
@@ -249,10 +422,17 @@ class JioSaavnSongQueue(ISongQueue):
 
     @property
     def get_rsongs(self) -> SongIndexType:
-        """Get the rsongs list"""
-        return self.rsongs_list
+        """Get a copy of the rsongs list - the recommendation worker keeps updating it"""
+        with self._rlock:
+            return dict(self.rsongs_list)
 
+    @traced('queue')
     def update_rqueue(self, rsongs: SongIndexType):
-        """Update the rsongs list"""
-        self.rsongs_list.update(rsongs)
-        self.rsongs_copy_.update(rsongs.values())
+        """Update the rsongs list - capped at RQUEUE_SIZE, rsongs past the cap aren't taken.
+        Only the rsongs taken are marked seen, the others may be recommended later"""
+        with self._rlock:
+            for index, rsong in rsongs.items():
+                if len(self.rsongs_list) >= RQUEUE_SIZE:
+                    break
+                if self.rsongs_seen.add(song_key(rsong)):
+                    self.rsongs_list[index] = rsong
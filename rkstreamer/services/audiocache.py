@@ -0,0 +1,340 @@
+"""
+Services - Audio cache & loopback streaming proxy
+"""
+
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlsplit
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import requests
+from rkstreamer.services.network import USER_AGENT
+from rkstreamer.services.bitrate import policy
+from rkstreamer.utils.helper import APP_DIR
+
+CHUNK_SIZE = 64 * 1024
+SAMPLE_BYTES = 256 * 1024  # first bytes of a stream, read by the player unthrottled.
+
+
+def cache_key(stream_url: str, song_id: Optional[str] = None) -> str:
+    """Cache key of the stream - song id & bitrate.
+    Without the song id, the CDN file name (the song's id on the CDN) is used."""
+    name = os.path.basename(urlsplit(stream_url).path)
+    match = re.search(r'_(\d+)\.\w+$', name)
+    bitrate = match.group(1) if match else 'na'
+    ident = song_id or os.path.splitext(name)[0].rsplit('_', 1)[0] or \
+        hashlib.sha1(stream_url.encode()).hexdigest()
+    return re.sub(r'[^\w-]', '_', f"{ident}_{bitrate}")
+
+
+class AudioCache():
+    """Disk cache of complete audio files, size-capped with LRU eviction.
+    Files are written to a temp file and only become visible once complete."""
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 512 * 1024 * 1024) -> None:
+        self.path = path or os.path.join(APP_DIR, 'audio')
+        self.max_bytes = max_bytes
+        self._files: Optional[OrderedDict] = None  # key -> size, LRU order.
+        self._lock = threading.Lock()
+
+    def _index(self) -> OrderedDict:
+        """Loads the cached files in last access order - called with the lock held"""
+        if self._files is None:
+            os.makedirs(self.path, exist_ok=True)
+            entries = [entry for entry in os.scandir(self.path)
+                       if entry.is_file() and entry.name.endswith('.audio')]
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            self._files = OrderedDict(
+                (entry.name[:-len('.audio')], entry.stat().st_size) for entry in entries)
+        return self._files
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.audio")
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the cached file, None if it's not cached"""
+        with self._lock:
+            files = self._index()
+            if key not in files:
+                return None
+            files.move_to_end(key)
+        path = self._file(key)
+        try:
+            os.utime(path)  # LRU order survives restarts.
+        except OSError:
+            with self._lock:
+                files.pop(key, None)
+            return None
+        return path
+
+    def writer(self, key: str) -> 'CacheWriter':
+        """Temp file writer for the key - commit() adds it to the cache"""
+        with self._lock:
+            self._index()
+        return CacheWriter(self, key)
+
+    def _commit(self, key: str, temp_path: str) -> None:
+        size = os.path.getsize(temp_path)
+        with self._lock:
+            files = self._index()
+            if size > self.max_bytes:
+                os.remove(temp_path)
+                return
+            os.replace(temp_path, self._file(key))
+            files[key] = size
+            files.move_to_end(key)
+            total = sum(files.values())
+            while total > self.max_bytes:
+                old_key, old_size = files.popitem(last=False)
+                total -= old_size
+                try:
+                    os.remove(self._file(old_key))
+                except OSError:
+                    pass
+
+    @property
+    def size(self) -> int:
+        """Bytes cached"""
+        with self._lock:
+            return sum(self._index().values())
+
+
+class CacheWriter():
+    """Writes the streamed bytes to a temp file of the cache"""
+
+    def __init__(self, cache: AudioCache, key: str) -> None:
+        self.cache = cache
+        self.key = key
+        self.temp_path = os.path.join(cache.path, f"{key}.{threading.get_ident()}.part")
+        self.file = open(self.temp_path, 'wb')  # pylint: disable=consider-using-with
+
+    def write(self, data: bytes) -> None:
+        self.file.write(data)
+
+    def commit(self) -> None:
+        """Complete file - moved into the cache"""
+        self.file.close()
+        self.cache._commit(self.key, self.temp_path)  # pylint: disable=protected-access
+
+    def discard(self) -> None:
+        """Incomplete file - removed"""
+        self.file.close()
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    """Serves /<key> from the cache, or streams it from the CDN & tees it to the cache"""
+
+    server: '_ProxyServer'
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Cached file (ranges supported) or CDN stream - /<key>/<url id>"""
+        key, _, url_id = self.path.lstrip('/').partition('/')
+        proxy = self.server.proxy
+        cached = proxy.cache.get(key)
+        if cached:
+            proxy.tally(hit=True)
+            self._send_file(cached)
+            return
+        stream_url = proxy.upstream(url_id)
+        if stream_url is None:
+            self.send_error(404)
+            return
+        proxy.tally(hit=False)
+        self._stream(stream_url, key)
+
+    def _send_file(self, path: str) -> None:
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        match = re.match(r'bytes=(\d*)-(\d*)', self.headers.get('Range', ''))
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), end) if match.group(2) else end
+            else:
+                start = max(size - int(match.group(2)), 0)
+            if start > end:
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{size}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'audio/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        with open(path, 'rb') as audio:
+            audio.seek(start)
+            remaining = end - start + 1
+            try:
+                while remaining > 0:
+                    data = audio.read(min(CHUNK_SIZE, remaining))
+                    if not data:
+                        break
+                    self.wfile.write(data)
+                    remaining -= len(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    @staticmethod
+    def _full_length(upstream: requests.Response) -> int:
+        """Size of the file if the response is all of it (200, or a 206 of bytes 0-N-1/N
+        - what players request with 'Range: bytes=0-'), else -1"""
+        if upstream.status_code == 200:
+            return int(upstream.headers.get('Content-Length') or -1)
+        if upstream.status_code == 206:
+            match = re.fullmatch(r'bytes 0-(\d+)/(\d+)',
+                                 upstream.headers.get('Content-Range', '').strip())
+            if match and int(match.group(1)) + 1 == int(match.group(2)):
+                return int(match.group(2))
+        return -1
+
+    def _stream(self, stream_url: str, key: str) -> None:
+        headers = {'User-Agent': USER_AGENT}
+        range_header = self.headers.get('Range')
+        if range_header:
+            headers['Range'] = range_header
+        try:
+            upstream = self.server.proxy.session.get(
+                stream_url, headers=headers, stream=True, timeout=(5, 30))
+        except requests.exceptions.RequestException:
+            self.send_error(502)
+            return
+        with upstream:
+            self.send_response(upstream.status_code)
+            for header in ('Content-Type', 'Content-Length', 'Content-Range', 'Accept-Ranges'):
+                if header in upstream.headers:
+                    self.send_header(header, upstream.headers[header])
+            self.end_headers()
+            # only a complete body from the start is cached - seek requests pass through.
+            length = self._full_length(upstream)
+            writer = self.server.proxy.cache.writer(key) if length > 0 else None
+            received = 0
+            started = time.perf_counter()
+            try:
+                for data in upstream.iter_content(CHUNK_SIZE):
+                    if writer:
+                        writer.write(data)
+                    received += len(data)
+                    self.wfile.write(data)
+                    if started and received >= SAMPLE_BYTES:
+                        # later reads are paced by playback, not the link.
+                        policy.record_transfer(received, time.perf_counter() - started)
+                        started = None
+            except (BrokenPipeError, ConnectionResetError, requests.exceptions.RequestException):
+                pass
+            if writer:
+                if received and received == length:
+                    writer.commit()
+                else:
+                    writer.discard()
+
+
+class _ProxyServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, proxy: 'AudioProxy') -> None:
+        self.proxy = proxy
+        super().__init__(('127.0.0.1', 0), _ProxyHandler)
+
+
+class AudioProxy():
+    """Loopback HTTP proxy the player streams through.
+
+    Stream urls are swapped for http://127.0.0.1:<port>/<key>/<url id> (key - song id &
+    bitrate, the cache entry; url id - the stream url's own). Cached songs are served from
+    disk, so repeat plays need no network; other songs are streamed from the CDN while
+    their bytes are written to the cache. A stream url stays registered until it has been
+    release()d as many times as local_url() was called for it."""
+
+    def __init__(self, cache: Optional[AudioCache] = None) -> None:
+        self.cache = cache or AudioCache()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self._urls = {}  # url id -> [stream url, references]
+        self._server: Optional[_ProxyServer] = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """Keep-alive Session of the calling handler thread"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.verify = False
+        return session
+
+    def _start(self) -> str:
+        """Starts the proxy server on first use, returns its base url"""
+        with self._lock:
+            if self._server is None:
+                self._server = _ProxyServer(self)
+                threading.Thread(target=self._server.serve_forever,
+                                 name='rkstreamer-audio-proxy', daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_port}/"
+
+    @staticmethod
+    def _url_id(stream_url: str) -> str:
+        return hashlib.sha1(stream_url.encode()).hexdigest()[:16]
+
+    def local_url(self, stream_url: str, song_id: Optional[str] = None) -> str:
+        """Loopback url the player opens for the stream - registers the stream url"""
+        url_id = self._url_id(stream_url)
+        with self._lock:
+            self._urls.setdefault(url_id, [stream_url, 0])[1] += 1
+        return f"{self._start()}{cache_key(stream_url, song_id)}/{url_id}"
+
+    def release(self, stream_url: str) -> None:
+        """The player is done with a local_url() of the stream"""
+        url_id = self._url_id(stream_url)
+        with self._lock:
+            entry = self._urls.get(url_id)
+            if entry is not None:
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    del self._urls[url_id]
+
+    def upstream(self, url_id: str) -> Optional[str]:
+        """Stream url registered for the url id"""
+        entry = self._urls.get(url_id)
+        return entry[0] if entry else None
+
+    def origin(self, url: str) -> str:
+        """Stream url of a loopback url (other urls are returned as is)"""
+        if self._server is not None and url and url.startswith(
+                f"http://127.0.0.1:{self._server.server_port}/"):
+            return self.upstream(url.rsplit('/', 1)[-1]) or url
+        return url
+
+    def tally(self, hit: bool) -> None:
+        """Counts a request served from the cache (hit) or the CDN"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def close(self) -> None:
+        """Stops the proxy server"""
+        with self._lock:
+            if self._server is not None:
+                self._server.shutdown()
+                self._server.server_close()
+                self._server = None
+
+
+__all__ = ['AudioCache', 'AudioProxy', 'cache_key']
@@ -0,0 +1,116 @@
+"""
+Services - Adaptive bitrate policy
+"""
+
+import re
+import time
+import threading
+from typing import Optional
+
+BITRATES = (96, 160, 320)  # kbps of the CDN's aac streams.
+
+
+def with_bitrate(stream_url: str, bitrate: int) -> str:
+    """The CDN's aac stream url (<name>_<bitrate>.mp4) at another bitrate - other urls as they are"""
+    return re.sub(r'_(\d+)\.mp4(?=$|\?)', f'_{bitrate}.mp4', stream_url, count=1)
+
+
+class BitratePolicy():
+    """Picks the stream bitrate of each track from the network conditions.
+
+    Download throughput (stream prefetches & audio proxy transfers) is kept as an
+    exponential moving average; a bitrate is picked only if the link carries it
+    HEADROOM times over. Buffering stalls during playback step the ceiling down
+    one bitrate at once; after RECOVER secs without a stall it steps back up."""
+
+    HEADROOM = 2.0
+    ALPHA = 0.3  # weight of the latest throughput sample.
+    MIN_SAMPLE_BYTES = 32 * 1024  # smaller transfers are mostly latency.
+    RECOVER = 300  # secs without stalls before the ceiling is raised again.
+
+    def __init__(self, bitrates: tuple = BITRATES) -> None:
+        self.bitrates = tuple(sorted(bitrates))
+        self.throughput: Optional[float] = None  # kbps, None until measured.
+        self.stalls = 0
+        self._ceiling = len(self.bitrates) - 1  # index into bitrates.
+        self._last_stall: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record_transfer(self, size: int, secs: float) -> None:
+        """Bytes downloaded in secs"""
+        if size < self.MIN_SAMPLE_BYTES or secs <= 0:
+            return
+        kbps = size * 8 / 1000 / secs
+        with self._lock:
+            self.throughput = kbps if self.throughput is None else \
+                self.ALPHA * kbps + (1 - self.ALPHA) * self.throughput
+
+    def record_stall(self) -> None:
+        """Playback stalled to buffer - next tracks are picked a step lower"""
+        with self._lock:
+            self.stalls += 1
+            self._last_stall = time.monotonic()
+            self._ceiling = max(self._ceiling - 1, 0)
+
+    def _recover(self) -> None:
+        """Raises the ceiling a step per RECOVER secs without stalls - lock held"""
+        if self._last_stall is None or self._ceiling == len(self.bitrates) - 1:
+            return
+        now = time.monotonic()
+        if now - self._last_stall >= self.RECOVER:
+            self._ceiling += 1
+            self._last_stall = now
+
+    def bitrate(self, requested=None, start=None) -> int:
+        """Bitrate of the next track - at most `requested` (user's choice) if given.
+        Until throughput is measured it's the highest allowed, or at most `start`"""
+        with self._lock:
+            self._recover()
+            choices = self.bitrates[:self._ceiling + 1]
+            if requested:
+                choices = tuple(rate for rate in choices if rate <= int(requested)) or choices[:1]
+            if self.throughput is None:
+                if start:
+                    choices = tuple(rate for rate in choices if rate <= int(start)) or choices[:1]
+                return choices[-1]
+            fitting = [rate for rate in choices if rate * self.HEADROOM <= self.throughput]
+            return fitting[-1] if fitting else choices[0]
+
+
+class StallMonitor():
+    """Turns the player's buffering events into stalls of the policy.
+    Run on libvlc's event thread - only flags are kept, libvlc isn't called.
+    Buffering counts as a stall once the track has played fully buffered;
+    the first fill of a track (or after a seek) doesn't."""
+
+    def __init__(self, bitrate_policy: BitratePolicy) -> None:
+        self.policy = bitrate_policy
+        self.playing = False
+        self.buffered = False
+
+    def started(self) -> None:
+        """Track started playing, or was seeked - it buffers afresh"""
+        self.playing = True
+        self.buffered = False
+
+    def stopped(self) -> None:
+        """Track changed or ended"""
+        self.playing = False
+        self.buffered = False
+
+    def buffering(self, cache: float) -> None:
+        """Buffering event - cache fill in percent"""
+        if not self.playing:
+            return
+        if cache >= 100:
+            self.buffered = True
+        elif self.buffered:
+            self.buffered = False
+            self.policy.record_stall()
+
+
+# Policy shared by the providers & the player.
+policy = BitratePolicy()
+
+
+__all__ = ['BitratePolicy', 'StallMonitor', 'policy', 'with_bitrate', 'BITRATES']
@@ -0,0 +1,246 @@
+"""
+Service - Response & Stream url Caches
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from rkstreamer.interfaces.network import INetworkProviderResponse
+from rkstreamer.utils.helper import APP_DIR
+
+# TTL (seconds) per JioSaavn `__call`.
+# Calls not listed here are never cached (auth tokens, radio stations are one-shot).
+CALL_TTL = {
+    'search.getResults': 10 * 60,
+    'search.getAlbumResults': 10 * 60,
+    'search.getPlaylistResults': 10 * 60,
+    'webapi.get': 7 * 24 * 60 * 60,
+}
+
+
+def normalize_request(url: str, params: Optional[dict] = None) -> tuple:
+    """Returns the `__call` & the normalized cache key of the request.
+    Query string & params are merged and sorted, search string is case folded."""
+    split = urlsplit(url)
+    query = parse_qsl(split.query, keep_blank_values=True)
+    if params:
+        query.extend((str(key), str(value)) for key, value in params.items())
+    items = []
+    for key, value in sorted(query):
+        if key == 'q':
+            value = ' '.join(value.lower().split())
+        items.append((key, value))
+    call = dict(items).get('__call')
+    return call, f"{split.netloc}{split.path}?{urlencode(items)}"
+
+
+class CachedResponse(INetworkProviderResponse):
+    """Response served from the response cache"""
+
+    def __init__(self, content: bytes, status_code: int, headers: dict) -> None:
+        self._content = content
+        self._status_code = status_code
+        self._headers = headers
+
+    @property
+    def content(self) -> bytes:
+        """Raw response body"""
+        return self._content
+
+    @property
+    def headers(self) -> dict:
+        return self._headers
+
+    @property
+    def status_code(self) -> int:
+        return self._status_code
+
+    def json(self) -> dict:
+        return json.loads(self._content)
+
+    def raise_for_status(self) -> None:
+        return None  # only successful responses are cached.
+
+
+class SQLiteResponseCache():
+    """Persistent response cache for API calls - SQLite backed.
+    Entries are expired using per-call TTLs and evicted in LRU order
+    once the entry count or the total body size goes above the cap."""
+
+    def __init__(
+            self,
+            path: Optional[str] = None,
+            max_entries: int = 1000,
+            max_bytes: int = 32 * 1024 * 1024,
+            ttl: Optional[dict] = None) -> None:
+
+        self.path = path or os.path.join(APP_DIR, 'responses.db')
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = CALL_TTL | (ttl or {})
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Opens the cache db on first use"""
+        if self._conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, call TEXT, content BLOB, status INTEGER, '
+                'headers TEXT, size INTEGER, expires REAL, accessed REAL)')
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed)')
+        return self._conn
+
+    def ttl_for(self, call: Optional[str]) -> int:
+        """TTL for the given `__call`, 0 - not cacheable"""
+        return self.ttl.get(call, 0)
+
+    def fetch(self, url: str, params: Optional[dict] = None) -> Optional[CachedResponse]:
+        """Returns the cached response for the request if it's still fresh"""
+        call, key = normalize_request(url, params)
+        if not self.ttl_for(call):
+            return None
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                'SELECT content, status, headers FROM responses WHERE key = ? AND expires > ?',
+                (key, now)).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+        return CachedResponse(row[0], row[1], json.loads(row[2]))
+
+    def store(self, url: str, params: Optional[dict], response: INetworkProviderResponse) -> None:
+        """Stores the successful response of a cacheable call"""
+        call, key = normalize_request(url, params)
+        ttl = self.ttl_for(call)
+        if not ttl or not 200 <= response.status_code < 300:
+            return
+        content = response.content
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, call, content, response.status_code,
+                 json.dumps(dict(response.headers)), len(content), now + ttl, now))
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drops expired entries, then the least recently used ones above the cap"""
+        conn.execute('DELETE FROM responses WHERE expires <= ?', (now,))
+        count, size = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+        evict = []
+        for key, entry_size in conn.execute(
+                'SELECT key, size FROM responses ORDER BY accessed'):
+            if count <= self.max_entries and size <= self.max_bytes:
+                break
+            evict.append((key,))
+            count -= 1
+            size -= entry_size
+        conn.executemany('DELETE FROM responses WHERE key = ?', evict)
+
+    def clear(self) -> None:
+        """Removes all cached responses"""
+        with self._lock:
+            self._connect().execute('DELETE FROM responses')
+
+    def close(self) -> None:
+        """Closes the cache db"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def parse_url_expiry(url: str) -> Optional[float]:
+    """Returns the expiry (epoch secs) signed in the CDN url, None if not found.
+    Handles Expires/exp params & Akamai style tokens - __gda__=<exp>_<hmac>, hdnea=exp=<exp>~..."""
+    query = dict(parse_qsl(urlsplit(url).query))
+    for key in ('Expires', 'expires', 'exp'):
+        if query.get(key, '').isdigit():
+            return float(query[key])
+    for key in ('__gda__', 'hdnea', 'hdnts', 'token'):
+        match = re.search(r'(?:^|exp=)(\d{10})', query.get(key, ''))
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class StreamUrlCache():
+    """In-memory cache of resolved stream urls, keyed by encrypted media url & bitrate.
+    Entries expire at the expiry signed in the CDN url (default_ttl if unsigned), less
+    expiry_margin secs, so an url about to expire is never handed out - it's resolved
+    again instead. Each set() drops the expired entries, then the least recently used
+    ones above max_entries."""
+
+    def __init__(
+            self,
+            max_entries: int = 512,
+            default_ttl: int = 30 * 60,
+            expiry_margin: int = 2 * 60) -> None:
+
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.expiry_margin = expiry_margin
+        self._urls: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str, bitrate) -> Optional[str]:
+        """Returns the stream url if it's not within expiry_margin of its expiry"""
+        key = (token, str(bitrate))
+        with self._lock:
+            entry = self._urls.get(key)
+            if entry is None:
+                return None
+            url, expires = entry
+            if expires - self.expiry_margin <= time.time():
+                del self._urls[key]
+                return None
+            self._urls.move_to_end(key)
+            return url
+
+    def set(self, token: str, bitrate, url: str) -> None:
+        """Stores the stream url with its expiry"""
+        expires = parse_url_expiry(url) or time.time() + self.default_ttl
+        with self._lock:
+            self._urls[(token, str(bitrate))] = (url, expires)
+            self._urls.move_to_end((token, str(bitrate)))
+            self._evict()
+
+    def expiring(self, url: str) -> bool:
+        """True if the expiry signed in the url is within expiry_margin - unsigned urls don't"""
+        expires = parse_url_expiry(url)
+        return expires is not None and expires - self.expiry_margin <= time.time()
+
+    def _evict(self) -> None:
+        """Drops expired entries, then LRU ones down to max_entries - lock held"""
+        now = time.time()
+        for key in [key for key, (_, expires) in self._urls.items()
+                    if expires - self.expiry_margin <= now]:
+            del self._urls[key]
+        while len(self._urls) > self.max_entries:
+            self._urls.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+
+__all__ = ['SQLiteResponseCache', 'CachedResponse', 'StreamUrlCache',
+           'normalize_request', 'parse_url_expiry']
@@ -0,0 +1,162 @@
+"""
+Service - Local library Database Provider
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Optional
+from rkstreamer.interfaces.database import IDatabaseProvider
+from rkstreamer.utils.helper import APP_DIR
+
+SONG_FIELDS = ('id', 'name', 'artists', 'music', 'album_name',
+               'album_id', 'duration', 'token', 'language')
+ALBUM_FIELDS = ('id', 'name', 'artists', 'music', 'song_count', 'language')
+PLAYLIST_FIELDS = ('token', 'name', 'song_count', 'language')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS songs (
+    id TEXT PRIMARY KEY, name TEXT, artists TEXT, music TEXT, album_name TEXT,
+    album_id TEXT, duration INTEGER, token TEXT, language TEXT);
+CREATE INDEX IF NOT EXISTS idx_songs_album ON songs (album_id);
+CREATE INDEX IF NOT EXISTS idx_songs_name ON songs (name);
+CREATE TABLE IF NOT EXISTS albums (
+    id TEXT PRIMARY KEY, name TEXT, artists TEXT, music TEXT,
+    song_count INTEGER, language TEXT);
+CREATE INDEX IF NOT EXISTS idx_albums_name ON albums (name);
+CREATE TABLE IF NOT EXISTS album_songs (
+    album_id TEXT, position INTEGER, song_id TEXT,
+    PRIMARY KEY (album_id, position));
+CREATE TABLE IF NOT EXISTS playlists (
+    token TEXT PRIMARY KEY, name TEXT, song_count INTEGER, language TEXT);
+CREATE INDEX IF NOT EXISTS idx_playlists_name ON playlists (name);
+CREATE TABLE IF NOT EXISTS history (
+    entry_id INTEGER PRIMARY KEY AUTOINCREMENT, song_id TEXT, name TEXT, played_at REAL);
+CREATE INDEX IF NOT EXISTS idx_history_song ON history (song_id);
+CREATE INDEX IF NOT EXISTS idx_history_played ON history (played_at);
+"""
+
+# Statements are kept constant so sqlite3 reuses the prepared statements.
+INSERT_SONG = f"INSERT OR REPLACE INTO songs VALUES ({', '.join('?' * len(SONG_FIELDS))})"
+INSERT_ALBUM = f"INSERT OR REPLACE INTO albums VALUES ({', '.join('?' * len(ALBUM_FIELDS))})"
+INSERT_PLAYLIST = f"INSERT OR REPLACE INTO playlists VALUES ({', '.join('?' * len(PLAYLIST_FIELDS))})"
+INSERT_HISTORY = "INSERT INTO history (song_id, name, played_at) VALUES (?, ?, ?)"
+DELETE_ALBUM_SONGS = "DELETE FROM album_songs WHERE album_id = ?"
+INSERT_ALBUM_SONG = "INSERT INTO album_songs VALUES (?, ?, ?)"
+
+SELECT_SONG = f"SELECT {', '.join(SONG_FIELDS)} FROM songs WHERE id = ?"
+SELECT_ALBUM = f"SELECT {', '.join(ALBUM_FIELDS)} FROM albums WHERE id = ?"
+SELECT_ALBUM_SONGS = (
+    f"SELECT {', '.join('s.' + field for field in SONG_FIELDS)} FROM album_songs a "
+    "JOIN songs s ON s.id = a.song_id WHERE a.album_id = ? ORDER BY a.position")
+SELECT_PLAYLIST = f"SELECT {', '.join(PLAYLIST_FIELDS)} FROM playlists WHERE token = ?"
+SELECT_HISTORY = "SELECT song_id, name, played_at FROM history ORDER BY played_at DESC LIMIT ?"
+
+CHECKS = {
+    'songs': "SELECT 1 FROM songs WHERE id = ?",
+    'albums': "SELECT 1 FROM album_songs WHERE album_id = ? LIMIT 1",
+    'playlists': "SELECT 1 FROM playlists WHERE token = ?",
+    'history': "SELECT 1 FROM history WHERE song_id = ? LIMIT 1",
+}
+
+
+class SQLiteDatabaseProvider(IDatabaseProvider):
+    """Local library store - SQLite backed.
+    Tables: songs, albums (+ album_songs track list), playlists, history"""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or os.path.join(APP_DIR, 'library.db')
+        self.conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    def connect(self) -> sqlite3.Connection:
+        """Opens the db & creates the schema - called on first use"""
+        with self._lock:
+            if self.conn is None:
+                if self.path != ':memory:':
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self.conn = sqlite3.connect(self.path, check_same_thread=False)
+                self.conn.execute('PRAGMA journal_mode=WAL')
+                self.conn.executescript(SCHEMA)
+            return self.conn
+
+    def check(self, name: str, key: str = None) -> bool:
+        """Checks if the entity with key is present in the table"""
+        with self._lock:
+            return self.connect().execute(CHECKS[name], (key,)).fetchone() is not None
+
+    def read(self, name: str, key: str = None) -> Optional[dict]:
+        """Reads the entity (dict) with key from the table.
+        albums - returns album with ordered 'songs' only if its track list is stored.
+        history - returns the last 'key' (int) played songs."""
+        with self._lock:
+            conn = self.connect()
+            if name == 'songs':
+                return self._row(SONG_FIELDS, conn.execute(SELECT_SONG, (key,)).fetchone())
+            if name == 'albums':
+                album = self._row(ALBUM_FIELDS, conn.execute(SELECT_ALBUM, (key,)).fetchone())
+                songs = [self._row(SONG_FIELDS, row)
+                         for row in conn.execute(SELECT_ALBUM_SONGS, (key,))]
+                if album is None or not songs:
+                    return None
+                album['songs'] = songs
+                return album
+            if name == 'playlists':
+                return self._row(PLAYLIST_FIELDS, conn.execute(SELECT_PLAYLIST, (key,)).fetchone())
+            if name == 'history':
+                return [self._row(('song_id', 'name', 'played_at'), row)
+                        for row in conn.execute(SELECT_HISTORY, (key or 50,))]
+        raise KeyError(f"Unknown table: {name}")
+
+    def write(self, name: str, records: list = None) -> None:
+        """Writes the records to the table in a single transaction.
+        albums - records with 'songs' also store the album's songs & track list."""
+        if not records:
+            return
+        with self._lock:
+            conn = self.connect()
+            with conn:  # commits/rollbacks the batch as one transaction.
+                if name == 'songs':
+                    conn.executemany(INSERT_SONG, self._values(
+                        SONG_FIELDS, [song for song in records if song.get('id')]))
+                elif name == 'albums':
+                    conn.executemany(INSERT_ALBUM, self._values(ALBUM_FIELDS, records))
+                    for album in records:
+                        if album.get('songs'):
+                            self._write_album_songs(conn, album['id'], album['songs'])
+                elif name == 'playlists':
+                    conn.executemany(INSERT_PLAYLIST, self._values(PLAYLIST_FIELDS, records))
+                elif name == 'history':
+                    now = time.time()
+                    conn.executemany(INSERT_HISTORY, [
+                        (record.get('id'), record.get('name'), record.get('played_at', now))
+                        for record in records])
+                else:
+                    raise KeyError(f"Unknown table: {name}")
+
+    def _write_album_songs(self, conn: sqlite3.Connection, album_id: str, songs: list) -> None:
+        """Stores album songs & their position in the album"""
+        songs = [song for song in songs if song.get('id')]
+        conn.executemany(INSERT_SONG, self._values(SONG_FIELDS, songs))
+        conn.execute(DELETE_ALBUM_SONGS, (album_id,))
+        conn.executemany(INSERT_ALBUM_SONG, [
+            (album_id, position, song['id']) for position, song in enumerate(songs, 1)])
+
+    @staticmethod
+    def _values(fields: tuple, records: list) -> list:
+        return [tuple(record.get(field) for field in fields) for record in records]
+
+    @staticmethod
+    def _row(fields: tuple, row: Optional[tuple]) -> Optional[dict]:
+        return dict(zip(fields, row)) if row else None
+
+    def close(self) -> None:
+        """Closes the db connection"""
+        with self._lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+
+__all__ = ['SQLiteDatabaseProvider']
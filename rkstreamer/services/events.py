@@ -0,0 +1,70 @@
+"""
+Services - Event Dispatcher
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable
+
+
+class EventDispatcher():
+    """Runs callbacks on one long-lived worker thread.
+
+    Player events are handed over here, so controller callbacks never run on
+    (or block) libvlc's event thread. Timed callbacks are kept in a heap and
+    served by the same thread instead of a threading.Timer per cycle."""
+
+    def __init__(self, name: str = 'rkstreamer-events') -> None:
+        self.name = name
+        self._tasks = []  # heap of [due, seq, callback, args, cancelled]
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def _start(self) -> None:
+        """Starts the worker thread on first use - called with the lock held"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def dispatch(self, callback: Callable, *args) -> list:
+        """Runs the callback as soon as possible"""
+        return self.schedule(0, callback, *args)
+
+    def schedule(self, delay: float, callback: Callable, *args) -> list:
+        """Runs the callback after delay secs. Returns the handle for cancel()"""
+        task = [time.monotonic() + delay, next(self._seq), callback, args, False]
+        with self._cond:
+            self._start()
+            heapq.heappush(self._tasks, task)
+            self._cond.notify()
+        return task
+
+    @staticmethod
+    def cancel(task: list) -> None:
+        """Cancels the scheduled callback"""
+        if task:
+            task[4] = True
+
+    def _run(self) -> None:
+        """Worker loop"""
+        while True:
+            with self._cond:
+                while not self._tasks or self._tasks[0][0] > time.monotonic():
+                    timeout = self._tasks[0][0] - time.monotonic() if self._tasks else None
+                    self._cond.wait(timeout)
+                _, _, callback, args, cancelled = heapq.heappop(self._tasks)
+            if cancelled:
+                continue
+            try:
+                callback(*args)
+            except (Exception, SystemExit) as exc:  # pylint: disable=broad-except
+                # keep dispatching - a failed callback must not stop player monitoring.
+                print(f"\nError: {exc.__class__.__name__}, Desc: '{exc}'")
+
+
+dispatcher = EventDispatcher()
+
+__all__ = ['EventDispatcher', 'dispatcher']
@@ -0,0 +1,7 @@
+"""Services - Exception module"""
+
+class NetworkError(Exception):
+    """Request failed - after retries, or refused by an open circuit breaker"""
+
+class CircuitOpenError(NetworkError):
+    """Endpoint's circuit breaker is open - request not sent"""
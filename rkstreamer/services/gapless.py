@@ -0,0 +1,333 @@
+"""
+Services - Gapless & Crossfade playback
+"""
+
+import threading
+from typing import Optional
+from vlc import Instance, Media, MediaList, MediaPlayer, State, EventType
+from rkstreamer.services import events
+from rkstreamer.services.events import EventDispatcher
+from rkstreamer.services.player import PyVLCEngine, MediaPlayerControls
+
+
+class ListPlayerEvents():
+    """libvlc style event manager for the events raised by CrossfadeListPlayer"""
+
+    def __init__(self) -> None:
+        self.handlers = {}
+
+    def event_attach(self, event_type, callback, *args):
+        """Attaches the callback(event, *args) - one per event type, like libvlc"""
+        self.handlers[event_type] = (callback, args)
+
+    def emit(self, event_type, event=None):
+        """Runs the callback attached to the event type"""
+        if event_type in self.handlers:
+            callback, args = self.handlers[event_type]
+            callback(event, *args)
+
+
+class CrossfadeListPlayer():
+    """Media list player on two alternating MediaPlayers (decks).
+
+    PRELOAD secs before the playing track ends, the next item is opened muted on the
+    idle deck and paused once it plays - its stream & decoder are ready ahead of time.
+    With crossfade > 0, the idle deck starts `crossfade` secs before the end and the
+    volumes are ramped across; with 0 it starts as the playing track runs out (gapless).
+    Handoffs are driven by get_time/get_length, polled on the dispatcher (the engine's,
+    the shared event dispatcher by default) - closely only while a handoff is near.
+    Drop-in for the MediaListPlayer calls the app makes."""
+
+    PRELOAD = 15  # secs before the end to open the next track.
+    GAP_LEAD = 0.15  # gapless - secs before the end to start the next track.
+    TICK = 0.1  # secs between polls near a handoff.
+
+    def __init__(
+            self,
+            instance: Instance,
+            crossfade: float = 0,
+            dispatcher: Optional[EventDispatcher] = None) -> None:
+        self.decks: list[MediaPlayer] = [instance.media_player_new(), instance.media_player_new()]
+        self.crossfade = crossfade
+        self.dispatcher = dispatcher or events.dispatcher
+        self.media_list: Optional[MediaList] = None
+        self.current = 0
+        self.events = ListPlayerEvents()
+        self._next: Optional[Media] = None  # media opened on the idle deck.
+        self._ready = False  # idle deck buffered & paused.
+        self._fade = None  # (volume, secs left when the fade started)
+        self._task = None
+        self._lock = threading.RLock()
+        for number, deck in enumerate(self.decks):
+            deck_events = deck.event_manager()
+            deck_events.event_attach(EventType.MediaPlayerPlaying, self._on_deck_event, number)
+            deck_events.event_attach(EventType.MediaPlayerEndReached, self._on_deck_event, number)
+            deck_events.event_attach(EventType.MediaPlayerBuffering, self._on_deck_event, number)
+
+    @property
+    def deck(self) -> MediaPlayer:
+        """Playing deck"""
+        return self.decks[self.current]
+
+    @property
+    def idle(self) -> MediaPlayer:
+        """Deck the next track is opened on"""
+        return self.decks[1 - self.current]
+
+    def _on_deck_event(self, event, number: int):
+        """libvlc event thread - only the playing deck's events are passed on"""
+        if number == self.current:
+            self.events.emit(event.type, event)
+            if event.type == EventType.MediaPlayerEndReached:
+                self.dispatcher.dispatch(self._watch)  # next one wasn't ready in time.
+
+    def event_manager(self) -> ListPlayerEvents:
+        """Event manager - MediaListPlayerNextItemSet & playing deck's events"""
+        return self.events
+
+    def get_media_player(self) -> MediaPlayer:
+        """Playing deck"""
+        return self.deck
+
+    def set_media_list(self, media_list: MediaList):
+        """Sets the media list played - the playing track carries on"""
+        with self._lock:
+            self.media_list = media_list
+            self._reset_idle()
+
+    def _count(self) -> int:
+        if self.media_list is None:
+            return 0
+        self.media_list.lock()
+        try:
+            return self.media_list.count()
+        finally:
+            self.media_list.unlock()
+
+    def _item(self, index: int) -> Optional[Media]:
+        if not 0 <= index < self._count():
+            return None
+        self.media_list.lock()
+        try:
+            return self.media_list.item_at_index(index)
+        finally:
+            self.media_list.unlock()
+
+    def _index(self) -> Optional[int]:
+        """Position of the playing media in the media list"""
+        media = self.deck.get_media()
+        if media is None or self.media_list is None:
+            return None
+        self.media_list.lock()
+        try:
+            index = self.media_list.index_of_item(media)
+        finally:
+            self.media_list.unlock()
+        return index if index >= 0 else None
+
+    def play_item_at_index(self, index: int) -> int:
+        """Plays the item at index, 0 - success, -1 - no such item"""
+        with self._lock:
+            media = self._item(index)
+            if media is None:
+                return -1
+            self._reset_idle()
+            volume = self._fade[0] if self._fade else self.deck.audio_get_volume()
+            self._fade = None
+            self.deck.stop()
+            self.deck.set_media(media)
+            if volume >= 0:
+                self.deck.audio_set_volume(volume)
+            self.deck.play()
+            self.events.emit(EventType.MediaListPlayerNextItemSet)
+            self._schedule(1)
+            return 0
+
+    def next(self) -> int:
+        """Plays the next item"""
+        with self._lock:
+            index = self._index()
+            return -1 if index is None else self.play_item_at_index(index + 1)
+
+    def previous(self) -> int:
+        """Plays the previous item"""
+        with self._lock:
+            index = self._index()
+            return -1 if index is None else self.play_item_at_index(index - 1)
+
+    def play(self) -> int:
+        """Resumes the playing track or starts the media list"""
+        with self._lock:
+            if self.deck.get_media() is not None and self.deck.get_state() == State.Paused:
+                self.deck.play()
+                if self._fade:
+                    self.idle.set_pause(0)
+                self._schedule(1)
+                return 0
+            return self.play_item_at_index(0)
+
+    def pause(self):
+        """Pauses the playing track (and a running crossfade)"""
+        with self._lock:
+            self.deck.pause()
+            if self._fade:
+                self.idle.set_pause(1)
+
+    def stop(self):
+        """Stops both decks"""
+        with self._lock:
+            self.dispatcher.cancel(self._task)
+            self._task = None
+            self._reset_idle()
+            if self._fade:
+                self.deck.audio_set_volume(self._fade[0])
+                self._fade = None
+            self.deck.stop()
+
+    def _reset_idle(self):
+        """Drops the track opened on the idle deck"""
+        if self._next is not None:
+            self.idle.stop()
+            self.idle.audio_set_mute(False)
+        self._next = None
+        self._ready = False
+
+    def _schedule(self, delay: float):
+        self.dispatcher.cancel(self._task)
+        self._task = self.dispatcher.schedule(delay, self._watch)
+
+    def _watch(self):
+        """Opens, buffers & starts the next track as the playing one nears its end"""
+        with self._lock:
+            self._task = None
+            state = self.deck.get_state()
+            if state == State.Ended:
+                if self._fade:
+                    self._swap(self._fade[0])
+                elif self._next is not None:
+                    self._start_next(0)
+                else:
+                    self._preload()
+                    if self._next is not None:
+                        self._start_next(0)
+                return
+            if state not in (State.Playing, State.Paused, State.Opening, State.Buffering):
+                return
+            length, time = self.deck.get_length(), self.deck.get_time()
+            if state == State.Paused or length <= 0 or time < 0:
+                self._schedule(1)
+                return
+            remaining = (length - time) / 1000
+            if self._fade:
+                self._step_fade(remaining)
+                return
+            if self._next is None and remaining <= self.PRELOAD:
+                self._preload()
+            if self._next is not None and not self._ready:
+                self._ready = self.idle.get_state() == State.Playing
+                if self._ready:
+                    self.idle.set_pause(1)
+                    self.idle.set_time(0)
+            lead = self.crossfade or self.GAP_LEAD
+            if self._next is not None and remaining <= lead:
+                self._start_next(remaining)
+            elif self._next is not None and not self._ready:
+                self._schedule(self.TICK)
+            else:
+                wait = remaining - (lead if self._next is not None else self.PRELOAD)
+                self._schedule(min(max(wait, self.TICK), 30))
+
+    def _preload(self):
+        """Opens the next item muted on the idle deck"""
+        index = self._index()
+        media = self._item(index + 1) if index is not None else None
+        if media is None:
+            return  # end of the list for now - more may be appended.
+        self._next = media
+        self._ready = False
+        self.idle.set_media(media)
+        self.idle.audio_set_mute(True)
+        self.idle.play()
+
+    def _start_next(self, remaining: float):
+        """Starts the idle deck - ramps the volumes with crossfade, swaps right away if gapless"""
+        volume = self.deck.audio_get_volume()
+        if not self._ready:
+            self.idle.set_time(0)
+        self.idle.audio_set_volume(0 if self.crossfade else volume)
+        self.idle.audio_set_mute(False)
+        self.idle.set_pause(0)
+        if self.crossfade and remaining > 0:
+            self._fade = (volume, remaining)
+            self._schedule(self.TICK)
+        else:
+            self._swap(volume)
+
+    def _step_fade(self, remaining: float):
+        """One volume step of the crossfade"""
+        volume, duration = self._fade
+        progress = 1 - max(remaining, 0) / duration
+        if progress >= 1:
+            self._swap(volume)
+            return
+        self.deck.audio_set_volume(int(volume * (1 - progress)))
+        self.idle.audio_set_volume(int(volume * progress))
+        self._schedule(self.TICK)
+
+    def _swap(self, volume: int):
+        """The idle deck becomes the playing one"""
+        old = self.deck
+        self.current = 1 - self.current
+        self._next = None
+        self._ready = False
+        self._fade = None
+        old.stop()
+        old.audio_set_volume(volume)
+        self.deck.audio_set_volume(volume)
+        self.events.emit(EventType.MediaListPlayerNextItemSet)
+        self.events.emit(EventType.MediaPlayerPlaying)
+        self._schedule(1)
+
+
+class DeckControls(MediaPlayerControls):
+    """Player controls - applied to the playing deck"""
+
+    def __init__(self, player: CrossfadeListPlayer) -> None:  # pylint: disable=super-init-not-called
+        self.player = player
+        self.on_seek = None
+        self.devices = []
+        self.volume = 100
+        self.state = None
+
+    @property
+    def media(self) -> MediaPlayer:
+        """Playing deck"""
+        return self.player.deck
+
+    def select_device(self, selection_: int) -> None:
+        """Selects the output device on both decks."""
+        super().select_device(selection_)
+        for device in self.devices:
+            if device['id'] == selection_:
+                self.player.idle.audio_output_device_set(None, device['device'])
+
+
+class PyVLCGaplessEngine(PyVLCEngine):
+    """Player engine with gapless/crossfade transitions between the media list items"""
+
+    def __init__(self, instance: Optional[Instance] = None, crossfade: float = 0,
+                 audio_proxy=None, dispatcher: Optional[EventDispatcher] = None) -> None:
+        self.crossfade = crossfade
+        super().__init__(instance, audio_proxy, dispatcher)
+
+    def _new_player(self) -> CrossfadeListPlayer:
+        return CrossfadeListPlayer(self.instance, self.crossfade, self.dispatcher)
+
+    def _new_controls(self) -> DeckControls:
+        return DeckControls(self.player)
+
+    def _player_events(self) -> ListPlayerEvents:
+        return self.player.event_manager()
+
+
+__all__ = ['CrossfadeListPlayer', 'DeckControls', 'PyVLCGaplessEngine']
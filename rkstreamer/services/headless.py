@@ -0,0 +1,403 @@
+"""
+Services - Headless player backend
+"""
+
+import heapq
+import itertools
+import threading
+from collections import Counter, namedtuple
+from types import SimpleNamespace
+from typing import Callable, Optional, Union
+from vlc import State, EventType
+from rkstreamer.services.gapless import ListPlayerEvents
+from rkstreamer.services.player import PyVLCEngine, PyVLCPlayer
+
+# libvlc style event - `type` & the `u` union (u.new_cache for buffering events).
+Event = namedtuple('Event', 'type u')
+
+
+class SimulatedClock():
+    """Simulated time & an EventDispatcher drop-in running on it.
+
+    Nothing runs on its own - tasks (player events, track ends, controller timers) run
+    in due order on the calling thread when the clock is driven with run(), the clock
+    jumping from one task to the next. A failing task raises out of run()."""
+
+    def __init__(self) -> None:
+        self.now = 0.0  # secs
+        self._tasks = []  # heap of [due, seq, callback, args, cancelled]
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def dispatch(self, callback: Callable, *args) -> list:
+        """Runs the callback at the current time - after the tasks already due"""
+        return self.schedule(0, callback, *args)
+
+    def schedule(self, delay: float, callback: Callable, *args) -> list:
+        """Runs the callback after delay simulated secs. Returns the handle for cancel()"""
+        with self._lock:
+            task = [self.now + max(delay, 0), next(self._seq), callback, args, False]
+            heapq.heappush(self._tasks, task)
+        return task
+
+    @staticmethod
+    def cancel(task: list) -> None:
+        """Cancels the scheduled callback"""
+        if task:
+            task[4] = True
+
+    @property
+    def pending(self) -> int:
+        """Scheduled tasks not cancelled yet"""
+        with self._lock:
+            return sum(1 for task in self._tasks if not task[4])
+
+    def run(self, secs: Optional[float] = None, tasks: Optional[int] = None) -> int:
+        """Runs the tasks due in the next secs (all, until idle, if None) - at most
+        `tasks` of them. The clock ends secs ahead, or at the last task run when idle.
+        Returns the number of tasks run"""
+        until = None if secs is None else self.now + secs
+        count = 0
+        while tasks is None or count < tasks:
+            with self._lock:
+                while self._tasks and self._tasks[0][4]:
+                    heapq.heappop(self._tasks)
+                if not self._tasks or (until is not None and self._tasks[0][0] > until):
+                    break
+                due, _, callback, args, _ = heapq.heappop(self._tasks)
+                self.now = max(self.now, due)
+            callback(*args)
+            count += 1
+        if until is not None and (tasks is None or count < tasks):
+            self.now = max(self.now, until)
+        return count
+
+
+class HeadlessMedia():
+    """Media - a track of `length` secs, nothing is opened"""
+
+    __slots__ = ('mrl', 'length')
+
+    def __init__(self, mrl: str, length: float) -> None:
+        self.mrl = mrl
+        self.length = length
+
+    def get_mrl(self) -> str:
+        return self.mrl
+
+    def get_duration(self) -> int:
+        return int(self.length * 1000)
+
+
+class HeadlessEvents(ListPlayerEvents):
+    """Event manager - events are delivered by the clock, like libvlc's event thread
+    delivers them after the call that raised them has returned"""
+
+    def __init__(self, instance: 'HeadlessInstance') -> None:
+        super().__init__()
+        self.instance = instance
+
+    def emit(self, event_type, event=None):
+        self.instance.emitted[event_type] += 1
+        if event_type in self.handlers:
+            self.instance.clock.dispatch(
+                super().emit, event_type, event or Event(event_type, SimpleNamespace()))
+
+
+class HeadlessMediaList():
+    """Media list - items in order, edited in place"""
+
+    def __init__(self, instance: 'HeadlessInstance') -> None:
+        self.instance = instance
+        self.items: list[HeadlessMedia] = []
+        self._lock = threading.RLock()
+
+    def lock(self):
+        self._lock.acquire()
+
+    def unlock(self):
+        self._lock.release()
+
+    def add_media(self, mrl: Union[str, HeadlessMedia]) -> int:
+        self.items.append(mrl if isinstance(mrl, HeadlessMedia) else self.instance.media_new(mrl))
+        return 0
+
+    def insert_media(self, media: HeadlessMedia, index: int) -> int:
+        if not 0 <= index <= len(self.items):
+            return -1
+        self.items.insert(index, media)
+        return 0
+
+    def remove_index(self, index: int) -> int:
+        if not 0 <= index < len(self.items):
+            return -1
+        del self.items[index]
+        return 0
+
+    def count(self) -> int:
+        return len(self.items)
+
+    def item_at_index(self, index: int) -> Optional[HeadlessMedia]:
+        return self.items[index] if 0 <= index < len(self.items) else None
+
+    def index_of_item(self, media: HeadlessMedia) -> int:
+        for index, item in enumerate(self.items):
+            if item is media:
+                return index
+        return -1
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class HeadlessMediaPlayer():
+    """Media player on the simulated clock.
+
+    States & events follow libvlc: play() goes Opening -> Buffering -> Playing, the
+    track ends `length` secs of clock time later (EndReached, state Ended); pause()
+    toggles Paused, stop() & set_time() behave as in libvlc. Nothing is decoded."""
+
+    def __init__(self, instance: 'HeadlessInstance') -> None:
+        self.instance = instance
+        self.clock = instance.clock
+        self.events = HeadlessEvents(instance)
+        self.media: Optional[HeadlessMedia] = None
+        self.state = State.NothingSpecial
+        self.volume = 100
+        self.mute = False
+        self.on_end: Optional[Callable] = None  # media list player - next item.
+        self._position = 0.0  # secs played when the track was last started/paused.
+        self._started = 0.0  # clock time the track was last started.
+        self._task = None
+
+    def event_manager(self) -> HeadlessEvents:
+        return self.events
+
+    def _emit(self, event_type, state: Optional[State] = None, **union):
+        if state is not None:
+            self.state = state
+        self.events.emit(event_type, Event(event_type, SimpleNamespace(**union)))
+
+    def _position_secs(self) -> float:
+        if self.state == State.Playing:
+            return min(self._position + self.clock.now - self._started, self.media.length)
+        return self._position
+
+    def _schedule_end(self):
+        self.clock.cancel(self._task)
+        self._task = self.clock.schedule(self.media.length - self._position, self._end)
+
+    def _end(self):
+        self._task = None
+        self._position = self.media.length
+        self._emit(EventType.MediaPlayerEndReached, State.Ended)
+        if self.on_end:
+            self.on_end()
+
+    def set_media(self, media: Optional[HeadlessMedia]):
+        """Loads the media - the playing one is stopped silently"""
+        self.clock.cancel(self._task)
+        self._task = None
+        self.media = media
+        self._position = 0.0
+        self.state = State.NothingSpecial
+        self._emit(EventType.MediaPlayerMediaChanged)
+
+    def get_media(self) -> Optional[HeadlessMedia]:
+        return self.media
+
+    def play(self) -> int:
+        if self.media is None:
+            return -1
+        if self.state == State.Playing:
+            return 0
+        if self.state in (State.Ended, State.Stopped, State.Error):
+            self._position = 0.0
+        if self.state != State.Paused:
+            self._emit(EventType.MediaPlayerOpening, State.Opening)
+            self._emit(EventType.MediaPlayerBuffering, State.Buffering, new_cache=100.0)
+        self._started = self.clock.now
+        self._emit(EventType.MediaPlayerPlaying, State.Playing)
+        self._schedule_end()
+        return 0
+
+    def pause(self):
+        """Toggles pause, like libvlc_media_player_pause"""
+        if self.state == State.Playing:
+            self._position = self._position_secs()
+            self.clock.cancel(self._task)
+            self._task = None
+            self._emit(EventType.MediaPlayerPaused, State.Paused)
+        elif self.state == State.Paused:
+            self.play()
+
+    def set_pause(self, do_pause: int):
+        """Pauses (1) or resumes (0), like libvlc_media_player_set_pause"""
+        if (do_pause and self.state == State.Playing) or (not do_pause and self.state == State.Paused):
+            self.pause()
+
+    def stop(self):
+        if self.state in (State.NothingSpecial, State.Stopped):
+            return
+        self.clock.cancel(self._task)
+        self._task = None
+        self._position = 0.0
+        self._emit(EventType.MediaPlayerStopped, State.Stopped)
+
+    def get_state(self) -> State:
+        return self.state
+
+    def is_playing(self) -> int:
+        return int(self.state == State.Playing)
+
+    def get_length(self) -> int:
+        """ms, -1 without media like libvlc"""
+        return -1 if self.media is None else int(self.media.length * 1000)
+
+    def get_time(self) -> int:
+        """ms, -1 without media like libvlc"""
+        return -1 if self.media is None else int(self._position_secs() * 1000)
+
+    def set_time(self, time: int):
+        """Seeks to time ms - clamped to the track"""
+        if self.media is None or self.state not in (State.Playing, State.Paused):
+            return
+        self._position = min(max(time / 1000, 0.0), self.media.length)
+        self._started = self.clock.now
+        if self.state == State.Playing:
+            self._schedule_end()
+
+    def audio_get_volume(self) -> int:
+        return self.volume
+
+    def audio_set_volume(self, volume: int) -> int:
+        self.volume = volume
+        return 0
+
+    def audio_get_mute(self) -> int:
+        return int(self.mute)
+
+    def audio_set_mute(self, mute: bool):
+        self.mute = bool(mute)
+
+    def audio_output_device_enum(self):
+        return None
+
+    def audio_output_device_set(self, module, device):
+        pass
+
+
+class HeadlessListPlayer():
+    """Media list player - plays the items in order (autoplay on EndReached),
+    with the libvlc MediaListPlayer calls & events the app uses"""
+
+    def __init__(self, instance: 'HeadlessInstance') -> None:
+        self.instance = instance
+        self.player = instance.media_player_new()
+        self.player.on_end = self._on_end
+        self.events = HeadlessEvents(instance)
+        self.media_list: Optional[HeadlessMediaList] = None
+        self._index = -1  # last played item - used when it's been removed from the list.
+
+    def event_manager(self) -> HeadlessEvents:
+        return self.events
+
+    def get_media_player(self) -> HeadlessMediaPlayer:
+        return self.player
+
+    def set_media_list(self, media_list: HeadlessMediaList):
+        self.media_list = media_list
+        self._index = -1
+
+    def _current(self) -> int:
+        """Index of the loaded media in the media list"""
+        media = self.player.get_media()
+        if media is None or self.media_list is None:
+            return -1
+        index = self.media_list.index_of_item(media)
+        return index if index >= 0 else self._index
+
+    def play_item_at_index(self, index: int) -> int:
+        media = self.media_list.item_at_index(index) if self.media_list else None
+        if media is None:
+            return -1
+        self._index = index
+        self.player.set_media(media)
+        self.events.emit(EventType.MediaListPlayerNextItemSet)
+        return self.player.play()
+
+    def play(self) -> int:
+        if self.player.get_state() == State.Paused:
+            return self.player.play()
+        if self.player.get_state() == State.Playing:
+            return 0
+        return self.play_item_at_index(max(self._current(), 0))
+
+    def next(self) -> int:
+        return self.play_item_at_index(self._current() + 1)
+
+    def previous(self) -> int:
+        index = self._current()
+        return -1 if index < 1 else self.play_item_at_index(index - 1)
+
+    def pause(self):
+        self.player.pause()
+
+    def stop(self):
+        self.player.stop()
+        self.events.emit(EventType.MediaListPlayerStopped)
+
+    def _on_end(self):
+        if self.next() != 0:
+            self.events.emit(EventType.MediaListPlayerPlayed)
+
+
+class HeadlessInstance():
+    """libvlc Instance stand-in - media players run on a simulated clock, so thousands
+    of tracks play per second. length - track secs, or a callable(mrl) -> secs.
+    `emitted` counts the events raised by type."""
+
+    def __init__(
+            self,
+            clock: Optional[SimulatedClock] = None,
+            length: Union[float, Callable] = 240.0) -> None:
+        self.clock = clock or SimulatedClock()
+        self.length = length
+        self.emitted = Counter()
+
+    def media_new(self, mrl: str) -> HeadlessMedia:
+        length = self.length(mrl) if callable(self.length) else self.length
+        return HeadlessMedia(mrl, length)
+
+    def media_list_new(self) -> HeadlessMediaList:
+        return HeadlessMediaList(self)
+
+    def media_list_player_new(self) -> HeadlessListPlayer:
+        return HeadlessListPlayer(self)
+
+    def media_player_new(self) -> HeadlessMediaPlayer:
+        return HeadlessMediaPlayer(self)
+
+
+class HeadlessEngine(PyVLCEngine):
+    """Player engine on the headless backend - player events & the controller timers
+    run on the instance's simulated clock"""
+
+    def __init__(self, instance: Optional[HeadlessInstance] = None, audio_proxy=None) -> None:
+        instance = instance or HeadlessInstance()
+        self.clock = instance.clock
+        super().__init__(instance, audio_proxy, dispatcher=instance.clock)
+
+
+class HeadlessPlayer(PyVLCPlayer):
+    """Player (MusicPlayerControls) without libvlc or an audio device - for views,
+    e.g. JioSaavnSongView(player=HeadlessPlayer()). Modes sharing one engine share the
+    clock; playback advances with player.clock.run()."""
+
+    def __init__(self, engine: Optional[HeadlessEngine] = None) -> None:
+        super().__init__(engine=engine or HeadlessEngine())
+        self.clock: SimulatedClock = self.engine.clock
+
+
+__all__ = ['SimulatedClock', 'HeadlessInstance', 'HeadlessEngine', 'HeadlessPlayer',
+           'HeadlessMediaPlayer', 'HeadlessListPlayer', 'HeadlessMediaList', 'HeadlessMedia']
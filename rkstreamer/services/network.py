@@ -2,22 +2,29 @@
 Service - Network Provider
 """
 
+import asyncio
+import threading
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, Future
 import requests
+from requests.adapters import HTTPAdapter
 from rkstreamer.interfaces.network import INetworkProvider, INetworkProviderResponse
+from rkstreamer.services.exceptions import NetworkError
+from rkstreamer.services.cache import normalize_request
+from rkstreamer.services.resilience import Resilience, resilience
+from rkstreamer.utils.trace import tracer
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/106.0.0.0 Safari/537.36'
 
 
 def hook_raise_status(data: INetworkProviderResponse, *args, **kwargs) -> Optional[INetworkProviderResponse]:
-    """Check for return status code"""
-    try:
-        data.raise_for_status()
-    except requests.exceptions.HTTPError as exception:
-        raise SystemExit(exception) from None
+    """Check for return status code - HTTPError for non 2xx, retried by the resilience layer"""
+    data.raise_for_status()
     return data
 
 
 def requests_wrapper(function) -> INetworkProviderResponse:
-    """Wrapper for Request calls"""
+    """Wrapper for Request calls - failures are raised as NetworkError"""
     def wrapper(*args, **kwargs):
         try:
             kwargs.update(
@@ -25,10 +32,52 @@ def requests_wrapper(function) -> INetworkProviderResponse:
             response = function(*args, **kwargs)
             return response
         except requests.exceptions.RequestException as exception:
-            raise SystemExit(exception) from None
+            raise NetworkError(exception) from None
     return wrapper
 
 
+def request_key(kwargs: dict) -> tuple:
+    """Identity of a GET request - normalized url & params plus the other options"""
+    _, key = normalize_request(kwargs.get('url'), kwargs.get('params'))
+    options = tuple(sorted(
+        (name, repr(sorted(value.items()) if isinstance(value, dict) else value))
+        for name, value in kwargs.items() if name not in ('url', 'params', 'hooks')))
+    return key, options
+
+
+class SingleFlight():
+    """Coalesces concurrent identical calls - while a call for a key is in flight,
+    callers with the same key wait for it and share its response (or exception)."""
+
+    def __init__(self) -> None:
+        self._calls: dict = {}
+        self._lock = threading.Lock()
+        self.shared = 0  # calls served by another caller's request.
+
+    def do(self, key, function, *args, **kwargs):
+        """Runs function(*args, **kwargs) unless a call for key is already in flight"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+            else:
+                self.shared += 1
+        if not leader:
+            return call.result()
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as exception:
+            call.set_exception(exception)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
 class PyRequests(INetworkProvider):
     """HTTP Requests bundle for making calls to Stream APIs"""
 
@@ -38,16 +87,167 @@ class PyRequests(INetworkProvider):
         self.session = requests.session()
         self.session.proxies = kwargs.pop('proxy', None)
         self.session.verify = False
-        self.session.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/106.0.0.0 Safari/537.36'}
+        self.session.headers = {'User-Agent': USER_AGENT}
+        # Response cache for the API calls - SQLiteResponseCache (optional).
+        self.cache = kwargs.pop('cache', None)
+        # Retries, timeouts & circuit breakers per endpoint.
+        self.resilience: Resilience = kwargs.pop('resilience', None) or resilience
         self.kwargs = kwargs
         self.response = {}
+        self.flights = SingleFlight()
 
     @requests_wrapper
     def get(self, **kwargs):
-        self.response = self.session.get(**kwargs | self.kwargs)
+        with tracer.span('network.get'):
+            return self.flights.do(request_key(kwargs), self._request, **kwargs)
+
+    def _request(self, **kwargs):
+        """GET - identical requests in flight share one response"""
+        if self.cache:
+            cached = self.cache.fetch(kwargs.get('url'), kwargs.get('params'))
+            tracer.count('network.cache', 'hit' if cached else 'miss')
+            if cached:
+                return cached
+        self.response = self.resilience.call(self._send, **kwargs)
+        if self.cache:
+            self.cache.store(kwargs.get('url'), kwargs.get('params'), self.response)
         return self.response
 
+    def _send(self, **kwargs):
+        return self.session.get(**kwargs | self.kwargs)
+
+    def gather(self, requests_kwargs: list, return_exceptions: bool = False) -> list:
+        """Batch GET - requests are made one after the other.
+        Failed requests are returned in place when return_exceptions is set."""
+        responses = []
+        for kwargs in requests_kwargs:
+            try:
+                responses.append(self.get(**kwargs))
+            except NetworkError as exception:
+                if not return_exceptions:
+                    raise
+                responses.append(exception)
+        return responses
+
+
+class AsyncPyRequests(INetworkProvider):
+    """Asyncio based HTTP Requests bundle with a thread-safe sync facade.
+
+    Requests are scheduled on an event loop running in its own thread and
+    bounded by a semaphore. The blocking I/O runs on a worker pool; each
+    worker keeps its own keep-alive Session & connection pool, so callers
+    from any thread (REPL, player monitors) never share a Session."""
+
+    def __init__(self, max_workers: int = 8, **kwargs) -> None:
+        self.proxy = kwargs.pop('proxy', None)
+        # Response cache for the API calls - SQLiteResponseCache (optional).
+        self.cache = kwargs.pop('cache', None)
+        # Retries, timeouts & circuit breakers per endpoint.
+        self.resilience: Resilience = kwargs.pop('resilience', None) or resilience
+        self.kwargs = kwargs
+        self.max_workers = max_workers
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.flights = SingleFlight()
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        """Starts the event loop thread & worker pool on first use"""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix='rkstreamer-http')
+                threading.Thread(
+                    target=loop.run_forever, name='rkstreamer-loop', daemon=True).start()
+                self._semaphore = asyncio.run_coroutine_threadsafe(
+                    self._new_semaphore(), loop).result()
+                self._loop = loop
+        return self._loop
+
+    async def _new_semaphore(self) -> asyncio.Semaphore:
+        return asyncio.Semaphore(self.max_workers)
+
+    @property
+    def session(self) -> requests.Session:
+        """Keep-alive Session of the calling worker thread"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.session()
+            session.proxies = self.proxy
+            session.verify = False
+            session.headers = {'User-Agent': USER_AGENT}
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._local.session = session
+        return session
+
+    def _request(self, **kwargs) -> INetworkProviderResponse:
+        """Blocking GET - runs on the worker pool.
+        Identical requests in flight (from any thread) share one response.
+        Raises NetworkError once the retries are used up."""
+        kwargs.pop('hooks', None)
+        return self.flights.do(request_key(kwargs), self._fetch, **kwargs)
+
+    def _fetch(self, **kwargs) -> INetworkProviderResponse:
+        if self.cache:
+            cached = self.cache.fetch(kwargs.get('url'), kwargs.get('params'))
+            tracer.count('network.cache', 'hit' if cached else 'miss')
+            if cached:
+                return cached
+        response = self.resilience.call(self._send, **kwargs)
+        if self.cache:
+            self.cache.store(kwargs.get('url'), kwargs.get('params'), response)
+        return response
+
+    def _send(self, **kwargs) -> INetworkProviderResponse:
+        response = self.session.get(**kwargs | self.kwargs)
+        response.raise_for_status()
+        return response
+
+    async def aget(self, **kwargs) -> INetworkProviderResponse:
+        """GET request coroutine - bounded by max_workers"""
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, lambda: self._request(**kwargs))
+
+    async def agather(self, requests_kwargs: list, return_exceptions: bool = False) -> list:
+        """Concurrent GET requests coroutine - responses are in request order"""
+        return await asyncio.gather(
+            *(self.aget(**kwargs) for kwargs in requests_kwargs),
+            return_exceptions=return_exceptions)
+
+    @requests_wrapper
+    def get(self, **kwargs):
+        loop = self._start()
+        with tracer.span('network.get'):
+            return asyncio.run_coroutine_threadsafe(self.aget(**kwargs), loop).result()
+
+    def gather(self, requests_kwargs: list, return_exceptions: bool = False) -> list:
+        """Batch GET - requests run concurrently, responses are in request order.
+        Failed requests are returned in place when return_exceptions is set."""
+        loop = self._start()
+        try:
+            with tracer.span('network.gather'):
+                responses = asyncio.run_coroutine_threadsafe(
+                    self.agather(requests_kwargs, return_exceptions), loop).result()
+        except requests.exceptions.RequestException as exception:
+            raise NetworkError(exception) from None
+        return [NetworkError(response)
+                if isinstance(response, requests.exceptions.RequestException) else response
+                for response in responses]
+
+    def close(self) -> None:
+        """Stops the event loop & the worker pool"""
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._executor.shutdown(wait=False)
+                self._loop = None
+
 
 class PyResponse(INetworkProviderResponse):
     """HTTP Requests Response"""
@@ -55,6 +255,10 @@ class PyResponse(INetworkProviderResponse):
     def __init__(self) -> None:
         self.response = requests.Response()
 
+    @property
+    def content(self):
+        return self.response.content
+
     @property
     def headers(self):
         return self.response.headers
@@ -70,4 +274,4 @@ class PyResponse(INetworkProviderResponse):
         return self.response.raise_for_status()
 
 
-__all__ = ['PyRequests']
+__all__ = ['PyRequests', 'AsyncPyRequests']
@@ -0,0 +1,122 @@
+"""
+Service - Response parser
+"""
+
+from __future__ import annotations
+import json
+from html import unescape
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional
+from rkstreamer.utils.trace import traced
+
+if TYPE_CHECKING:
+    from rkstreamer.types import NetworkProviderResponseType
+
+try:
+    import orjson  # optional fast JSON backend - pip install rkstreamer[fast]
+except ImportError:
+    orjson = None
+
+SONG_FIELDS = ('name', 'id', 'album_name', 'music', 'artists',
+               'language', 'duration', 'token', 'album_id')
+
+
+def loads(body):
+    """Decodes the JSON body - orjson if it's installed"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+@traced('parse', 'decode')
+def decode(response: NetworkProviderResponseType):
+    """Decodes the response body once - parsers work on the decoded data"""
+    return loads(response.content)
+
+
+def _unescape(text: str) -> str:
+    """html.unescape, skipped for text without entities"""
+    return unescape(text) if '&' in text else text
+
+
+@lru_cache(maxsize=4096)
+def _unescape_shared(text: str) -> str:
+    """Album & artist names repeat across tracks - unescaped once"""
+    return _unescape(text)
+
+
+class Columns(Sequence):
+    """Column arrays of parsed records - one list per field.
+    Rows are built as dicts on access, objects only when records() is consumed."""
+
+    __slots__ = ('fields', 'columns')
+
+    def __init__(self, fields: tuple) -> None:
+        self.fields = fields
+        self.columns = tuple([] for _ in fields)
+
+    def __len__(self) -> int:
+        return len(self.columns[0])
+
+    def __getitem__(self, index: int) -> dict:
+        return {field: column[index] for field, column in zip(self.fields, self.columns)}
+
+    def __iter__(self) -> Iterator[dict]:
+        fields = self.fields
+        return (dict(zip(fields, row)) for row in zip(*self.columns))
+
+    def extend(self, other: 'Columns') -> None:
+        """Appends the rows of other (same fields)"""
+        for column, values in zip(self.columns, other.columns):
+            column.extend(values)
+
+    def column(self, field: str) -> list:
+        """Values of the field"""
+        return self.columns[self.fields.index(field)]
+
+    def records(self, factory: Callable, **extra) -> Iterator:
+        """Creates the record objects (e.g. Song) lazily"""
+        fields = self.fields
+        for row in zip(*self.columns):
+            yield factory(**dict(zip(fields, row)), **extra)
+
+
+def parse_songs(items: Iterable[dict], languages: Optional[list] = None) -> Columns:
+    """Single pass over song items of search/album/radio responses"""
+    songs = Columns(SONG_FIELDS)
+    names, ids, album_names, musics, artists, langs, durations, tokens, album_ids = songs.columns
+    for song in items:
+        language = song.get('language')
+        if languages is not None and language not in languages:
+            continue
+        more_info = song['more_info']
+        album = more_info['album']
+        music = more_info['music']
+        names.append(_unescape(song['title']))
+        ids.append(song['id'])
+        album_names.append(_unescape_shared(album))
+        musics.append(music[:50] if music else '')
+        artists.append(_unescape_shared(song['subtitle'].replace(f" - {album}", '')))
+        langs.append(language)
+        durations.append(more_info['duration'])
+        tokens.append(more_info['encrypted_media_url'])
+        album_ids.append(more_info['album_url'].rpartition('/')[2])
+    return songs
+
+
+def parse_playlist_songs(items: Iterable[dict], url_fn: Optional[Callable] = None) -> Columns:
+    """Single pass over playlist songs - names & (if url_fn is given) stream urls"""
+    if url_fn is None:
+        songs = Columns(('name',))
+        songs.columns[0].extend(_unescape(song['song_for_player']) for song in items)
+        return songs
+    songs = Columns(('name', 'stream_url'))
+    names, stream_urls = songs.columns
+    for song in items:
+        names.append(_unescape(song['song_for_player']))
+        stream_urls.append(url_fn(song['download_url']))
+    return songs
+
+
+__all__ = ['loads', 'decode', 'Columns', 'parse_songs', 'parse_playlist_songs', 'SONG_FIELDS']
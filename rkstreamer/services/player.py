@@ -4,60 +4,235 @@ Services - Music Player Provider
 
 import threading
 from typing import Optional, Callable
-from vlc import Instance, MediaListPlayer, MediaList, State, MediaPlayer, Media
+from vlc import Instance, MediaListPlayer, MediaList, State, MediaPlayer, Media, EventType
 from rkstreamer.interfaces.player import MusicPlayer, MusicPlayerControls
+from rkstreamer.services import events
+from rkstreamer.services.events import EventDispatcher
+from rkstreamer.services.bitrate import StallMonitor, policy
+from rkstreamer.utils.indexed import IndexedList
+from rkstreamer.utils.helper import CROSSFADE, AUDIO_CACHE_BYTES
+from rkstreamer.utils.trace import traced
+
+_instance: Optional[Instance] = None
+_engine: Optional['PyVLCEngine'] = None
+_lock = threading.Lock()
+
+
+def get_instance() -> Instance:
+    """libvlc instance shared by all players - created on first use"""
+    global _instance  # pylint: disable=global-statement
+    with _lock:
+        if _instance is None:
+            _instance = Instance()
+    return _instance
+
+
+def get_engine() -> 'PyVLCEngine':
+    """Player engine shared by all modes - created on first use"""
+    global _engine  # pylint: disable=global-statement
+    instance = get_instance()
+    with _lock:
+        if _engine is None:
+            audio_proxy = None
+            if AUDIO_CACHE_BYTES:
+                from rkstreamer.services.audiocache import AudioCache, AudioProxy  # pylint: disable=import-outside-toplevel
+                audio_proxy = AudioProxy(AudioCache(max_bytes=AUDIO_CACHE_BYTES))
+            if CROSSFADE is None:
+                _engine = PyVLCEngine(instance, audio_proxy)
+            else:
+                from rkstreamer.services.gapless import PyVLCGaplessEngine  # pylint: disable=import-outside-toplevel
+                _engine = PyVLCGaplessEngine(instance, crossfade=CROSSFADE, audio_proxy=audio_proxy)
+    return _engine
+
+
+class PyVLCEngine():
+    """Player engine - one media list player, audio output & player controls.
+    Shared by the modes; each mode (PyVLCPlayerInstance) keeps its own media list,
+    which is swapped in when the mode plays. Player events go to the active mode,
+    run by the dispatcher (the shared event dispatcher by default).
+    With an audio proxy, media are streamed through it (disk cache of played songs)."""
+
+    def __init__(
+            self,
+            instance: Optional[Instance] = None,
+            audio_proxy=None,
+            dispatcher: Optional[EventDispatcher] = None) -> None:
+        self.instance: Instance = instance or get_instance()
+        self.audio_proxy = audio_proxy
+        self.dispatcher = dispatcher or events.dispatcher
+        self.player: MediaListPlayer = self._new_player()
+        self.mplayer_controls = self._new_controls()
+        self.active: Optional[PyVLCPlayerInstance] = None
+        self.stall_monitor = StallMonitor(policy)
+        self.mplayer_controls.on_seek = self.stall_monitor.started
+        player_events = self._player_events()
+        player_events.event_attach(EventType.MediaPlayerPlaying, self._on_event, 'manage')
+        player_events.event_attach(EventType.MediaPlayerEndReached, self._on_event, 'tick')
+        player_events.event_attach(EventType.MediaPlayerBuffering, self._on_buffering)
+        self.player.event_manager().event_attach(
+            EventType.MediaListPlayerNextItemSet, self._on_event, 'tick')
+
+    def _new_player(self) -> MediaListPlayer:
+        return self.instance.media_list_player_new()
+
+    def _new_controls(self) -> 'MediaPlayerControls':
+        return MediaPlayerControls(self.player.get_media_player())
+
+    def _player_events(self):
+        """Event manager of the media player events"""
+        return self.mplayer_controls.media.event_manager()
+
+    def _on_event(self, _event, handler: str):
+        """libvlc event thread - hand over to the dispatcher, never call libvlc here"""
+        if handler == 'manage':
+            self.stall_monitor.started()
+        else:
+            self.stall_monitor.stopped()
+        if self.active is not None:
+            self.dispatcher.dispatch(getattr(self.active.monitor_state, handler))
+
+    def _on_buffering(self, event):
+        """libvlc event thread - stalls step the bitrate of the next tracks down"""
+        if event is not None:
+            self.stall_monitor.buffering(event.u.new_cache)
+
+    def activate(self, mlplayer: 'PyVLCPlayerInstance'):
+        """Swaps the mode's media list into the media list player"""
+        if self.active is not mlplayer:
+            self.player.set_media_list(mlplayer.media_list)
+            self.active = mlplayer
 
 
 class PyVLCPlayerInstance(MusicPlayer):
-    """VLC Player implementation"""
+    """VLC Player implementation - media list of a mode, played on the shared engine"""
 
-    def __init__(self) -> None:
-        self.songs_list = []
-        self.instance: Instance = Instance()
-        self.player: MediaListPlayer = self.instance.media_list_player_new()
-        self.media_list: MediaList = None
-        self._init_media_list()
+    def __init__(self, engine: Optional[PyVLCEngine] = None) -> None:
+        # urls in media list order - url -> position lookups in O(log n).
+        self.songs_list = IndexedList(key=str)
+        self.engine: PyVLCEngine = engine or get_engine()
+        self.instance: Instance = self.engine.instance
+        self.media_list: MediaList = self.instance.media_list_new()
+        self.monitor_state = MonitorState(self.engine.mplayer_controls, self.origin)
+        self._lock = threading.RLock()  # songs_list & media_list are edited together.
 
-    def _init_media_list(self):
-        """Creates a new media list adds to MLplayer"""
-        self.media_list = self.instance.media_list_new()
-        self.player.set_media_list(self.media_list)
+    @property
+    def player(self) -> MediaListPlayer:
+        """Media list player of the engine"""
+        return self.engine.player
 
-    def _set_new_media(self):
-        """Sets the songs_list as new media list"""
-        self.media_list = self.instance.media_list_new(self.songs_list)
-        self.player.set_media_list(self.media_list)
+    @property
+    def is_active(self) -> bool:
+        """Is this media list loaded in the engine"""
+        return self.engine.active is self
+
+    def activate(self):
+        """Loads this media list in the engine"""
+        self.engine.activate(self)
+
+    def _mrl(self, media_url: str) -> str:
+        """Url the player opens - the audio proxy's loopback url if there's one"""
+        if self.engine.audio_proxy is None:
+            return media_url
+        return self.engine.audio_proxy.local_url(media_url)
+
+    def _release(self, media_urls) -> None:
+        """Media urls dropped from media_list - unregistered from the audio proxy"""
+        if self.engine.audio_proxy is not None:
+            for media_url in media_urls:
+                self.engine.audio_proxy.release(media_url)
+
+    def origin(self, mrl: str) -> str:
+        """Stream url of the media the player opened"""
+        if self.engine.audio_proxy is None:
+            return mrl
+        return self.engine.audio_proxy.origin(mrl)
+
+    def position(self, media_url: str) -> Optional[int]:
+        """Position of the media in media_list, None if it's not there"""
+        with self._lock:
+            if media_url in self.songs_list:
+                return self.songs_list.index(media_url)
+        return None
 
+    def __len__(self) -> int:
+        return len(self.songs_list)
+
+    def _append(self, media_urls: list):
+        """Appends the media not in media_list yet - in place, called with the lock held"""
+        media_urls = [url for url in media_urls if self.songs_list.append(url)]
+        if media_urls:
+            self.media_list.lock()
+            try:
+                for media_url in media_urls:
+                    self.media_list.add_media(self._mrl(media_url))
+            finally:
+                self.media_list.unlock()
+
+    @traced('player')
     def add_media(self, media_url: str):
         """Appends the new media to media_list"""
-        if media_url not in self.songs_list:
-            self.songs_list.append(media_url)
-            self._set_new_media()
+        with self._lock:
+            self._append([media_url])
 
+    @traced('player')
     def add_medias(self, media_urls: list):
-        """Appends the new media from LIST to media_list."""
-        self.songs_list = media_urls #this is required for play_media.
-        self.media_list = self.instance.media_list_new(self.songs_list)
-        self.player.set_media_list(self.media_list)
-
+        """Replaces the media_list items with the media from LIST."""
+        with self._lock:
+            self.media_list.lock()
+            try:
+                for index in range(len(self.songs_list) - 1, -1, -1):
+                    self.media_list.remove_index(index)
+            finally:
+                self.media_list.unlock()
+            self._release(list(self.songs_list))
+            self.songs_list.clear()
+            self._append(media_urls)
+
+    @traced('player')
+    def append_medias(self, media_urls: list):
+        """Appends the new media from LIST to the end of media_list in place -
+        the playing media isn't interrupted"""
+        with self._lock:
+            self._append(media_urls)
+
+    @traced('player')
     def remove_media(self, media_url: str):
-        """Removes media from media list and sets the updated list"""
-        if media_url in self.songs_list:
-            self.songs_list.remove(media_url)
-            self._set_new_media()
-
+        """Removes media from media list in place - the playing media carries on"""
+        with self._lock:
+            index = self.position(media_url)
+            if index is not None:
+                self.songs_list.remove(media_url)
+                self.media_list.lock()
+                try:
+                    self.media_list.remove_index(index)
+                finally:
+                    self.media_list.unlock()
+                self._release([media_url])
+
+    @traced('player')
+    def replace_media(self, media_url: str, new_url: str) -> bool:
+        """Swaps the media for the new url in place - at its position in media_list.
+        Not meant for the playing media. False if the media isn't in media_list"""
+        with self._lock:
+            index = self.position(media_url)
+            if index is None or not self.songs_list.replace(media_url, new_url):
+                return False
+            self.media_list.lock()
+            try:
+                self.media_list.remove_index(index)
+                self.media_list.insert_media(self.instance.media_new(self._mrl(new_url)), index)
+            finally:
+                self.media_list.unlock()
+            self._release([media_url])
+            return True
+
+    @traced('player')
     def play_media(self, media_url: str):
         """Plays the media from the song list.
-        It checks if the media_url is already part of song_list.
-        If yes, then play that media by getting the index.
-        If not, then append it to the media_list, set it and then play the added song."""
-        if media_url in self.songs_list:
-            song_index = self.songs_list.index(media_url)
-            return self.player.play_item_at_index(song_index)
-        else:
-            self.add_media(media_url)
-            self._set_new_media()
-            return self.player.play_item_at_index(self.songs_list.index(media_url))
+        Appends the media_url to the media_list if it's not part of it, then plays it by its index."""
+        self.add_media(media_url)
+        self.activate()
+        return self.player.play_item_at_index(self.position(media_url))
 
     @property
     def get_media_player(self):
@@ -70,17 +245,20 @@ class PyVLCPlayer(MusicPlayerControls):
 
     def __init__(
             self,
-            mlplayer_factory: Optional[PyVLCPlayerInstance] = None) -> None:
-
-        self.mlplayer_factory = mlplayer_factory if mlplayer_factory else PyVLCPlayerInstance()
-        self.mlplayer_controls = MediaListPlayerControls(self.mlplayer_factory.player)
-        self.mplayer_controls = MediaPlayerControls(self.mlplayer_factory.get_media_player)
+            mlplayer_factory: Optional[PyVLCPlayerInstance] = None,
+            engine: Optional[PyVLCEngine] = None) -> None:
+
+        self.mlplayer_factory = mlplayer_factory if mlplayer_factory else PyVLCPlayerInstance(engine)
+        self.engine = self.mlplayer_factory.engine
+        self.mplayer_controls = self.engine.mplayer_controls
+        self.mlplayer_controls = MediaListPlayerControls(
+            self.engine.player, self.mlplayer_factory, self.mplayer_controls)
         # Media List player will invoke MediaPlayerControls and pass it other controls.
         self.volume_controls = VolumeControls(self.mplayer_controls)
         self.state_controls = StateControls(self.mplayer_controls)
         self.misc_controls = MiscControls(self.mplayer_controls)
         self.playback_controls = PlaybackControls(self.mplayer_controls)
-        self.monitor_state = MonitorState(self.mplayer_controls)
+        self.monitor_state = self.mlplayer_factory.monitor_state
 
     def player_controls(self, user_input: str):
         """Handler method for Player Controls"""
@@ -109,10 +287,10 @@ class MediaPlayerControls():
 
     def __init__(self, media_player_instance: MediaPlayer) -> None:
         self.media = media_player_instance
+        self.on_seek: Optional[Callable] = None  # the track rebuffers after a seek.
         self.devices = []
         self.volume = 100
         self.state = None
-        self.get_devices()
 
     @property
     def get_song_url_from_player(self):
@@ -122,6 +300,7 @@ class MediaPlayerControls():
 
     def get_devices(self) -> list:
         """Gets the available audio output devices"""
+        self.devices = []
         mods = self.media.audio_output_device_enum()
         count = 0
         if mods:
@@ -137,6 +316,7 @@ class MediaPlayerControls():
 
     def display_devices(self) -> None:
         """Pretty print list of output devices."""
+        self.get_devices()  # enumerated on demand, devices can change.
         for device in self.devices:
             print(f"ID: {device['id']}")
             print(f"Device: {device['description']}")
@@ -144,6 +324,8 @@ class MediaPlayerControls():
 
     def select_device(self, selection_: int) -> None:
         """Selects the output device."""
+        if not self.devices:
+            self.get_devices()
         for device in self.devices:
             if device['id'] == selection_:
                 print(f'Switching output to "{device["description"]}"')
@@ -206,12 +388,16 @@ class MediaPlayerControls():
 
     def seek_forward(self, time: int) -> None:
         """Seek forward"""
+        if self.on_seek:
+            self.on_seek()
         self.media.set_time(
             self.get_time()+(time*1000)
         )
 
     def seek_backward(self, time: int) -> None:
         """Seek forward"""
+        if self.on_seek:
+            self.on_seek()
         self.media.set_time(
             self.get_time()-(time*1000)
         )
@@ -220,6 +406,10 @@ class MediaPlayerControls():
         """Get media state"""
         return self.media.get_state()
 
+    def is_playing(self) -> bool:
+        """Is the media playing"""
+        return bool(self.media.is_playing())
+
     def play(self):
         """Play"""
         self.media.play()
@@ -234,49 +424,91 @@ class MediaPlayerControls():
 
 
 class MediaListPlayerControls():
-    """Media List Player Controls"""
+    """Media List Player Controls - the mode's media list is loaded before playing"""
 
-    def __init__(self, media_list_player: MediaListPlayer) -> None:
+    def __init__(
+            self,
+            media_list_player: MediaListPlayer,
+            mlplayer: Optional[PyVLCPlayerInstance] = None,
+            controls: Optional[MediaPlayerControls] = None) -> None:
         self.media_list_player = media_list_player
-        self.media_player = MediaPlayerControls(
+        self.mlplayer = mlplayer
+        self.media_player = controls or MediaPlayerControls(
             self.media_list_player.get_media_player())
 
+    def _activate(self):
+        if self.mlplayer:
+            self.mlplayer.activate()
+
+    def _playing_url(self) -> str:
+        url = self.media_player.get_song_url_from_player
+        return self.mlplayer.origin(url) if self.mlplayer else url
+
+    @traced('player')
     def play_index(self, index: int):
         """Plays item at certain index"""
+        self._activate()
         result = self.media_list_player.play_item_at_index(index)
         if result == 0:
-            return self.media_player.get_song_url_from_player
+            return self._playing_url()
         print("!*! Invalid Index/Song not found !*!")
         return None
 
+    def _step(self, offset: int) -> Optional[int]:
+        """Plays the item offset away from the playing one, looked up by its url -
+        positions stay right after media list edits. None if the playing media is unknown"""
+        position = None
+        if self.mlplayer and self.mlplayer.is_active:
+            media = self.media_player.media.get_media()
+            position = self.mlplayer.position(self.mlplayer.origin(media.get_mrl())) if media else None
+        if position is None:
+            return None
+        if not 0 <= position + offset < len(self.mlplayer):
+            return -1
+        return self.media_list_player.play_item_at_index(position + offset)
+
+    @traced('player')
     def next_song(self):
         """Plays next song in the list"""
-        _next = self.media_list_player.next()
+        self._activate()
+        _next = self._step(1)
+        if _next is None:
+            _next = self.media_list_player.next()
         if _next == 0:
-            return self.media_player.get_song_url_from_player
+            return self._playing_url()
         print("!*! Reached End of Media List !*!")
         return None
 
+    @traced('player')
     def previous_song(self):
         """Plays previous song in the list"""
-        _previous = self.media_list_player.previous()
+        self._activate()
+        _previous = self._step(-1)
+        if _previous is None:
+            _previous = self.media_list_player.previous()
         if _previous == 0:
-            return self.media_player.get_song_url_from_player
+            return self._playing_url()
         print("!*! Reached Start of Media List !*!")
         return None
 
+    @traced('player')
     def play_start(self):
         """Play the first song in media list - start from beginning"""
+        self._activate()
         return self.media_list_player.play_item_at_index(0)
 
+    @traced('player')
     def play(self):
         """Starts playing the media list"""
+        self._activate()
         return self.media_list_player.play()
 
+    @traced('player')
     def stop(self):
         """Stops the playing media list"""
         return self.media_list_player.stop()
 
+    @traced('player')
     def pause(self):
         """Pauses the playing media list"""
         return self.media_list_player.pause()
@@ -399,21 +631,26 @@ class PlaybackControls():
 
 
 class MonitorState():
-    """Handler for State Controls"""
+    """Controller callbacks of a mode - run by the engine on player events
+    (through the event dispatcher) while the mode's media list is active"""
 
-    callback: Callable
+    callback: Callable  # (status, stream_url) - a media started playing.
+    tick_callback: Callable  # queue monitor - track changed/ended.
 
-    def __init__(self, controls: MediaPlayerControls) -> None:
+    def __init__(self, controls: MediaPlayerControls, origin: Optional[Callable] = None) -> None:
         self.controls = controls
-        _ = threading.Timer(5, self.manage)
-        _.setDaemon(True)
-        _.start()
+        self.origin = origin  # player mrl -> stream url.
+        self.callback = None
+        self.tick_callback = None
 
     def manage(self):
-        """Thread loop to monitor player status and update main song queue"""
-        if self.controls.get_state() == State(3):
-            self.callback('\033[31mPlayed\033[0m', self.controls.get_song_url_from_player)
-        threading.Timer(15, self.manage).start()
-        # if self.controls.get_state() == State(4):
-        # elif self.controls.get_state() == State(6):
-        # elif self.controls.get_state() == State(5):
+        """Media started playing - update main song queue"""
+        if self.callback and self.controls.get_state() == State(3):
+            url = self.controls.get_song_url_from_player
+            self.callback('\033[31mPlayed\033[0m', self.origin(url) if self.origin else url)
+        self.tick()
+
+    def tick(self):
+        """Run the queue monitor"""
+        if self.tick_callback:
+            self.tick_callback()
@@ -3,12 +3,15 @@ Playlist provider - API
 """
 
 from __future__ import annotations
-from typing import TYPE_CHECKING
-from html import unescape
-from urllib.parse import urlencode
+from typing import TYPE_CHECKING, Iterator, Optional
 from urllib3 import disable_warnings
 from rkstreamer.interfaces.provider import IPlaylistProvider
+from rkstreamer.services.exceptions import NetworkError
+from rkstreamer.services.request import API_BASE, PARAMS_FTEXT, Endpoint
+from rkstreamer.services.parser import decode, parse_playlist_songs
+from rkstreamer.services.bitrate import policy, with_bitrate
 from rkstreamer.utils.helper import LANGUAGES
+from rkstreamer.utils.trace import traced
 
 if TYPE_CHECKING:
     from rkstreamer.types import (
@@ -24,55 +27,92 @@ disable_warnings()  # Function to suppress the SSL Verification error.
 class JioSaavnPlaylistProvider(IPlaylistProvider):
     """Jio Saavn - Playlist provider API"""
 
-    API_BASE = "https://www.jiosaavn.com/api.php"
+    API_BASE = API_BASE
 
-    PARAMS_DEFAULT = {'api_version': 4, '_format': 'json', '_marker': 0,
-                      'ctx': 'web6dot0'}
-    PARAMS_FTEXT = {'api_version': 4, '_format': 'text', '_marker': 0,
-                    'ctx': 'web6dot0'}  # Format set to text for plist songs download.
+    # q - search string.
+    plist_search = Endpoint('search.getPlaylistResults', p=1)
 
-    plist_search = {'__call': 'search.getPlaylistResults', 'p': 1, 'q': ''}
+    PAGE_SIZE = 50  # songs per playlist page - 'n'
+    PAGE_WINDOW = 4  # playlist pages requested at once.
+    START_BITRATE = 160  # of the tracks queued before throughput is measured.
 
-    plist_download = {'__call': 'webapi.get', 'token': '', 'type': 'playlist',
-                      'includeMetaTags': 0, 'p': 1, 'n': 50}
+    # token - playlist id, p - page.
+    plist_download = Endpoint('webapi.get', PARAMS_FTEXT, type='playlist',
+                              includeMetaTags=0, n=PAGE_SIZE)
 
     def __init__(self, client: NetworkProviderType) -> None:
         self.client = client
 
     def search_playlists(self, search_string: str, **kwargs) -> PListRawType:
         """Playlist search"""
-        self.plist_search['q'] = search_string
         language = [kwargs.get('lang'),] \
             if kwargs.get('lang') \
             else LANGUAGES
-        plist_request = self.client.get(
-            url=f"{self.API_BASE}?{urlencode(self.plist_search|self.PARAMS_DEFAULT, safe='+')}")
+        plist_request = self.client.get(**self.plist_search.query(q=search_string).kwargs)
         return self._parse_playlist(plist_request, lang=language)
 
+    @traced('parse')
     def _parse_playlist(self, response: NetworkProviderResponseType, **kwargs) -> PListRawType:
         """Parse playlist response"""
         return [{'name': plist['title'],
                 'token': plist['perma_url'].split('/')[-1],
                 'language': plist['more_info']['language'],
                  'song_count': plist['more_info']['song_count']}
-                for plist in response.json()['results']
+                for plist in decode(response)['results']
                 if plist['more_info']['language'] in kwargs.get('lang')]
 
     def select_playlist(self, arg: str, **kwargs) -> PListRawType:
-        self.plist_download['token'] = arg
-        plist_select = self.client.get(
-            url=self.API_BASE, params=self.plist_download | self.PARAMS_FTEXT)
-        return self._parse_playlist_songs(plist_select, **kwargs)
-
+        """All songs of the playlist"""
+        pages = self.select_playlist_pages(arg, **kwargs)
+        songs = next(pages)
+        for page in pages:
+            songs.extend(page)
+        return songs
+
+    def select_playlist_pages(
+            self, arg: str, song_count: Optional[int] = None, **kwargs) -> Iterator[PListRawType]:
+        """Yields the playlist songs page by page (PAGE_SIZE songs), in playlist order.
+        Page 1 is requested first; when the song count is known, the remaining pages
+        are gathered PAGE_WINDOW at a time - otherwise one by one until a short page.
+        Retries are the client's; a page that still fails raises its NetworkError."""
+        page = self._parse_playlist_songs(self._get_playlist_page(arg, 1), **kwargs)
+        yield page
+        if len(page) < self.PAGE_SIZE:
+            return
+        try:
+            last_page = -(-int(song_count) // self.PAGE_SIZE)
+        except (TypeError, ValueError):
+            last_page = None
+        if last_page is None:
+            number = 1
+            while len(page) == self.PAGE_SIZE:
+                number += 1
+                page = self._parse_playlist_songs(self._get_playlist_page(arg, number), **kwargs)
+                yield page
+            return
+        for first in range(2, last_page + 1, self.PAGE_WINDOW):
+            window = range(first, min(first + self.PAGE_WINDOW, last_page + 1))
+            responses = self.client.gather(
+                [self._playlist_page_request(arg, number) for number in window],
+                return_exceptions=True)
+            for response in responses:
+                if isinstance(response, NetworkError):
+                    raise response
+                yield self._parse_playlist_songs(response, **kwargs)
+
+    def _playlist_page_request(self, arg: str, page: int) -> dict:
+        return self.plist_download.request(token=arg, p=page).kwargs
+
+    def _get_playlist_page(self, arg: str, page: int) -> NetworkProviderResponseType:
+        return self.client.get(**self._playlist_page_request(arg, page))
+
+    @traced('parse')
     def _parse_playlist_songs(self, response: NetworkProviderResponseType, **kwargs) -> PListRawType:
         """Parse songs from playlist selection"""
+        songs = decode(response)['fullsongs']
         if kwargs.get('view'):
-            return [{'name': unescape(song['song_for_player'])}
-                    for song in response.json()['fullsongs']]
-
-        return [{'name': unescape(song['song_for_player']),
-                'stream_url': self._change_plist_song_url(song['download_url'])}
-                for song in response.json()['fullsongs']]
+            return parse_playlist_songs(songs)
+        return parse_playlist_songs(songs, self._change_plist_song_url)
 
     def _change_plist_song_url(self, song_url: str) -> SongUrl:
         """Change plist song urls with latest JS CDN host"""
@@ -80,5 +120,13 @@ class JioSaavnPlaylistProvider(IPlaylistProvider):
             return song_url
         rm_pattern = song_url.removeprefix(
             'http://h.saavncdn.com').removeprefix('https://h.saavncdn.com').removesuffix('.mp3')
-        new_pattern = "https://aac.saavncdn.com"+rm_pattern+"_96.mp4"
+        new_pattern = f"https://aac.saavncdn.com{rm_pattern}_{self.bitrate()}.mp4"
         return new_pattern
+
+    def bitrate(self) -> int:
+        """Bitrate of the tracks queued now - START_BITRATE at most, until measured"""
+        return policy.bitrate(start=self.START_BITRATE)
+
+    def rebitrate(self, stream_url: SongUrl) -> SongUrl:
+        """The stream url at the bitrate picked now - as the track comes up next"""
+        return with_bitrate(stream_url, self.bitrate())
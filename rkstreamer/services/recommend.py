@@ -0,0 +1,139 @@
+"""
+Service - Recommendations: ranking, dedupe & the background worker
+"""
+
+from __future__ import annotations
+import queue
+import threading
+from collections import Counter, OrderedDict
+from typing import TYPE_CHECKING, Callable, Hashable, Optional
+from rkstreamer.services.exceptions import NetworkError
+
+if TYPE_CHECKING:
+    from rkstreamer.types import SongListRawType, SongIndexType
+
+# Song ids remembered as recommended, queued or played - they aren't recommended again.
+SEEN_SIZE = 10000
+
+# RQueue is capped - recommendations past the cap aren't taken.
+RQUEUE_SIZE = 50
+
+
+class SeenSongs():
+    """Bounded LRU set of song ids - the least recently seen ids are forgotten first"""
+
+    def __init__(self, size: int = SEEN_SIZE) -> None:
+        self.size = size
+        self._ids: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, song_id: Hashable) -> bool:
+        """Marks the id as seen (most recent) - False if it was seen already"""
+        with self._lock:
+            if song_id in self._ids:
+                self._ids.move_to_end(song_id)
+                return False
+            self._ids[song_id] = None
+            if len(self._ids) > self.size:
+                self._ids.popitem(last=False)
+            return True
+
+    def __contains__(self, song_id: Hashable) -> bool:
+        return song_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+
+def rank(candidates: list, diversity: float = 0.5) -> SongListRawType:
+    """Merges the recommendations of several seeds (oldest seed first) into one list.
+
+    A song scores a point per seed recommending it, plus up to half a point each
+    for its place in the seed's station & for the seed being recent. Picked in
+    score order, with `diversity` taken off per song already picked by the artists."""
+    scores, songs = Counter(), {}
+    for seed, rsongs in enumerate(candidates, 1):
+        recency = seed / len(candidates) / 2
+        for place, song in enumerate(rsongs):
+            key = song.get('id') or song.get('name')
+            songs.setdefault(key, song)
+            scores[key] += 1 + recency + (1 - place / len(rsongs)) / 2
+    ranked, picked = [], Counter()
+    pending = sorted(scores, key=scores.get, reverse=True)
+    while pending:
+        best = max(pending, key=lambda key: scores[key] - diversity * picked[songs[key].get('artists')])
+        pending.remove(best)
+        picked[songs[best].get('artists')] += 1
+        ranked.append(songs[best])
+    return ranked
+
+
+class RecommendationWorker():
+    """Fetches recommendations on a background thread, off the player & REPL threads.
+
+    Seed song ids submitted while a batch is being fetched are fetched together in the
+    next one (up to `batch` seeds) - fetch(seed_ids) -> rsongs index, then sink(rsongs).
+    Failed batches (NetworkError) are dropped; recommendations carry on with the next."""
+
+    BATCH = 4
+
+    def __init__(
+            self,
+            fetch: Callable[[list], Optional[SongIndexType]],
+            sink: Callable[[SongIndexType], None],
+            batch: int = BATCH,
+            name: str = 'rkstreamer-recommend') -> None:
+        self.fetch = fetch
+        self.sink = sink
+        self.batch = batch
+        self.name = name
+        self.batches = 0  # batches fetched.
+        self._seeds = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, seed_id: str) -> None:
+        """Queues the seed song for recommendations"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        self._seeds.put(seed_id)
+
+    def join(self) -> None:
+        """Waits for the submitted seeds to be fetched"""
+        self._seeds.join()
+
+    def _take(self) -> list:
+        """Next batch - waits for a seed, then takes the ones already waiting"""
+        seeds = [self._seeds.get()]
+        while len(seeds) < self.batch:
+            try:
+                seeds.append(self._seeds.get_nowait())
+            except queue.Empty:
+                break
+        return seeds
+
+    def _run(self) -> None:
+        """Worker loop"""
+        while True:
+            seeds = self._take()
+            try:
+                rsongs = self.fetch(list(dict.fromkeys(seeds)))
+                self.batches += 1
+                if rsongs:
+                    self.sink(rsongs)
+            except NetworkError:
+                pass  # recommendations are skipped while their endpoints are failing.
+            except Exception as exc:  # pylint: disable=broad-except
+                print(f"\nError: {exc.__class__.__name__}, Desc: '{exc}'")
+            finally:
+                for _ in seeds:
+                    self._seeds.task_done()
+
+
+__all__ = ['SeenSongs', 'RecommendationWorker', 'rank', 'SEEN_SIZE', 'RQUEUE_SIZE']
@@ -0,0 +1,150 @@
+"""
+Service - Record & replay network providers
+"""
+
+import json
+import time
+import base64
+import threading
+from typing import Optional
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from rkstreamer.interfaces.network import INetworkProvider, INetworkProviderResponse
+from rkstreamer.services.exceptions import NetworkError
+from rkstreamer.services.cache import CachedResponse, normalize_request
+
+# Params left out of the replay key - the rsongs count ('k') is random per call.
+IGNORED_PARAMS = ('k',)
+
+
+def replay_key(kwargs: dict, ignored: tuple = IGNORED_PARAMS) -> str:
+    """Key of the request in a cassette - normalized url & params, redirects flag"""
+    split = urlsplit(kwargs.get('url'))
+    query = [(name, value) for name, value in parse_qsl(split.query, keep_blank_values=True)
+             if name not in ignored]
+    params = {name: value for name, value in (kwargs.get('params') or {}).items()
+              if name not in ignored}
+    url = split._replace(query=urlencode(query)).geturl()
+    _, key = normalize_request(url, params)
+    if kwargs.get('allow_redirects') is False:
+        key += ' [no-redirects]'
+    if (kwargs.get('headers') or {}).get('Range'):
+        key += f" [{kwargs['headers']['Range']}]"
+    return key
+
+
+class Cassette():
+    """Recorded responses, keyed by replay_key - saved as a JSON file"""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self.entries: dict = {}
+        self._lock = threading.Lock()
+        if path:
+            try:
+                with open(path, encoding='utf-8') as file:
+                    self.entries = json.load(file)
+            except FileNotFoundError:
+                pass
+
+    def record(self, kwargs: dict, response: INetworkProviderResponse) -> None:
+        """Adds the response of the request"""
+        entry = {'status_code': response.status_code,
+                 'headers': dict(response.headers),
+                 'body': base64.b64encode(response.content or b'').decode()}
+        with self._lock:
+            self.entries[replay_key(kwargs)] = entry
+
+    def play(self, kwargs: dict) -> Optional[CachedResponse]:
+        """Recorded response of the request, None if it wasn't recorded"""
+        entry = self.entries.get(replay_key(kwargs))
+        if entry is None:
+            return None
+        return CachedResponse(
+            base64.b64decode(entry['body']), entry['status_code'], entry['headers'])
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Writes the cassette to path (default - the path it was loaded from)"""
+        with self._lock, open(path or self.path, 'w', encoding='utf-8') as file:
+            json.dump(self.entries, file, indent=1, sort_keys=True)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class RecordingProvider(INetworkProvider):
+    """Passes requests to the client & records the responses in the cassette"""
+
+    def __init__(self, client: INetworkProvider, cassette: Cassette) -> None:
+        self.client = client
+        self.cassette = cassette
+
+    def get(self, **kwargs) -> INetworkProviderResponse:
+        response = self.client.get(**kwargs)
+        self.cassette.record(kwargs, response)
+        return response
+
+    def gather(self, requests_kwargs: list, return_exceptions: bool = False) -> list:
+        responses = self.client.gather(requests_kwargs, return_exceptions)
+        for kwargs, response in zip(requests_kwargs, responses):
+            if not isinstance(response, BaseException):
+                self.cassette.record(kwargs, response)
+        return responses
+
+
+class ReplayProvider(INetworkProvider):
+    """Serves the responses recorded in the cassette - no network.
+    Requests that weren't recorded fail with NetworkError; latency (secs) is added
+    to every response to model a network."""
+
+    def __init__(self, cassette: Cassette, latency: float = 0) -> None:
+        self.cassette = cassette
+        self.latency = latency
+        self.misses = 0
+
+    def get(self, **kwargs) -> INetworkProviderResponse:
+        if self.latency:
+            time.sleep(self.latency)
+        response = self.cassette.play(kwargs)
+        if response is None:
+            self.misses += 1
+            raise NetworkError(f"Not recorded: {replay_key(kwargs)}")
+        if not 200 <= response.status_code < 400:
+            raise NetworkError(f"{response.status_code} for {kwargs.get('url')}")
+        return response
+
+    def gather(self, requests_kwargs: list, return_exceptions: bool = False) -> list:
+        responses = []
+        for kwargs in requests_kwargs:
+            try:
+                responses.append(self.get(**kwargs))
+            except NetworkError as exception:
+                if not return_exceptions:
+                    raise
+                responses.append(exception)
+        return responses
+
+
+class RewriteProvider(INetworkProvider):
+    """Sends the requests to other hosts - e.g. the API & CDN to a local stand-in server.
+    hosts - {'https://www.jiosaavn.com': 'http://127.0.0.1:8000'}"""
+
+    def __init__(self, client: INetworkProvider, hosts: dict) -> None:
+        self.client = client
+        self.hosts = hosts
+
+    def _rewrite(self, kwargs: dict) -> dict:
+        url = kwargs.get('url') or ''
+        for origin, target in self.hosts.items():
+            if url.startswith(origin):
+                return kwargs | {'url': target + url[len(origin):]}
+        return kwargs
+
+    def get(self, **kwargs) -> INetworkProviderResponse:
+        return self.client.get(**self._rewrite(kwargs))
+
+    def gather(self, requests_kwargs: list, return_exceptions: bool = False) -> list:
+        return self.client.gather(
+            [self._rewrite(kwargs) for kwargs in requests_kwargs], return_exceptions)
+
+
+__all__ = ['Cassette', 'RecordingProvider', 'ReplayProvider', 'RewriteProvider', 'replay_key']
@@ -0,0 +1,52 @@
+"""
+Service - API requests
+"""
+
+from typing import NamedTuple
+from urllib.parse import urlencode
+
+API_BASE = "https://www.jiosaavn.com/api.php"
+
+PARAMS_DEFAULT = {'api_version': 4, '_format': 'json', '_marker': 0,
+                  'ctx': 'web6dot0'}
+PARAMS_FTEXT = {'api_version': 4, '_format': 'text', '_marker': 0,
+                'ctx': 'web6dot0'}  # Format set to text for plist songs download.
+
+
+class Request(NamedTuple):
+    """Immutable API request - built per call, never shared between callers"""
+
+    url: str
+    params: tuple = ()  # per call (name, value) pairs, sent as request params.
+
+    @property
+    def kwargs(self) -> dict:
+        """Keyword args of the network provider's get()"""
+        if not self.params:
+            return {'url': self.url}
+        return {'url': self.url, 'params': dict(self.params)}
+
+
+class Endpoint():
+    """api.php call - its fixed params are encoded into the base url once.
+    Calls only add their own params, so endpoints are safe to share between threads."""
+
+    __slots__ = ('call', 'url')
+
+    def __init__(self, call: str, defaults: dict = PARAMS_DEFAULT, **fixed) -> None:
+        self.call = call
+        self.url = f"{API_BASE}?{urlencode({'__call': call} | fixed | defaults)}"
+
+    def request(self, **params) -> Request:
+        """Request with the params sent separately (auth tokens, album/playlist pages)"""
+        return Request(self.url, tuple(params.items()))
+
+    def query(self, **params) -> Request:
+        """Request with the params in the url (searches)"""
+        return Request(f"{self.url}&{urlencode(params)}")
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.call!r})"
+
+
+__all__ = ['API_BASE', 'PARAMS_DEFAULT', 'PARAMS_FTEXT', 'Request', 'Endpoint']
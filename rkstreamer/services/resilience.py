@@ -0,0 +1,187 @@
+"""
+Service - Network resilience: retries, timeouts & circuit breakers
+"""
+
+import time
+import random
+import threading
+from collections import Counter
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+import requests
+from rkstreamer.services.exceptions import NetworkError, CircuitOpenError
+from rkstreamer.services.cache import normalize_request
+from rkstreamer.utils.trace import tracer
+
+# (connect, read) timeout secs per JioSaavn `__call`; CDN & other hosts use DEFAULT_TIMEOUT.
+ENDPOINT_TIMEOUTS = {
+    'search.getResults': (3.05, 8),
+    'search.getAlbumResults': (3.05, 8),
+    'search.getPlaylistResults': (3.05, 8),
+    'webapi.get': (3.05, 15),
+    'song.generateAuthToken': (3.05, 6),
+    'webradio.createEntityStation': (3.05, 6),
+    'webradio.getSong': (3.05, 8),
+}
+DEFAULT_TIMEOUT = (3.05, 10)
+
+RETRY_STATUS = frozenset((429, 500, 502, 503, 504))
+
+
+def endpoint_of(kwargs: dict) -> str:
+    """Endpoint of a request - the api `__call`, else the host (CDN/auth redirects)"""
+    call, _ = normalize_request(kwargs.get('url'), kwargs.get('params'))
+    return call or urlsplit(kwargs.get('url')).netloc
+
+
+class RetryPolicy():
+    """Bounded retries with full jitter exponential backoff"""
+
+    def __init__(self, attempts: int = 3, base: float = 0.25, cap: float = 2.0) -> None:
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt: int) -> float:
+        """Secs to wait before the retry after failed attempt (1 based)"""
+        return random.uniform(0, min(self.cap, self.base * 2 ** (attempt - 1)))
+
+    @staticmethod
+    def retryable(exception: BaseException) -> bool:
+        """Transient failures - connection errors, timeouts, 429 & 5xx"""
+        if isinstance(exception, requests.exceptions.HTTPError):
+            response = exception.response
+            return response is not None and response.status_code in RETRY_STATUS
+        return isinstance(exception, (requests.exceptions.ConnectionError,
+                                      requests.exceptions.Timeout))
+
+
+class CircuitBreaker():
+    """Opens after `threshold` consecutive failures - requests are refused for `reset`
+    secs, then one trial request is let through (half open) to close it again."""
+
+    def __init__(self, threshold: int = 5, reset: float = 30) -> None:
+        self.threshold = threshold
+        self.reset = reset
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """closed, open or half-open"""
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            return 'half-open' if time.monotonic() - self.opened_at >= self.reset else 'open'
+
+    def allow(self) -> bool:
+        """Can a request go out"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def failure(self) -> bool:
+        """Records a failed request - True if the breaker (re)opened"""
+        with self._lock:
+            self.failures += 1
+            if self._trial or (self.opened_at is None and self.failures >= self.threshold):
+                self.opened_at = time.monotonic()
+                self._trial = False
+                return True
+            return False
+
+
+class Resilience():
+    """Runs requests with per endpoint timeouts, retries & circuit breakers.
+    Failures surface as NetworkError, so callers can degrade the feature - nothing exits.
+
+    stats counts per endpoint: requests, retries, failures, trips (breaker opened)
+    and rejected (refused while open)."""
+
+    def __init__(
+            self,
+            retry: Optional[RetryPolicy] = None,
+            timeouts: Optional[dict] = None,
+            threshold: int = 5,
+            reset: float = 30) -> None:
+        self.retry = retry or RetryPolicy()
+        self.timeouts = ENDPOINT_TIMEOUTS if timeouts is None else timeouts
+        self.threshold = threshold
+        self.reset = reset
+        self.breakers: dict = {}
+        self.stats = Counter()  # (endpoint, counter) -> count
+        self._lock = threading.Lock()
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        """Circuit breaker of the endpoint"""
+        with self._lock:
+            if endpoint not in self.breakers:
+                self.breakers[endpoint] = CircuitBreaker(self.threshold, self.reset)
+            return self.breakers[endpoint]
+
+    def _count(self, endpoint: str, counter: str) -> None:
+        with self._lock:
+            self.stats[endpoint, counter] += 1
+
+    def call(self, function: Callable, **kwargs):
+        """function(**kwargs) - a GET raising RequestException on failure"""
+        endpoint = endpoint_of(kwargs)
+        kwargs.setdefault('timeout', self.timeouts.get(endpoint, DEFAULT_TIMEOUT))
+        breaker = self.breaker(endpoint)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                self._count(endpoint, 'rejected')
+                raise CircuitOpenError(f"{endpoint} unavailable - circuit open")
+            attempt += 1
+            self._count(endpoint, 'requests')
+            try:
+                with tracer.span('network.request', endpoint):
+                    response = function(**kwargs)
+            except requests.exceptions.RequestException as exception:
+                transient = self.retry.retryable(exception)
+                if not transient:
+                    breaker.success()  # the endpoint answered - e.g. 4xx for a bad token.
+                elif breaker.failure():
+                    self._count(endpoint, 'trips')
+                if transient and attempt < self.retry.attempts:
+                    self._count(endpoint, 'retries')
+                    time.sleep(self.retry.delay(attempt))
+                    continue
+                self._count(endpoint, 'failures')
+                raise NetworkError(exception) from None
+            breaker.success()
+            return response
+
+    def summary(self) -> str:
+        """Counters & breaker state per endpoint"""
+        with self._lock:
+            endpoints = sorted({endpoint for endpoint, _ in self.stats})
+            stats = dict(self.stats)
+        lines = []
+        for endpoint in endpoints:
+            counters = ', '.join(
+                f"{counter} {stats.get((endpoint, counter), 0)}"
+                for counter in ('requests', 'retries', 'failures', 'trips', 'rejected'))
+            lines.append(f"{endpoint} [{self.breaker(endpoint).state}] - {counters}")
+        return '\n'.join(lines) or 'No requests yet'
+
+
+# Shared by the network providers.
+resilience = Resilience()
+
+
+__all__ = ['RetryPolicy', 'CircuitBreaker', 'Resilience', 'resilience',
+           'endpoint_of', 'ENDPOINT_TIMEOUTS']
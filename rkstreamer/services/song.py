@@ -2,98 +2,168 @@
 Songs Provider API
 """
 
+from __future__ import annotations
+import time
 import random
-from html import unescape
-from urllib.parse import quote_plus, urlencode
+from typing import TYPE_CHECKING, Optional
 from urllib3 import disable_warnings
 from rkstreamer.interfaces.provider import ISongProvider
+from rkstreamer.services.exceptions import NetworkError
+from rkstreamer.services.cache import StreamUrlCache
+from rkstreamer.services.request import API_BASE, Endpoint
+from rkstreamer.services.bitrate import policy
+from rkstreamer.services.parser import decode, parse_songs
 from rkstreamer.utils.helper import LANGUAGES
-from rkstreamer.types import (
-    SongListRawType,
-    NetworkProviderType,
-    NetworkProviderResponseType
-)
+from rkstreamer.utils.trace import traced, tracer
+
+if TYPE_CHECKING:
+    from rkstreamer.types import (
+        SongListRawType,
+        NetworkProviderType,
+        NetworkProviderResponseType
+    )
+
 disable_warnings()  # Function to suppress the SSL Verification error.
 
 
 class JioSaavnSongProvider(ISongProvider):
     """Jio Saavn - Song provider API"""
 
-    API_BASE = "https://www.jiosaavn.com/api.php"
+    API_BASE = API_BASE
 
-    PARAMS_DEFAULT = {'api_version': 4, '_format': 'json', '_marker': 0,
-                      'ctx': 'web6dot0'}
+    # q - search string, n - num of results.
+    song_search = Endpoint('search.getResults', p=1)
 
-    # n - num of results, q- search string
-    song_search = {'__call': 'search.getResults', 'p': 1, 'q': '', 'n': ''}
+    # url - enc media url, bitrate - 96, 160 or 320.
+    song_download = Endpoint('song.generateAuthToken')
 
-    song_download = {'__call': 'song.generateAuthToken',
-                     'url': '', 'bitrate': ''}  # url - enc media url, bitrate - 160 or 320
+    # entity_id - '["song id"]'
+    entity_station = Endpoint('webradio.createEntityStation',
+                              entity_type='queue', freemium='', shared='')
 
-    entity_station = {'__call': 'webradio.createEntityStation', 'entity_id': '',
-                      'entity_type': 'queue', 'freemium': '', 'shared': ''}
+    # stationid, k - count of rsongs.
+    recomm_songs = Endpoint('webradio.getSong')
 
-    # k - count of rsongs.
-    recomm_songs = {'__call': 'webradio.getSong', 'stationid': '', 'k': ''}
-
-    def __init__(self, client: NetworkProviderType) -> None:
+    def __init__(
+            self,
+            client: NetworkProviderType,
+            url_cache: Optional[StreamUrlCache] = None) -> None:
         self.client = client
+        self.url_cache = url_cache
 
     def search_songs(self, search_string: str, **kwargs) -> SongListRawType:
         """Search songs using the search string"""
-        self.song_search['q'] = quote_plus(search_string)
-        self.song_search['n'] = kwargs.get('num') or 3
-        self.song_download['bitrate'] = kwargs.get('bitrate') or 320
         language = [kwargs.get('lang'),] \
             if kwargs.get('lang') \
             else LANGUAGES
         response = self.client.get(
-            url=f"{self.API_BASE}?{urlencode(self.song_search|self.PARAMS_DEFAULT, safe='+')}")
+            **self.song_search.query(q=search_string, n=kwargs.get('num') or 3).kwargs)
         return self._parse_songs(response, lang=language)
 
+    @traced('parse')
     def _parse_songs(self, response: NetworkProviderResponseType, **kwargs) -> SongListRawType:
         """Parsing songs info from search songs call"""
-        return [{'name': unescape(song['title']),
-                'id': song['id'],
-                 'album_name': unescape(song['more_info']['album']),
-                 'music': song['more_info']['music'][:50] if song['more_info']['music'] else '',
-                 'artists': unescape(song['subtitle'].replace(f" - {song['more_info']['album']}", '')),
-                 'language': song['language'],
-                 'duration': song['more_info']['duration'],
-                 'token': song['more_info']['encrypted_media_url'],
-                 'album_id': song['more_info']['album_url'].split('/')[-1]}
-                for song in response.json()['results'] if song['language'] in kwargs.get('lang')]
+        return parse_songs(decode(response)['results'], kwargs.get('lang'))
 
     def select_song(self, arg: str, **kwargs) -> str:
-        self.song_download['url'] = arg  # Encrypted URL
+        """Stream url of the encrypted url - bitrate: -b flag, caps the policy's bitrate"""
+        bitrate = policy.bitrate(kwargs.get('bitrate'))
+        if self.url_cache is not None:
+            stream_url = self.url_cache.get(arg, bitrate)
+            if stream_url:
+                return stream_url
         response = self.client.get(
-            url=self.API_BASE, params=self.song_download | self.PARAMS_DEFAULT)
-        return self._parse_song_url(response)
-
+            **self.song_download.request(url=arg, bitrate=bitrate).kwargs)
+        auth_url = self._parse_auth_url(response)
+        if auth_url is None:
+            raise NetworkError("No auth url in the song.generateAuthToken response")
+        with tracer.span('network.redirect'):
+            redirect = self.client.get(url=auth_url, allow_redirects=False)
+        stream_url = self._parse_song_url(redirect)
+        if self.url_cache is not None:
+            self.url_cache.set(arg, bitrate, stream_url)
+        return stream_url
+
+    @traced('parse')
     def _parse_song_url(self, response: NetworkProviderResponseType) -> str:
-        """Get the song download URL"""
-        auth_url = response.json()['auth_url']
-        stream_url = self.client.get(url=auth_url, allow_redirects=False)
-        return stream_url.headers['Location']
+        """Get the song download URL - the Location of the auth url's redirect"""
+        return response.headers['Location']
+
+    def select_songs(self, args: list, **kwargs) -> list:
+        """Batch version of select_song - auth urls & their redirects are requested
+        concurrently (one batch each). Returns stream urls in the order of the
+        encrypted urls; None for the songs that failed to resolve.
+        Urls found in the stream url cache are not requested again."""
+        bitrate = policy.bitrate(kwargs.get('bitrate'))
+        stream_urls = [self.url_cache.get(arg, bitrate) if self.url_cache is not None else None
+                       for arg in args]
+        missing = [index for index, stream_url in enumerate(stream_urls) if not stream_url]
+        auth_responses = self.client.gather(
+            [self.song_download.request(url=args[index], bitrate=bitrate).kwargs
+             for index in missing], return_exceptions=True)
+        auth_urls = {index: self._parse_auth_url(response)
+                     for index, response in zip(missing, auth_responses)}
+        pending = [index for index in missing if auth_urls[index]]
+        with tracer.span('network.redirect'):
+            redirects = self.client.gather(
+                [{'url': auth_urls[index], 'allow_redirects': False} for index in pending],
+                return_exceptions=True)
+        for index, response in zip(pending, redirects):
+            if not isinstance(response, BaseException):
+                stream_urls[index] = response.headers.get('Location')
+                if stream_urls[index] and self.url_cache is not None:
+                    self.url_cache.set(args[index], bitrate, stream_urls[index])
+        return stream_urls
+
+    def warm_stream(self, stream_url: str, size: int) -> int:
+        """Requests the first bytes of the stream, so the CDN edge has it ready
+        when the player opens it. Best effort - returns the bytes received.
+        The transfer is a throughput sample of the bitrate policy."""
+        if not size:
+            return 0
+        started = time.perf_counter()
+        try:
+            response = self.client.get(
+                url=stream_url, headers={'Range': f'bytes=0-{size - 1}'})
+        except NetworkError:
+            return 0
+        received = len(response.content)
+        policy.record_transfer(received, time.perf_counter() - started)
+        return received
+
+    @traced('parse')
+    def _parse_auth_url(self, response: NetworkProviderResponseType) -> Optional[str]:
+        """Get the auth URL from the auth token response, None if it has failed"""
+        if isinstance(response, BaseException):
+            return None
+        try:
+            return response.json()['auth_url']
+        except (KeyError, TypeError, ValueError):
+            return None
 
     def _get_station_id(self, song_id: str) -> str:
-        self.entity_station['entity_id'] = f'["{song_id}"]'
         sid_response = self.client.get(
-            url=self.API_BASE, params=self.entity_station | self.PARAMS_DEFAULT)
-        sid = sid_response.json()['stationid'] if sid_response.json() else ''
-        return sid
+            **self.entity_station.request(entity_id=f'["{song_id}"]').kwargs)
+        return self._parse_station_id(sid_response)
+
+    @traced('parse')
+    def _parse_station_id(self, response: NetworkProviderResponseType) -> str:
+        """Station id of the create station response, '' if it has failed"""
+        if isinstance(response, BaseException):
+            return ''
+        try:
+            station = decode(response)
+            return station['stationid'] if station else ''
+        except (KeyError, TypeError, ValueError):
+            return ''
 
+    @traced('parse')
     def _parse_recomm_songs(self, response: NetworkProviderResponseType) -> SongListRawType:
         try:
-            return [{'name': unescape(song['song']['title']),
-                    'id': song['song']['id'],
-                     'album_name': unescape(song['song']['more_info']['album']),
-                     'music': song['song']['more_info']['music'][:50] if song ['song']['more_info']['music'] else '',
-                     'artists': unescape(song['song']['subtitle'].replace(f" - {song['song']['more_info']['album']}", '')),
-                     'duration': song['song']['more_info']['duration'],
-                     'token': song['song']['more_info']['encrypted_media_url'],
-                     'album_id': song['song']['more_info']['album_url'].split('/')[-1]}
-                    for key, song in response.json().items() if key != 'stationid'] if response.json() else [] # return empty array if no recomm songs returned
+            rsongs = decode(response)
+            if not rsongs:
+                return []  # return empty array if no recomm songs returned
+            return parse_songs(song['song'] for key, song in rsongs.items() if key != 'stationid')
         except (KeyError, IndexError, TypeError):
             print("Get Rsongs failed")
 
@@ -102,8 +172,30 @@ class JioSaavnSongProvider(ISongProvider):
         station_id = self._get_station_id(song_id)
         if not station_id:
             return []
-        self.recomm_songs['stationid'] = station_id
-        self.recomm_songs['k'] = kwargs.get('rsongs') or random.randint(10, 15)
-        recomm_songs = self.client.get(
-            url=self.API_BASE, params=self.recomm_songs | self.PARAMS_DEFAULT)
+        recomm_songs = self.client.get(**self.recomm_songs.request(
+            stationid=station_id, k=kwargs.get('rsongs') or random.randint(10, 15)).kwargs)
         return self._parse_recomm_songs(recomm_songs)
+
+    def get_recomm_songs_batch(self, song_ids: list, **kwargs) -> list:
+        """Batch version of get_recomm_songs - the stations of all the songs are created
+        in one batch, their songs fetched in another. Returns the recommendations per
+        song id, [] for the failed ones; NetworkError if every request failed."""
+        stations = self.client.gather(
+            [self.entity_station.request(entity_id=f'["{song_id}"]').kwargs
+             for song_id in song_ids], return_exceptions=True)
+        station_ids = [self._parse_station_id(response) for response in stations]
+        pending = [index for index, station_id in enumerate(station_ids) if station_id]
+        responses = self.client.gather(
+            [self.recomm_songs.request(
+                stationid=station_ids[index],
+                k=kwargs.get('rsongs') or random.randint(10, 15)).kwargs for index in pending],
+            return_exceptions=True)
+        recomm_songs = [[] for _ in song_ids]
+        for index, response in zip(pending, responses):
+            if not isinstance(response, BaseException):
+                recomm_songs[index] = self._parse_recomm_songs(response) or []
+        failed = [response for response in stations + responses
+                  if isinstance(response, BaseException)]
+        if failed and not any(recomm_songs):
+            raise failed[0] if isinstance(failed[0], NetworkError) else NetworkError(failed[0])
+        return recomm_songs
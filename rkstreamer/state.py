@@ -1,14 +1,24 @@
 """RKStreamer - State and State machine module"""
 
-from rkstreamer.models.exceptions import InvalidInput, QueueException
+from rkstreamer.models.exceptions import InvalidInput, QueueException, NetworkError
+from rkstreamer.services.resilience import resilience
+from rkstreamer.utils.trace import tracer
 
 class State:
-    """State class"""
+    """State class - controller can be given as a factory, it's built on first use"""
 
-    def __init__(self, name, prompt, controller):
+    def __init__(self, name, prompt, controller=None, factory=None):
         self.name = name
         self.prompt = prompt
-        self.controller = controller
+        self._controller = controller
+        self.factory = factory
+
+    @property
+    def controller(self):
+        """State controller - built by the factory when the state is first entered"""
+        if self._controller is None:
+            self._controller = self.factory()
+        return self._controller
 
     def handle_input(self, user_input):
         """Handle user input"""
@@ -33,6 +43,20 @@ class StateMachine:
         """Setting the start date - init"""
         self.current_state = self.states[state_name]
 
+    @staticmethod
+    def trace(action: str):
+        """Tracing command - on/off/reset, or print the span stats"""
+        if action == 'on':
+            tracer.enable()
+        elif action == 'off':
+            tracer.disable()
+        elif action == 'reset':
+            tracer.reset()
+        else:
+            print(f"\n{tracer.summary()}\n")
+            return
+        print(f"Tracing {'on' if tracer.enabled else 'off'}")
+
     def trigger(self):
         """Triggers the state change or handle current state"""
         while True:
@@ -42,12 +66,20 @@ class StateMachine:
                 raise SystemExit("\n\nTata! See you soon!!") from None
             if user_input.lower().startswith('-e'):
                 raise SystemExit('Tata!')
+            if user_input.lower() == '-n':
+                print(f"\n{resilience.summary()}\n")
+                continue
+            if user_input.lower() in ('-t', '-t on', '-t off', '-t reset'):
+                self.trace(user_input.lower()[3:])
+                continue
             if user_input.startswith("--"):
                 state_name = user_input[2:]
                 if (state_name != self.current_state.name) and (state_name in self.states):
                     # stop player when switching mode.
                     self.current_state.controller.view.stop()
                     self.current_state = self.states[state_name]
+                    # modes share one player - swap in this mode's media list.
+                    self.current_state.controller.view.activate()
             else:
                 if user_input:
                     try:
@@ -56,3 +88,5 @@ class StateMachine:
                         print(f"Error: {exc.__class__.__name__}, Desc: 'Invalid Input'")
                     except QueueException as exc:
                         print(f"Error: {exc.__class__.__name__}, Desc: 'Invalid Queue operation'")
+                    except NetworkError as exc:
+                        print(f"Error: {exc.__class__.__name__}, Desc: '{exc}'")
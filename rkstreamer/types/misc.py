@@ -3,6 +3,7 @@
 from typing import NewType
 from rkstreamer.interfaces import (
     Command,
+    IDatabaseProvider,
     INetworkProvider,
     INetworkProviderResponse,
     MusicPlayer,
@@ -11,5 +12,6 @@ from rkstreamer.interfaces import (
 NetworkProviderType = NewType('INetworkProvider', INetworkProvider)
 NetworkProviderResponseType = NewType('INetworkProviderResponse', INetworkProviderResponse)
 CommandType = NewType('Command', Command)
+DatabaseProviderType = NewType('IDatabaseProvider', IDatabaseProvider)
 MusicPlayerType = NewType('MusicPlayer', MusicPlayer)
 MusicPlayerControlsType = NewType('MusicPlayerControls', MusicPlayerControls)
\ No newline at end of file
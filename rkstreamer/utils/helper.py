@@ -1,5 +1,7 @@
 """Module with helper functions & classes"""
 
+import os
+
 
 def parse_input(input_str: str):
     """Return input based on the type"""
@@ -8,6 +10,23 @@ def parse_input(input_str: str):
     return input_str
 
 
+def env_number(name: str, parse, default=None):
+    """Number set in the environment variable (parse - int/float), default if it's unset.
+    A value that isn't a number >= 0 is warned about & the default is used instead."""
+    value = os.environ.get(name, '').strip()
+    if not value:
+        return default
+    try:
+        number = parse(value)
+        if number < 0:
+            raise ValueError(value)
+    except ValueError:
+        print(f"\033[93mIgnoring {name}={value!r} - not a number >= 0, "
+              f"using the default ({default}).\033[0m")
+        return default
+    return number
+
+
 LANGUAGES = ['tamil', 'english', 'hindi', 'telugu',
              'kannada', 'spanish', 'latin', 'malayalam',
              'bhojpuri', 'urdu', 'punjabi', 'gujarati',
@@ -20,9 +39,25 @@ ALBUM = r"(?P<album>([\w\s]+))"
 PLIST = r"(?P<plist>([\w\s]+))"
 LANG = r"(\-[l]:(?P<lang>\w+){1,})?"
 NUM = r"(\-[n]:(?P<num>\d{1,}))?"
-BITRATE = r"(\-[b]:(?P<bitrate>(160|320)))?"
+BITRATE = r"(\-[b]:(?P<bitrate>(96|160|320)))?"
 RSONGS = r"(\-[r]:(?P<rsongs>\d{1,2}))?"
 
 SONG_PATTERN = SONG+SPACE+LANG+SPACE+NUM+SPACE+BITRATE+SPACE+RSONGS
 ALBUM_PATTERN = ALBUM+SPACE+LANG+SPACE+NUM
 PLIST_PATTERN = PLIST+SPACE+LANG+SPACE+NUM
+
+# Local data directory for caches & library db.
+APP_DIR = os.path.join(os.path.expanduser('~'), '.rkstreamer')
+
+# Bytes of the next song's stream fetched ahead of playback (0 - disabled).
+PREFETCH_BYTES = 256 * 1024
+
+# Track transitions - None: VLC media list player, 0: gapless, > 0: crossfade secs.
+CROSSFADE = env_number('RKSTREAMER_CROSSFADE', float)
+
+# Disk cache of played songs, streamed through a loopback proxy (0 - disabled).
+AUDIO_CACHE_BYTES = env_number('RKSTREAMER_AUDIO_CACHE_MB', int, 512) * 1024 * 1024
+
+# Tracing of the hot paths - '1': in-process stats (REPL '-t'), else a JSON lines file to export to.
+TRACE = (os.environ['RKSTREAMER_TRACE']
+         if os.environ.get('RKSTREAMER_TRACE', '0') not in ('', '0') else None)
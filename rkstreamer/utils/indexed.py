@@ -0,0 +1,180 @@
+"""Indexed list - ordered collection with hash lookup & order statistics"""
+
+from typing import Callable, Hashable, Iterator, Optional
+
+_EMPTY = object()  # slot of a removed item.
+
+
+class FenwickTree():
+    """Binary indexed tree over 0/1 counts - prefix sums & k-th lookup in O(log n)"""
+
+    def __init__(self, size: int = 0) -> None:
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    def add(self, pos: int, delta: int) -> None:
+        """Adds delta at 0 based position"""
+        pos += 1
+        while pos <= self.size:
+            self.tree[pos] += delta
+            pos += pos & -pos
+
+    def prefix(self, pos: int) -> int:
+        """Sum of positions [0, pos)"""
+        total = 0
+        while pos > 0:
+            total += self.tree[pos]
+            pos -= pos & -pos
+        return total
+
+    def find(self, k: int) -> int:
+        """0 based position of the k-th (1 based) set entry"""
+        pos, step = 0, 1 << self.size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] < k:
+                pos = nxt
+                k -= self.tree[nxt]
+            step >>= 1
+        return pos
+
+    @classmethod
+    def build(cls, values: list, size: int) -> 'FenwickTree':
+        """Builds the tree of the given size from 0/1 values in O(n)"""
+        tree = cls(size)
+        tree.tree[1:len(values) + 1] = values
+        for pos in range(1, size + 1):
+            parent = pos + (pos & -pos)
+            if parent <= size:
+                tree.tree[parent] += tree.tree[pos]
+        return tree
+
+
+class IndexedList():
+    """Append-only ordered list of unique items (by key).
+
+    Items are kept in slots; a removed item leaves an empty slot that is
+    compacted away once they outnumber the items. A Fenwick tree over the
+    occupied slots gives the rank of an item & the item at a rank, and a second
+    one over 'marked' items gives the next marked item - O(log n)."""
+
+    def __init__(self, key: Callable[[object], Hashable]) -> None:
+        self.key = key
+        self.clear()
+
+    def clear(self) -> None:
+        """Removes all items"""
+        self._slots = []
+        self._slot_of = {}
+        self._marked = set()
+        self._items = FenwickTree(8)
+        self._marks = FenwickTree(8)
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __iter__(self) -> Iterator:
+        return (item for item in self._slots if item is not _EMPTY)
+
+    def __contains__(self, item) -> bool:
+        return self.key(item) in self._slot_of
+
+    def get(self, key: Hashable):
+        """Returns the item with the key, None if not present"""
+        slot = self._slot_of.get(key)
+        return None if slot is None else self._slots[slot]
+
+    def append(self, item) -> bool:
+        """Appends the item, False if an item with its key is present"""
+        key = self.key(item)
+        if key in self._slot_of:
+            return False
+        if len(self._slots) == self._items.size:
+            self._rebuild(max(8, 2 * len(self._slot_of)))
+        self._slot_of[key] = len(self._slots)
+        self._items.add(len(self._slots), 1)
+        self._slots.append(item)
+        return True
+
+    def remove(self, item) -> bool:
+        """Removes the item, False if not present"""
+        key = self.key(item)
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return False
+        self.mark(item, False, slot)
+        self._slots[slot] = _EMPTY
+        self._items.add(slot, -1)
+        if len(self._slots) > 32 and len(self._slots) > 2 * len(self._slot_of):
+            self._rebuild(max(8, 2 * len(self._slot_of)))
+        return True
+
+    def replace(self, item, new) -> bool:
+        """Puts new in the item's place (keeping its mark), False if the item isn't
+        present or an item with new's key is"""
+        key, new_key = self.key(item), self.key(new)
+        slot = self._slot_of.get(key)
+        if slot is None or new_key in self._slot_of:
+            return False
+        del self._slot_of[key]
+        self._slot_of[new_key] = slot
+        self._slots[slot] = new
+        if key in self._marked:
+            self._marked.discard(key)
+            self._marked.add(new_key)
+        return True
+
+    def index(self, item) -> int:
+        """0 based rank of the item"""
+        return self._items.prefix(self._slot_of[self.key(item)])
+
+    def __getitem__(self, rank: int):
+        """Item at the 0 based rank"""
+        if not 0 <= rank < len(self._slot_of):
+            raise IndexError(rank)
+        return self._slots[self._items.find(rank + 1)]
+
+    def mark(self, item, marked: bool = True, slot: Optional[int] = None) -> None:
+        """Sets/clears the mark of the item"""
+        key = self.key(item)
+        if slot is None:
+            slot = self._slot_of[key]
+        if marked and key not in self._marked:
+            self._marked.add(key)
+            self._marks.add(slot, 1)
+        elif not marked and key in self._marked:
+            self._marked.discard(key)
+            self._marks.add(slot, -1)
+
+    def is_marked(self, item) -> bool:
+        """Is the item marked"""
+        return self.key(item) in self._marked
+
+    @property
+    def marked_count(self) -> int:
+        """Number of marked items"""
+        return len(self._marked)
+
+    def next_marked(self, item=None):
+        """First marked item after the item (from the start if None), None if there's none"""
+        before = 0 if item is None else self._marks.prefix(self._slot_of[self.key(item)] + 1)
+        if before >= len(self._marked):
+            return None
+        return self._slots[self._marks.find(before + 1)]
+
+    def marked_before(self, item=None) -> list:
+        """Marked items before the item (all if None), in order"""
+        count = (len(self._marked) if item is None
+                 else self._marks.prefix(self._slot_of[self.key(item)]))
+        return [self._slots[self._marks.find(k)] for k in range(1, count + 1)]
+
+    def _rebuild(self, size: int) -> None:
+        """Compacts the slots & rebuilds the trees with room for size items"""
+        self._slots = [item for item in self._slots if item is not _EMPTY]
+        self._slot_of = {self.key(item): slot for slot, item in enumerate(self._slots)}
+        self._items = FenwickTree.build([1] * len(self._slots), size)
+        self._marks = FenwickTree.build(
+            [int(self.key(item) in self._marked) for item in self._slots], size)
+
+
+__all__ = ['FenwickTree', 'IndexedList']
@@ -0,0 +1,179 @@
+"""
+Utils - Tracing: timing spans & counters on the hot paths
+
+    with tracer.span('network.request', endpoint):
+        ...
+    tracer.count('network.cache', 'hit')
+
+    @traced('queue')
+    def add(self, entity): ...
+
+Disabled (the default) a span is one attribute check & a shared no-op context
+manager. Enabled, spans are aggregated per (name, detail) for summary(), and
+exported one JSON object per line when a path is given.
+"""
+
+import json
+import time
+import atexit
+import threading
+import functools
+import contextlib
+from collections import Counter
+from typing import Callable, Optional
+from rkstreamer.utils.helper import TRACE
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Span():
+    """Timed block - nested spans on a thread record their parent"""
+
+    __slots__ = ('tracer', 'name', 'detail', 'parent', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, detail: Optional[str]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.detail = detail
+        self.parent: Optional[Span] = None
+        self.start = 0.0
+
+    @property
+    def label(self) -> str:
+        return f"{self.name} {self.detail}" if self.detail else self.name
+
+    def __enter__(self) -> 'Span':
+        stack = self.tracer.stack()
+        self.parent = stack[-1] if stack else None
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *args) -> None:
+        elapsed = time.perf_counter() - self.start
+        self.tracer.stack().pop()
+        self.tracer.finish(self, elapsed, exc_type)
+
+
+class Tracer():
+    """Spans & counters - stats per (name, detail): count, total & max secs, errors"""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.path: Optional[str] = None
+        self.stats: dict = {}  # (name, detail) -> [count, total, max, errors]
+        self.counters = Counter()  # (name, detail) -> value
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._file = None
+        self._epoch = time.perf_counter()
+
+    def enable(self, path: Optional[str] = None) -> None:
+        """Starts tracing - spans are also appended to the JSON lines file at path
+        (the last one given, once tracing is restarted)"""
+        path = path or self.path
+        with self._lock:
+            if path and self._file is None:
+                self._file = open(path, 'a', encoding='utf-8')  # pylint: disable=consider-using-with
+                self.path = path
+            self.enabled = True
+
+    def disable(self) -> None:
+        """Stops tracing - the stats are kept, the export file is closed"""
+        with self._lock:
+            self.enabled = False
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def reset(self) -> None:
+        """Clears the stats & counters"""
+        with self._lock:
+            self.stats.clear()
+            self.counters.clear()
+
+    def stack(self) -> list:
+        """Open spans of the calling thread"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name: str, detail: Optional[str] = None):
+        """Context manager timing the block - a no-op while disabled"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, detail)
+
+    def count(self, name: str, detail: Optional[str] = None, value: int = 1) -> None:
+        """Adds value to the counter - a no-op while disabled"""
+        if self.enabled:
+            with self._lock:
+                self.counters[name, detail] += value
+
+    def finish(self, span: Span, elapsed: float, error=None) -> None:
+        """Records the closed span"""
+        with self._lock:
+            stats = self.stats.get((span.name, span.detail))
+            if stats is None:
+                stats = self.stats[span.name, span.detail] = [0, 0.0, 0.0, 0]
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+            stats[3] += error is not None
+            if self._file is not None:
+                record = {'span': span.name, 'detail': span.detail,
+                          'ts': round(span.start - self._epoch, 6),
+                          'ms': round(elapsed * 1000, 3),
+                          'thread': threading.current_thread().name,
+                          'parent': span.parent.label if span.parent else None}
+                if error is not None:
+                    record['error'] = error.__name__
+                self._file.write(json.dumps(record) + '\n')
+
+    def flush(self) -> None:
+        """Writes the buffered spans to the export file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def summary(self) -> str:
+        """Span stats (by total time) & counters"""
+        with self._lock:
+            stats = sorted(self.stats.items(), key=lambda item: item[1][1], reverse=True)
+            counters = sorted(self.counters.items(), key=lambda item: (item[0][0], str(item[0][1])))
+        if not stats and not counters:
+            return 'No spans recorded yet' + ('' if self.enabled else " - '-t on' starts tracing")
+        lines = [f"{'span':<48}{'count':>8}{'total ms':>11}{'mean ms':>10}{'max ms':>10}"]
+        for (name, detail), (count, total, longest, errors) in stats:
+            label = f"{name} {detail}" if detail else name
+            lines.append(f"{label[:47]:<48}{count:>8}{total * 1000:>11.2f}"
+                         f"{total * 1000 / count:>10.3f}{longest * 1000:>10.2f}"
+                         + (f"  ({errors} failed)" if errors else ''))
+        for (name, detail), value in counters:
+            lines.append(f"{name} {detail}: {value}" if detail else f"{name}: {value}")
+        return '\n'.join(lines)
+
+
+def traced(name: str, detail: Optional[str] = None) -> Callable:
+    """Decorator - calls of the function are spans (detail defaults to its qualname)"""
+    def decorator(function: Callable) -> Callable:
+        label = detail or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            with Span(tracer, name, label):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+tracer = Tracer()
+if TRACE:
+    tracer.enable(None if TRACE == '1' else TRACE)
+atexit.register(tracer.flush)
+
+
+__all__ = ['Tracer', 'Span', 'tracer', 'traced']
@@ -30,3 +30,7 @@ class JioSaavnPlaylistView(JioSaavnSongView):
     def add_media_list(self, songs_list: list):
         """Add songs list to player mlist"""
         return self.player.mlplayer_factory.add_medias(songs_list)
+
+    def append_media_list(self, songs_list: list):
+        """Append songs list to the end of player mlist"""
+        return self.player.mlplayer_factory.append_medias(songs_list)
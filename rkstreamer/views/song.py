@@ -2,7 +2,7 @@
 Song view Implementation module
 """
 
-from typing import Callable
+from typing import Callable, Optional
 from rkstreamer.interfaces.views import ISongView
 from rkstreamer.types import (
     SongSearchIndexType,
@@ -63,6 +63,22 @@ class JioSaavnSongView(ISongView):
         """Adding media to media list"""
         return self.media_player.add_media(media.stream_url)
 
+    def replace_media(self, stream_url: str, new_url: str) -> bool:
+        """Swap a player mlist song for the new url, in place"""
+        return self.media_player.replace_media(stream_url, new_url)
+
+    def remaining_time(self) -> Optional[float]:
+        """Remaining time of the playing track in seconds,
+        None if nothing is playing or another mode owns the player"""
+        if not self.media_player.is_active or not self.player.mplayer_controls.is_playing():
+            return None
+        return self.player.mplayer_controls.remaining_time()
+
+    @property
+    def dispatcher(self):
+        """Dispatcher running the player's events - controller timers run on it too"""
+        return self.player.engine.dispatcher
+
     def player_input(self, user_input: str) -> None:
         """Player input"""
         self.player.player_controls(user_input)
@@ -71,6 +87,10 @@ class JioSaavnSongView(ISongView):
         """Updates the callback attribute to mlplayer's monitor state"""
         self.player.monitor_state.callback = callback_fn
 
+    def set_monitor_callback(self, callback_fn: Callable) -> None:
+        """Updates the queue monitor callback run on mlplayer's track events"""
+        self.player.monitor_state.tick_callback = callback_fn
+
     def play(self):
         """Play the media list"""
         return self.player.mlplayer_controls.play()
@@ -78,3 +98,7 @@ class JioSaavnSongView(ISongView):
     def stop(self):
         """stop the media list"""
         return self.player.mlplayer_controls.stop()
+
+    def activate(self):
+        """Loads the view's media list in the shared player"""
+        return self.media_player.activate()
@@ -15,7 +15,9 @@ See the LICENSE file for more information.
 
 from rkstreamer.state import State, StateMachine
 from rkstreamer.services.player import PyVLCPlayer
-from rkstreamer.services.network import PyRequests
+from rkstreamer.services.network import AsyncPyRequests
+from rkstreamer.services.cache import SQLiteResponseCache, StreamUrlCache
+from rkstreamer.services.database import SQLiteDatabaseProvider
 from rkstreamer.models import (
     JioSaavnSongModel,
     JioSaavnAlbumModel,
@@ -33,39 +35,51 @@ from rkstreamer.controllers import (
 )
 
 # proxy = {'https': 'http://127.0.0.1:8888'}
-pyrequests = PyRequests(proxy=None)
+pyrequests = AsyncPyRequests(proxy=None, cache=SQLiteResponseCache())
+library = SQLiteDatabaseProvider()
+stream_urls = StreamUrlCache()
 
-song_controller = JioSaavnSongController(
-    model=JioSaavnSongModel(pyrequests),
-    view=JioSaavnSongView(player=PyVLCPlayer())
-)
 
-album_controller = JioSaavnAlbumController(
-    model=JioSaavnAlbumModel(pyrequests),
-    view=JioSaavnAlbumView(player=PyVLCPlayer())
-)
+def song_controller() -> JioSaavnSongController:
+    """Song mode - built on first use"""
+    return JioSaavnSongController(
+        model=JioSaavnSongModel(pyrequests, database=library, url_cache=stream_urls),
+        view=JioSaavnSongView(player=PyVLCPlayer())
+    )
+
+
+def album_controller() -> JioSaavnAlbumController:
+    """Album mode - built on first use"""
+    return JioSaavnAlbumController(
+        model=JioSaavnAlbumModel(pyrequests, database=library, url_cache=stream_urls),
+        view=JioSaavnAlbumView(player=PyVLCPlayer())
+    )
+
+
+def plist_controller() -> JioSaavnPlaylistController:
+    """Playlist mode - built on first use"""
+    return JioSaavnPlaylistController(
+        model=JioSaavnPlaylistModel(pyrequests, database=library),
+        view=JioSaavnPlaylistView(player=PyVLCPlayer())
+    )
 
-plist_controller = JioSaavnPlaylistController(
-    model=JioSaavnPlaylistModel(pyrequests),
-    view=JioSaavnPlaylistView(player=PyVLCPlayer())
-)
 
 song = State(
     "song",
     "Enter the song name: ",
-    song_controller
+    factory=song_controller
 )
 
 album = State(
     "album",
     "Enter the album name: ",
-    album_controller
+    factory=album_controller
 )
 
 playlist = State(
     "plist",
     "Enter the playlist name: ",
-    plist_controller
+    factory=plist_controller
 )
 
 print(r"""
@@ -0,0 +1,188 @@
+"""Local stand-in for the JioSaavn API & CDN - serves the captured responses in
+tests/fixtures, auth token redirects and small audio files, with latency & error injection.
+
+    with MockJioSaavnServer(latency=0.02, error_rate=0.1) as server:
+        client = RewriteProvider(AsyncPyRequests(), server.hosts)
+"""
+
+import os
+import json
+import time
+import random
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl, quote, unquote
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+AUDIO = bytes(range(256)) * 64  # 16 KB "track"
+
+
+def load_fixture(name: str):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as file:
+        return json.load(file)
+
+
+class MockJioSaavnServer():
+    """api.php calls are answered from the fixtures by `__call`:
+
+    search.getResults / getAlbumResults / getPlaylistResults - search_*.json (n results)
+    webapi.get - album.json, or playlist.json paged by p & n, repeated up to playlist_size songs
+    song.generateAuthToken - auth url on this server, redirected to /cdn/<token>_<bitrate>.mp4
+    webradio.createEntityStation / webradio.getSong - station id & rsongs.json (k songs)
+
+    latency - secs added to every response (or a callable(path) -> secs).
+    error_rate - share of requests answered with error_status, drawn from a seeded random.
+    errors - {__call or path prefix: status} for requests that always fail."""
+
+    def __init__(
+            self,
+            latency=0,
+            error_rate: float = 0,
+            error_status: int = 503,
+            errors: dict = None,
+            playlist_size: int = 500,
+            seed: int = 0) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.errors = errors or {}
+        self.playlist_size = playlist_size
+        self.random = random.Random(seed)
+        self.requests = Counter()  # __call (or path) -> requests served
+        self.fixtures = {name: load_fixture(f"{name}.json") for name in (
+            'search_songs', 'search_albums', 'search_playlists', 'album', 'playlist', 'rsongs')}
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    @property
+    def hosts(self) -> dict:
+        """RewriteProvider hosts - API & CDN sent here"""
+        return {'https://www.jiosaavn.com': self.base_url,
+                'https://aac.saavncdn.com': f"{self.base_url}/cdn",
+                'https://h.saavncdn.com': f"{self.base_url}/cdn"}
+
+    def start(self) -> 'MockJioSaavnServer':
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        server.daemon_threads = True
+        server.mock = self
+        self._server = server
+        threading.Thread(target=server.serve_forever, name='mock-jiosaavn', daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'MockJioSaavnServer':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def delay(self, path: str) -> float:
+        return self.latency(path) if callable(self.latency) else self.latency
+
+    def fail(self, name: str) -> int:
+        """Injected error status for the request, 0 if it's served"""
+        for prefix, status in self.errors.items():
+            if name.startswith(prefix):
+                return status
+        with self._lock:
+            if self.error_rate and self.random.random() < self.error_rate:
+                return self.error_status
+        return 0
+
+    def api(self, params: dict) -> dict:
+        """Response payload of an api.php call"""
+        call = params.get('__call')
+        count = int(params.get('n') or 0)
+        if call == 'search.getResults':
+            return self._results('search_songs', count)
+        if call == 'search.getAlbumResults':
+            return self._results('search_albums', count)
+        if call == 'search.getPlaylistResults':
+            return self._results('search_playlists', count)
+        if call == 'webapi.get' and params.get('type') == 'playlist':
+            return self._playlist_page(int(params.get('p') or 1), count or 50)
+        if call == 'webapi.get':
+            return self.fixtures['album']
+        if call == 'song.generateAuthToken':
+            token = quote(params.get('url', ''), safe='')
+            return {'auth_url': f"{self.base_url}/auth/{token}?bitrate={params.get('bitrate')}"}
+        if call == 'webradio.createEntityStation':
+            return {'stationid': f"station{params.get('entity_id', '')}"}
+        if call == 'webradio.getSong':
+            rsongs = self.fixtures['rsongs']
+            songs = [key for key in rsongs if key != 'stationid'][:int(params.get('k') or 10)]
+            return {'stationid': rsongs['stationid']} | {key: rsongs[key] for key in songs}
+        return {}
+
+    def _results(self, name: str, count: int) -> dict:
+        payload = self.fixtures[name]
+        return payload | {'results': payload['results'][:count or None]}
+
+    def _playlist_page(self, page: int, size: int) -> dict:
+        songs = self.fixtures['playlist']['fullsongs']
+        first = (page - 1) * size
+        return {'fullsongs': [
+            {'song_for_player': f"{songs[number % len(songs)]['song_for_player']} #{number}",
+             'download_url': f"{songs[number % len(songs)]['download_url']}{number:04d}"}
+            for number in range(first, min(first + size, self.playlist_size))]}
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    server: ThreadingHTTPServer
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        mock: MockJioSaavnServer = self.server.mock
+        split = urlsplit(self.path)
+        params = dict(parse_qsl(split.query, keep_blank_values=True))
+        name = params.get('__call') or split.path
+        with mock._lock:  # pylint: disable=protected-access
+            mock.requests[name] += 1
+        delay = mock.delay(self.path)
+        if delay:
+            time.sleep(delay)
+        status = mock.fail(name)
+        if status:
+            self._send(status, b'{}')
+        elif split.path == '/api.php':
+            self._send(200, json.dumps(mock.api(params)).encode())
+        elif split.path.startswith('/auth/'):
+            token = unquote(split.path[len('/auth/'):])
+            self.send_response(302)
+            self.send_header(
+                'Location', f"{mock.base_url}/cdn/{quote(token, safe='')}_{params.get('bitrate')}.mp4")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif split.path.startswith('/cdn/'):
+            self._send(200, AUDIO, 'audio/mp4')
+        else:
+            self._send(404, b'{}')
+
+    def _send(self, status: int, body: bytes, content_type: str = 'application/json'):
+        start, end = 0, len(body) - 1
+        range_header = self.headers.get('Range', '')
+        if status == 200 and range_header.startswith('bytes='):
+            first, _, last = range_header[len('bytes='):].partition('-')
+            start, end = int(first or 0), min(int(last or end), end)
+            status = 206
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(end - start + 1))
+        if status == 206:
+            self.send_header('Content-Range', f"bytes {start}-{end}/{len(body)}")
+        self.end_headers()
+        self.wfile.write(body[start:end + 1])
@@ -0,0 +1,58 @@
+"""Tests: Immutable per call API requests"""
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+from rkstreamer.services.request import Endpoint
+from rkstreamer.services.song import JioSaavnSongProvider
+
+
+class FakeResponse:
+    def __init__(self, payload=None, headers=None):
+        self.payload = payload
+        self.headers = headers or {}
+
+    def json(self):
+        return self.payload
+
+
+class EchoClient:
+    """Auth url echoes the token of the request, the redirect echoes the auth url"""
+
+    def get(self, **kwargs):
+        if 'params' in kwargs:
+            return FakeResponse({'auth_url': f"https://auth/{kwargs['params']['url']}"})
+        return FakeResponse(headers={'Location': kwargs['url'].replace('auth', 'cdn')})
+
+
+def test_endpoint_requests_dont_share_state():
+    endpoint = Endpoint('webapi.get', type='album')
+    first, second = endpoint.request(token='a'), endpoint.request(token='b')
+    assert first.kwargs['params'] == {'token': 'a'} and second.kwargs['params'] == {'token': 'b'}
+    base = dict(parse_qsl(urlsplit(endpoint.url).query))
+    assert base['__call'] == 'webapi.get' and base['type'] == 'album' and base['_format'] == 'json'
+
+
+def test_query_encodes_search_string():
+    request = Endpoint('search.getResults', p=1).query(q='love & rain', n=3)
+    query = dict(parse_qsl(urlsplit(request.url).query))
+    assert query['q'] == 'love & rain' and query['n'] == '3' and 'params' not in request.kwargs
+
+
+def test_provider_safe_from_thread_pool():
+    provider = JioSaavnSongProvider(EchoClient())
+    tokens = [f"token{count}" for count in range(200)]
+    with ThreadPoolExecutor(16) as pool:
+        urls = list(pool.map(provider.select_song, tokens))
+    assert urls == [f"https://cdn/{token}" for token in tokens]
+
+
+def test_bitrate_cap_is_per_call():
+    class BitrateClient(EchoClient):
+        def get(self, **kwargs):
+            if 'params' in kwargs:
+                return FakeResponse({'auth_url': f"https://auth/{kwargs['params']['bitrate']}"})
+            return super().get(**kwargs)
+
+    provider = JioSaavnSongProvider(BitrateClient())
+    assert provider.select_song('token', bitrate='96') == 'https://cdn/96'
+    assert provider.select_song('token') != 'https://cdn/96'
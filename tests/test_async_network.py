@@ -0,0 +1,74 @@
+"""Tests: Async network provider - concurrent batch requests"""
+
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from rkstreamer.services.network import AsyncPyRequests, PyRequests
+from rkstreamer.services.exceptions import NetworkError
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Responds after 200ms, 500 for '/fail'"""
+
+    hits = []
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        SlowHandler.hits.append(self.path)
+        time.sleep(0.2)
+        self.send_response(500 if self.path == '/fail' else 200)
+        self.end_headers()
+        self.wfile.write(f'{{"path": "{self.path}"}}'.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+server = ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+BASE = f"http://127.0.0.1:{server.server_port}"
+
+
+def test_gather_concurrent_in_order():
+    client = AsyncPyRequests(max_workers=8)
+    start = time.perf_counter()
+    responses = client.gather([{'url': f"{BASE}/{count}"} for count in range(8)])
+    assert time.perf_counter() - start < 1
+    assert [response.json()['path'] for response in responses] == [f"/{count}" for count in range(8)]
+
+
+def test_gather_failures_in_place():
+    client = AsyncPyRequests()
+    responses = client.gather([{'url': f"{BASE}/ok"}, {'url': f"{BASE}/fail"}],
+                              return_exceptions=True)
+    assert responses[0].json()['path'] == '/ok'
+    assert isinstance(responses[1], NetworkError)
+
+
+def test_identical_requests_in_flight_share_one_response():
+    client = AsyncPyRequests()
+    SlowHandler.hits.clear()
+    results = []
+    callers = [threading.Thread(target=lambda: results.append(
+        client.get(url=f"{BASE}/api.php", params={'q': 'Song', 'n': 3})))
+               for _ in range(4)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+    assert SlowHandler.hits == ['/api.php?q=Song&n=3']
+    assert len({id(response) for response in results}) == 1
+    assert client.flights.shared == 3
+    client.get(url=f"{BASE}/api.php", params={'q': 'Song', 'n': 3})  # done - requested again.
+    assert len(SlowHandler.hits) == 2
+
+
+def test_sync_client_shares_in_flight_requests():
+    client = PyRequests()
+    SlowHandler.hits.clear()
+    callers = [threading.Thread(target=client.get, kwargs={'url': f"{BASE}/same"})
+               for _ in range(3)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+    assert SlowHandler.hits == ['/same']
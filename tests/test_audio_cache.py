@@ -0,0 +1,125 @@
+"""Tests: Disk audio cache & loopback proxy"""
+
+import re
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import requests
+from rkstreamer.services.audiocache import AudioCache, AudioProxy, cache_key
+
+AUDIO = bytes(range(256)) * 1024
+
+
+class CDNHandler(BaseHTTPRequestHandler):
+    """Serves AUDIO for any path, counts the requests"""
+
+    requests_served = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        CDNHandler.requests_served += 1
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(AUDIO) - 1
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end}/{len(AUDIO)}")
+        else:
+            start, end = 0, len(AUDIO) - 1
+            self.send_response(200)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(AUDIO[start:end + 1])
+
+
+def test_cache_key_song_and_bitrate():
+    url = 'https://aac.saavncdn.com/123/abcdef_320.mp4?token=1'
+    assert cache_key(url) == 'abcdef_320'
+    assert cache_key(url, 'Xy9-Ab') == 'Xy9-Ab_320'
+    assert cache_key(url.replace('_320', '_96')) != cache_key(url)
+
+
+def test_lru_eviction(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=250)
+    for key in ('a', 'b', 'c'):
+        writer = cache.writer(key)
+        writer.write(b'x' * 100)
+        writer.commit()
+        if key == 'b':
+            assert cache.get('a')  # a is now the most recent.
+    assert cache.get('b') is None
+    assert cache.get('a') and cache.get('c')
+    assert cache.size == 200
+    assert AudioCache(str(tmp_path), max_bytes=250).get('a')  # index rebuilt from disk.
+
+
+def test_incomplete_stream_is_discarded(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    writer = cache.writer('a')
+    writer.write(b'partial')
+    writer.discard()
+    assert cache.get('a') is None and not list(tmp_path.iterdir())
+
+
+def test_proxy_tees_then_replays_offline(tmp_path):
+    CDNHandler.requests_served = 0
+    cdn = ThreadingHTTPServer(('127.0.0.1', 0), CDNHandler)
+    threading.Thread(target=cdn.serve_forever, daemon=True).start()
+    proxy = AudioProxy(AudioCache(str(tmp_path)))
+    stream_url = f"http://127.0.0.1:{cdn.server_port}/123/abcdef_160.mp4"
+    try:
+        local_url = proxy.local_url(stream_url)
+        assert proxy.origin(local_url) == stream_url
+        assert requests.get(local_url, timeout=5).content == AUDIO
+        cdn.shutdown()
+        cdn.server_close()
+
+        assert requests.get(local_url, timeout=5).content == AUDIO
+        ranged = requests.get(local_url, headers={'Range': 'bytes=100-199'}, timeout=5)
+        assert ranged.status_code == 206 and ranged.content == AUDIO[100:200]
+        assert CDNHandler.requests_served == 1
+        assert (proxy.hits, proxy.misses) == (2, 1)
+    finally:
+        proxy.close()
+
+
+def test_proxy_caches_open_ended_range_from_start(tmp_path):
+    CDNHandler.requests_served = 0
+    cdn = ThreadingHTTPServer(('127.0.0.1', 0), CDNHandler)
+    threading.Thread(target=cdn.serve_forever, daemon=True).start()
+    proxy = AudioProxy(AudioCache(str(tmp_path)))
+    stream_url = f"http://127.0.0.1:{cdn.server_port}/123/abcdef_160.mp4"
+    try:
+        local_url = proxy.local_url(stream_url)
+        seek = requests.get(local_url, headers={'Range': 'bytes=100-'}, timeout=5)
+        assert seek.status_code == 206 and seek.content == AUDIO[100:]
+        assert proxy.cache.get('abcdef_160') is None  # not the whole file.
+        first = requests.get(local_url, headers={'Range': 'bytes=0-'}, timeout=5)
+        assert first.status_code == 206 and first.content == AUDIO
+        cdn.shutdown()
+        cdn.server_close()
+
+        replay = requests.get(local_url, headers={'Range': 'bytes=0-'}, timeout=5)
+        assert replay.status_code == 206 and replay.content == AUDIO
+        assert CDNHandler.requests_served == 2
+    finally:
+        proxy.close()
+
+
+def test_proxy_urls_are_per_stream_url_and_released(tmp_path):
+    proxy = AudioProxy(AudioCache(str(tmp_path)))
+    first = "https://aac.saavncdn.com/123/abcdef_160.mp4?Expires=1"
+    resigned = "https://aac.saavncdn.com/123/abcdef_160.mp4?Expires=2"
+    try:
+        old_url, new_url = proxy.local_url(first), proxy.local_url(resigned)
+        assert old_url != new_url  # same cache entry, own loopback urls.
+        assert (proxy.origin(old_url), proxy.origin(new_url)) == (first, resigned)
+        proxy.local_url(first)
+        proxy.release(first)
+        assert proxy.origin(old_url) == first  # still in another media list.
+        proxy.release(first)
+        proxy.release(resigned)
+        assert proxy.origin(old_url) == old_url and proxy.upstream('x') is None
+    finally:
+        proxy.close()
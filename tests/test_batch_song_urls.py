@@ -0,0 +1,80 @@
+"""Tests: Batch stream url resolution"""
+
+from types import SimpleNamespace
+import pytest
+from rkstreamer.controllers.queue import ReSongQueueAddCommand
+from rkstreamer.models.song import JioSaavnSongModel
+from rkstreamer.models.data import Song, SongSearch
+from rkstreamer.services.cache import StreamUrlCache
+from rkstreamer.models.exceptions import GetMediaError, NetworkError
+
+
+class FakeResponse:
+    """Auth token / CDN redirect response"""
+
+    def __init__(self, payload=None, headers=None):
+        self.payload = payload
+        self.headers = headers or {}
+
+    def json(self):
+        return self.payload
+
+
+class FakeClient:
+    """Resolves every token except 'bad'"""
+
+    def __init__(self):
+        self.batches = []
+
+    def gather(self, requests_kwargs, return_exceptions=False):
+        self.batches.append(len(requests_kwargs))
+        responses = []
+        for kwargs in requests_kwargs:
+            if 'params' in kwargs:
+                token = kwargs['params']['url']
+                responses.append(NetworkError('500') if token == 'bad'
+                                 else FakeResponse({'auth_url': f"https://auth/{token}"}))
+            else:
+                token = kwargs['url'].rsplit('/', 1)[-1]
+                responses.append(FakeResponse(headers={'Location': f"https://cdn/{token}.mp4"}))
+        return responses
+
+
+def test_select_many_keeps_order_and_reports_failures():
+    client = FakeClient()
+    model = JioSaavnSongModel(client)
+    model.indexed_search_songs = {
+        1: SongSearch(name='one', id='1', token='t1'),
+        2: SongSearch(name='two', id='2', token='bad'),
+        3: SongSearch(name='three', id='3', token='t3')}
+    songs, failed = model.select_many(['3', '2', '1'])
+    assert [song.stream_url for song in songs] == ['https://cdn/t3.mp4', 'https://cdn/t1.mp4']
+    assert all(song.status == 'Loaded' for song in songs)
+    assert [song.name for song in failed] == ['two']
+    assert client.batches == [3, 2]  # one auth batch, one redirect batch.
+
+
+def test_batch_uses_stream_url_cache():
+    client = FakeClient()
+    model = JioSaavnSongModel(client, url_cache=StreamUrlCache())
+    assert model.get_song_urls(['t1', 't2']) == ['https://cdn/t1.mp4', 'https://cdn/t2.mp4']
+    assert model.get_song_urls(['t2', 't3'])[0] == 'https://cdn/t2.mp4'
+    assert client.batches == [2, 2, 1, 1]  # only 't3' requested again.
+
+
+def test_rqueue_add_is_all_or_none_and_keeps_failed_rsongs():
+    model = JioSaavnSongModel(FakeClient())
+    model.queue.update_rqueue({1: Song(name='one', id='1', token='t1'),
+                               2: Song(name='two', id='2', token='bad'),
+                               3: Song(name='three', id='3', token='t3')})
+    queued = []
+    controller = SimpleNamespace(
+        model=model, view=None,
+        uow_add_songs_queue_batch=lambda songs, failed: queued.extend(songs))
+    command = ReSongQueueAddCommand(controller)
+    with pytest.raises(GetMediaError):
+        command.execute(['1', '99'])
+    assert list(model.queue.get_rsongs) == [1, 2, 3] and not queued
+    command.execute(['3', '2', '3', '1'])
+    assert [song.name for song in queued] == ['three', 'one']
+    assert [song.name for song in model.queue.get_rsongs.values()] == ['two']
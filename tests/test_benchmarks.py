@@ -0,0 +1,22 @@
+"""Tests: Benchmark harness & the end to end scenarios"""
+
+from benchmarks.harness import percentile, measure, summarize
+from benchmarks.bench_flows import SCENARIOS, http_client
+from tests.mock_server import MockJioSaavnServer
+
+
+def test_percentile_nearest_rank():
+    samples = [float(value) for value in range(1, 101)]
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 99) == 99
+    assert percentile([3.0], 90) == 3.0
+    stats = summarize([0.001, 0.002, 0.003])
+    assert stats['p50'] == 2 and stats['rounds'] == 3
+
+
+def test_scenarios_run_against_the_server():
+    with MockJioSaavnServer(playlist_size=500) as server:
+        client = http_client(server)
+        for setup, run in SCENARIOS.values():
+            assert len(measure(run, rounds=1, setup=lambda setup=setup: setup(client), warmup=0)) == 1
+        assert server.requests['webapi.get'] >= 10
@@ -0,0 +1,88 @@
+"""Tests: Adaptive bitrate policy"""
+
+import json
+from rkstreamer.controllers.playlist import JioSaavnPlaylistController
+from rkstreamer.models.playlist import JioSaavnPlaylistModel
+from rkstreamer.models.data import PlaylistSearch
+from rkstreamer.services.bitrate import BitratePolicy, StallMonitor, with_bitrate
+from rkstreamer.services.headless import HeadlessPlayer
+from rkstreamer.services.playlist import JioSaavnPlaylistProvider
+from rkstreamer.services import playlist
+from rkstreamer.views.playlist import JioSaavnPlaylistView
+
+
+def test_throughput_picks_bitrate():
+    policy = BitratePolicy()
+    assert policy.bitrate() == 320  # unmeasured - best quality.
+    policy.record_transfer(1024 * 1024, 20)  # ~420 kbps
+    assert policy.bitrate() == 160
+    policy.record_transfer(1024, 10)  # too small to be a sample.
+    assert policy.bitrate() == 160
+    assert policy.bitrate(requested=96) == 96
+    assert BitratePolicy().bitrate(start=160) == 160
+
+
+def test_stalls_step_down_and_recover():
+    policy = BitratePolicy()
+    monitor = StallMonitor(policy)
+    monitor.buffering(10)  # not playing yet.
+    monitor.started()
+    monitor.buffering(50)  # first fill.
+    monitor.buffering(100)
+    assert policy.stalls == 0
+    monitor.buffering(20)
+    monitor.buffering(40)
+    assert policy.stalls == 1 and policy.bitrate() == 160
+    monitor.buffering(100)
+    monitor.buffering(0)
+    assert policy.bitrate() == 96
+    policy._last_stall -= policy.RECOVER  # pylint: disable=protected-access
+    assert policy.bitrate() == 160
+
+
+def test_playlist_url_follows_policy(monkeypatch):
+    policy = BitratePolicy()
+    monkeypatch.setattr(playlist, 'policy', policy)
+    provider = JioSaavnPlaylistProvider(client=None)
+    url = 'https://h.saavncdn.com/123/abcdef.mp3'
+    assert provider._change_plist_song_url(url) == 'https://aac.saavncdn.com/123/abcdef_160.mp4'
+    policy.record_stall()
+    policy.record_stall()
+    assert provider._change_plist_song_url(url).endswith('_96.mp4')
+    assert with_bitrate('https://aac.saavncdn.com/1/a_96.mp4?x=1', 320) == \
+        'https://aac.saavncdn.com/1/a_320.mp4?x=1'
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.content = json.dumps(payload).encode()
+
+
+class PlaylistClient:
+    """One page playlist of 3 songs"""
+
+    def get(self, **kwargs):
+        return FakeResponse({'fullsongs': [
+            {'song_for_player': f"song {number}",
+             'download_url': f"https://h.saavncdn.com/{number}/track{number}.mp3"}
+            for number in range(3)]})
+
+
+def test_next_playlist_track_bitrate_picked_as_it_comes_up(monkeypatch):
+    policy = BitratePolicy()
+    monkeypatch.setattr(playlist, 'policy', policy)
+    player = HeadlessPlayer()
+    model = JioSaavnPlaylistModel(PlaylistClient())
+    model.indexed_playlists = {1: PlaylistSearch(name='mix', token='tok', song_count='3')}
+    controller = JioSaavnPlaylistController(model, JioSaavnPlaylistView(player=player))
+    controller.uow_play_songs(model.select(1))
+    policy.record_stall()
+    policy.record_stall()
+    player.clock.run(secs=1)  # first track starts - the next one is re-picked.
+    songs = list(model.queue.get_queue.songs)
+    assert [song.stream_url[-7:] for song in songs] == ['160.mp4', '_96.mp4', '160.mp4']
+    media = player.mlplayer_factory.media_list
+    assert [media.item_at_index(index).get_mrl() for index in range(3)] == \
+        [song.stream_url for song in songs]
+    player.clock.run(secs=240)
+    assert model.queue.get_next_song().stream_url.endswith('_96.mp4')
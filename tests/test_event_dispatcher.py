@@ -0,0 +1,19 @@
+"""Tests: Event dispatcher"""
+
+import threading
+from rkstreamer.services.events import EventDispatcher
+
+
+def test_dispatch_schedule_cancel():
+    dispatcher = EventDispatcher()
+    calls = []
+    done = threading.Event()
+    dispatcher.schedule(0.05, lambda: (calls.append('late'), done.set()))
+    cancelled = dispatcher.schedule(0.01, calls.append, 'cancelled')
+    dispatcher.cancel(cancelled)
+    dispatcher.dispatch(lambda: 1 / 0)  # failing callback doesn't stop the worker.
+    dispatcher.dispatch(calls.append, 'now')
+    assert done.wait(1)
+    assert calls == ['now', 'late']
+    assert len([thread for thread in threading.enumerate()
+                if thread.name == dispatcher.name]) == 1
@@ -0,0 +1,154 @@
+"""Tests: Gapless & crossfade transitions on two alternating decks"""
+
+import pytest
+from vlc import State, EventType
+from rkstreamer.services.gapless import CrossfadeListPlayer, PyVLCGaplessEngine
+from rkstreamer.services.headless import HeadlessInstance
+from rkstreamer.services.player import PyVLCPlayerInstance
+
+
+class FakeScheduler:
+    """Event dispatcher - tasks are run by the test"""
+
+    def __init__(self):
+        self.tasks = []
+
+    def schedule(self, delay, callback, *args):
+        self.tasks.append(delay)
+        return [delay]
+
+    def dispatch(self, callback, *args):
+        pass
+
+    @staticmethod
+    def cancel(task):
+        pass
+
+
+class FakeEvents:
+    def event_attach(self, event_type, callback, *args):
+        pass
+
+
+class FakeDeck:
+    """Media player with a settable clock (ms)"""
+
+    def __init__(self):
+        self.media, self.state, self.time, self.volume, self.muted = None, State.NothingSpecial, 0, 100, False
+
+    def event_manager(self):
+        return FakeEvents()
+
+    def set_media(self, media):
+        self.media, self.time = media, 0
+
+    def get_media(self):
+        return self.media
+
+    def play(self):
+        self.state = State.Playing
+
+    def set_pause(self, paused):
+        self.state = State.Paused if paused else State.Playing
+
+    def pause(self):
+        self.set_pause(self.state == State.Playing)
+
+    def stop(self):
+        self.state = State.Stopped
+
+    def get_state(self):
+        return self.state
+
+    def get_length(self):
+        return 200000
+
+    def get_time(self):
+        return self.time
+
+    def set_time(self, time):
+        self.time = time
+
+    def audio_get_volume(self):
+        return self.volume
+
+    def audio_set_volume(self, volume):
+        self.volume = volume
+
+    def audio_set_mute(self, muted):
+        self.muted = muted
+
+
+class FakeMediaList(list):
+    def lock(self):
+        pass
+
+    def unlock(self):
+        pass
+
+    def count(self):
+        return len(self)
+
+    def item_at_index(self, index):
+        return self[index]
+
+    def index_of_item(self, media):
+        return self.index(media) if media in self else -1
+
+
+class FakeInstance:
+    def media_player_new(self):
+        return FakeDeck()
+
+
+def make_player(crossfade):
+    player = CrossfadeListPlayer(FakeInstance(), crossfade=crossfade, dispatcher=FakeScheduler())
+    emitted = []
+    for event_type in (EventType.MediaListPlayerNextItemSet, EventType.MediaPlayerPlaying):
+        player.event_manager().event_attach(event_type, lambda _, kind: emitted.append(kind), event_type)
+    player.set_media_list(FakeMediaList(['one', 'two']))
+    assert player.play_item_at_index(0) == 0
+    return player, emitted
+
+
+def test_next_track_buffered_then_gapless_handoff():
+    player, emitted = make_player(0)
+    first, second = player.deck, player.idle
+    first.time = 190000  # 10 secs left - within PRELOAD.
+    player._watch()
+    assert second.media == 'two' and second.muted
+    player._watch()
+    assert second.state == State.Paused  # opened, buffered & held.
+    first.time = 199900
+    player._watch()
+    assert player.deck is second and second.state == State.Playing and not second.muted
+    assert first.state == State.Stopped
+    assert emitted[-2:] == [EventType.MediaListPlayerNextItemSet, EventType.MediaPlayerPlaying]
+
+
+def test_crossfade_ramps_volumes():
+    player, _ = make_player(4)
+    first, second = player.deck, player.idle
+    first.time = 190000
+    player._watch()
+    player._watch()
+    first.time = 196000  # crossfade starts - 4 secs left.
+    player._watch()
+    first.time = 198000
+    player._watch()
+    assert (first.volume, second.volume) == (50, 50)
+    first.time = 200000
+    player._watch()
+    assert player.deck is second and second.volume == 100
+
+
+def test_handoffs_run_on_the_engine_dispatcher():
+    instance = HeadlessInstance(length=60.0)
+    engine = PyVLCGaplessEngine(instance, crossfade=4, dispatcher=instance.clock)
+    media_list = PyVLCPlayerInstance(engine)
+    media_list.add_medias([f"https://cdn/{number}.mp4" for number in range(3)])
+    media_list.activate()
+    engine.player.play_item_at_index(0)
+    instance.clock.run()
+    assert engine.player.deck.get_media().get_mrl() == 'https://cdn/2.mp4'
+    assert instance.clock.now == pytest.approx(180 - 2 * 4, abs=0.5)  # two crossfades.
@@ -0,0 +1,93 @@
+"""Tests: Headless player backend on a simulated clock"""
+
+import time
+from vlc import State, EventType
+from rkstreamer.controllers.song import JioSaavnSongController
+from rkstreamer.models.song import JioSaavnSongModel, PLAYED
+from rkstreamer.models.data import Song
+from rkstreamer.models.exceptions import NetworkError
+from rkstreamer.services.headless import SimulatedClock, HeadlessInstance, HeadlessPlayer
+from rkstreamer.views import JioSaavnSongView
+
+
+class FakeResponse:
+    content = b'\0' * 16
+
+
+class FakeClient:
+    """Stream warm ups succeed, API calls (recommendations) fail"""
+
+    def __init__(self):
+        self.warmed = []
+
+    def get(self, **kwargs):
+        if 'Range' not in (kwargs.get('headers') or {}):
+            raise NetworkError('offline')
+        self.warmed.append(kwargs['url'])
+        return FakeResponse()
+
+    def gather(self, requests_kwargs, return_exceptions=False):
+        return [NetworkError('offline') for _ in requests_kwargs]
+
+
+def test_clock_runs_tasks_in_due_order():
+    clock, calls = SimulatedClock(), []
+    clock.schedule(5, calls.append, 'late')
+    cancelled = clock.schedule(1, calls.append, 'cancelled')
+    clock.dispatch(lambda: clock.schedule(2, calls.append, 'nested'))
+    clock.cancel(cancelled)
+    assert clock.run(secs=3) == 2 and calls == ['nested'] and clock.now == 3
+    assert clock.run() == 1 and calls == ['nested', 'late'] and clock.now == 5
+
+
+def test_media_player_states_and_events():
+    instance = HeadlessInstance(length=lambda mrl: 100.0)
+    list_player = instance.media_list_player_new()
+    player, events = list_player.get_media_player(), []
+    for event_type in (EventType.MediaPlayerPlaying, EventType.MediaPlayerPaused,
+                       EventType.MediaPlayerEndReached, EventType.MediaPlayerBuffering):
+        player.event_manager().event_attach(
+            event_type, lambda event, name: events.append((name, instance.clock.now)), event_type)
+    media_list = instance.media_list_new()
+    media_list.add_media('https://cdn/1.mp4')
+    media_list.add_media('https://cdn/2.mp4')
+    list_player.set_media_list(media_list)
+
+    assert list_player.play() == 0 and player.get_state() == State.Playing
+    assert not events  # delivered by the clock, after the call.
+    instance.clock.run(secs=40)
+    assert player.get_time() == 40000 and player.get_length() == 100000
+    player.pause()
+    instance.clock.run(secs=60)
+    assert player.get_state() == State.Paused and player.get_time() == 40000
+    player.set_time(90000)
+    player.pause()  # toggles back to playing.
+    instance.clock.run(secs=10)
+    assert player.get_media().get_mrl() == 'https://cdn/2.mp4'  # autoplayed the next item.
+    instance.clock.run()
+    assert player.get_state() == State.Ended and instance.clock.now == 210
+    assert [name for name, _ in events].count(EventType.MediaPlayerEndReached) == 2
+    assert (EventType.MediaPlayerPaused, 40) in events
+    assert list_player.next() == -1 and list_player.previous() == 0
+
+
+def test_autoplay_stress_through_song_view():
+    player = HeadlessPlayer()
+    client = FakeClient()
+    controller = JioSaavnSongController(
+        model=JioSaavnSongModel(client), view=JioSaavnSongView(player=player))
+    songs = [Song(name=f"song {number}", id=str(number), status='Loaded',
+                  stream_url=f"https://cdn/{number}.mp4") for number in range(2000)]
+    controller.uow_play_songs_remove_loaded(songs[0])
+    for song in songs[1:]:
+        controller.uow_add_songs_queue(song)
+
+    started = time.perf_counter()
+    player.clock.run()
+    elapsed = time.perf_counter() - started
+    queue = controller.model.queue
+    assert all(song.status == PLAYED for song in queue.get_queue.songs)
+    assert len(client.warmed) == 1999 and client.warmed[-1] == 'https://cdn/1999.mp4'
+    assert player.engine.instance.emitted[EventType.MediaPlayerEndReached] == 2000
+    assert player.clock.now == 2000 * 240
+    assert 2000 / elapsed > 1000  # tracks per second.
@@ -0,0 +1,15 @@
+"""Tests: Settings read from the environment"""
+
+from rkstreamer.utils.helper import env_number
+
+
+def test_env_number(monkeypatch, capsys):
+    monkeypatch.delenv('RKSTREAMER_CROSSFADE', raising=False)
+    assert env_number('RKSTREAMER_CROSSFADE', float) is None
+    monkeypatch.setenv('RKSTREAMER_CROSSFADE', '2.5')
+    assert env_number('RKSTREAMER_CROSSFADE', float) == 2.5
+    assert not capsys.readouterr().out
+    for value in ('2s', '-1'):
+        monkeypatch.setenv('RKSTREAMER_AUDIO_CACHE_MB', value)
+        assert env_number('RKSTREAMER_AUDIO_CACHE_MB', int, 512) == 512
+        assert 'RKSTREAMER_AUDIO_CACHE_MB' in capsys.readouterr().out
@@ -0,0 +1,19 @@
+"""Tests: States are built on first use"""
+
+from rkstreamer.state import State, StateMachine
+
+built = []
+
+
+def factory():
+    built.append('album')
+    return object()
+
+
+def test_state_built_on_first_use():
+    streamer = StateMachine()
+    streamer.add_state({'album': State('album', 'Enter the album name: ', factory=factory)})
+    assert not built
+    controller = streamer.states['album'].controller
+    assert streamer.states['album'].controller is controller
+    assert built == ['album']
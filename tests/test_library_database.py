@@ -0,0 +1,29 @@
+"""Tests: Local library database"""
+
+from rkstreamer.services.database import SQLiteDatabaseProvider
+from rkstreamer.models.album import JioSaavnAlbumModel
+
+ALBUM = {'id': 'qKErkhPpdTE_', 'name': 'Madrasapattinam', 'artists': 'G.V. Prakash Kumar',
+         'songs': [{'id': 'elrx2wXJ', 'name': 'Pookkal Pookkum', 'album_id': 'qKErkhPpdTE_',
+                    'token': 'enc-1', 'duration': 355},
+                   {'id': 'abcd1234', 'name': 'Vaama Duraiyamma', 'album_id': 'qKErkhPpdTE_',
+                    'token': 'enc-2', 'duration': 290}]}
+
+
+def test_write_read_album():
+    library = SQLiteDatabaseProvider(path=':memory:')
+    library.write('albums', [ALBUM])
+    assert library.check('albums', 'qKErkhPpdTE_')
+    album = library.read('albums', 'qKErkhPpdTE_')
+    assert [song['id'] for song in album['songs']] == ['elrx2wXJ', 'abcd1234']
+    assert library.read('songs', 'abcd1234')['token'] == 'enc-2'
+    library.write('history', [{'id': 'elrx2wXJ', 'name': 'Pookkal Pookkum'}])
+    assert library.read('history')[0]['song_id'] == 'elrx2wXJ'
+
+
+def test_model_resolves_album_locally():
+    library = SQLiteDatabaseProvider(path=':memory:')
+    library.write('albums', [ALBUM])
+    model = JioSaavnAlbumModel(network_provider=None, database=library)
+    album = model.select_album_using_id('qKErkhPpdTE_')
+    assert album.songs[1].name == 'Pookkal Pookkum'
@@ -0,0 +1,43 @@
+"""Tests: Columnar response parser"""
+
+import json
+from rkstreamer.models.data import Song
+from rkstreamer.services.song import JioSaavnSongProvider
+from rkstreamer.services.parser import parse_songs
+
+
+def song_item(count, language='tamil'):
+    return {'id': str(count), 'title': f"Song &amp; {count}", 'language': language,
+            'subtitle': f"Artist - Album {count}",
+            'more_info': {'album': f"Album {count}", 'music': '', 'duration': '200',
+                          'encrypted_media_url': f"enc{count}",
+                          'album_url': f"https://www.jiosaavn.com/album/a/id{count}"}}
+
+
+class FakeResponse:
+    """Body is decoded by the parser - json() must not be called"""
+
+    def __init__(self, payload):
+        self.content = json.dumps(payload).encode()
+
+    def json(self):
+        raise AssertionError('response decoded more than once')
+
+
+def test_parse_songs_columns_and_lazy_records():
+    songs = parse_songs([song_item(1), song_item(2, 'hindi'), song_item(3)], ['tamil'])
+    assert len(songs) == 2
+    assert songs.column('id') == ['1', '3']
+    assert songs[0] == {'name': 'Song & 1', 'id': '1', 'album_name': 'Album 1', 'music': '',
+                        'artists': 'Artist', 'language': 'tamil', 'duration': '200',
+                        'token': 'enc1', 'album_id': 'id1'}
+    records = songs.records(Song, status='Loaded')
+    assert next(records) == Song(name='Song & 1')
+    assert next(records).status == 'Loaded'
+
+
+def test_recomm_songs_decoded_once():
+    response = FakeResponse({'stationid': 'sid', '0': {'song': song_item(1)},
+                             '1': {'song': song_item(2)}})
+    rsongs = JioSaavnSongProvider(client=None)._parse_recomm_songs(response)
+    assert [song['name'] for song in rsongs] == ['Song & 1', 'Song & 2']
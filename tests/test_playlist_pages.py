@@ -0,0 +1,107 @@
+"""Tests: Paged playlist loading"""
+
+import json
+from urllib.parse import parse_qsl, urlsplit
+import pytest
+from rkstreamer.models.playlist import JioSaavnPlaylistModel
+from rkstreamer.models.data import PlaylistSearch
+from rkstreamer.models.exceptions import NetworkError
+
+
+class FakeResponse:
+    """Playlist page response"""
+
+    def __init__(self, payload):
+        self.content = json.dumps(payload).encode()
+
+
+class FakeClient:
+    """Serves a playlist of song_count songs, 'p' - page, 'n' - page size"""
+
+    def __init__(self, song_count):
+        self.song_count = song_count
+        self.pages = []
+        self.batches = []
+        self.failures = {}  # page -> failed requests left.
+
+    def get(self, **kwargs):
+        params = dict(parse_qsl(urlsplit(kwargs['url']).query)) | kwargs['params']
+        page, size = params['p'], int(params['n'])
+        self.pages.append(page)
+        if self.failures.get(page):
+            self.failures[page] -= 1
+            raise NetworkError(f"page {page}")
+        first = (page - 1) * size
+        return FakeResponse({'fullsongs': [
+            {'song_for_player': f"song {number}",
+             'download_url': f"https://aac.saavncdn.com/{number}/SAR-{number}.mp3"}
+            for number in range(first, min(first + size, self.song_count))]})
+
+    def gather(self, requests_kwargs, return_exceptions=False):
+        self.batches.append([self._page(kwargs) for kwargs in requests_kwargs])
+        responses = []
+        for kwargs in requests_kwargs:
+            try:
+                responses.append(self.get(**kwargs))
+            except NetworkError as exception:
+                if not return_exceptions:
+                    raise
+                responses.append(exception)
+        return responses
+
+    @staticmethod
+    def _page(kwargs):
+        return (dict(parse_qsl(urlsplit(kwargs['url']).query)) | kwargs['params'])['p']
+
+
+def make_model(song_count, known_count=True):
+    client = FakeClient(song_count)
+    model = JioSaavnPlaylistModel(client)
+    model.indexed_playlists = {1: PlaylistSearch(
+        name='mix', token='tok', song_count=str(song_count) if known_count else None)}
+    return model, client
+
+
+def test_first_page_then_remaining_pages():
+    model, client = make_model(120)
+    playlist = model.select(1)
+    assert len(playlist.songs) == 50 and client.pages == [1]
+    pages = list(model.load_pages())
+    assert sorted(client.pages) == [1, 2, 3]
+    songs = playlist.songs + [song for page in pages for song in page]
+    assert [song.name for song in songs] == [f"song {number}" for number in range(120)]
+    assert all(song.status == 'Loaded' for song in songs)
+    assert not list(model.load_pages())
+
+
+def test_pages_until_short_page_when_count_unknown():
+    model, client = make_model(100, known_count=False)
+    model.select(1)
+    assert sum(len(page) for page in model.load_pages()) == 50
+    assert client.pages == [1, 2, 3]
+
+
+def test_view_lists_all_songs():
+    model, _ = make_model(75)
+    assert len(model.select(1, view=True).songs) == 75
+
+
+def test_remaining_pages_are_gathered_in_windows():
+    model, client = make_model(300)
+    model.select(1)
+    pages = model.load_pages()
+    assert [song.name for song in next(pages)][0] == 'song 50'
+    assert client.batches == [[2, 3, 4, 5]]
+    assert sum(len(page) for page in pages) == 200
+    assert client.batches == [[2, 3, 4, 5], [6]]
+
+
+def test_failed_page_is_raised_after_the_pages_before_it():
+    model, client = make_model(250)
+    client.failures[4] = 1  # the client's retries are spent.
+    model.select(1)
+    pages = model.load_pages()
+    assert len(next(pages)) == 50 and len(next(pages)) == 50
+    with pytest.raises(NetworkError):
+        next(pages)
+    assert client.pages.count(4) == 1  # not requested again.
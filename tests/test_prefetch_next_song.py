@@ -0,0 +1,80 @@
+"""Tests: Prefetch next song's stream before the playing track ends"""
+
+import time
+from rkstreamer.controllers.song import JioSaavnSongController
+from rkstreamer.models.song import JioSaavnSongModel
+from rkstreamer.models.data import Song
+from rkstreamer.services.cache import StreamUrlCache
+
+
+class FakeResponse:
+    """Ranged stream response"""
+    content = b'\0' * 16
+
+
+class FakeClient:
+    """Records the stream warm up requests"""
+
+    def __init__(self):
+        self.warmed = []
+
+    def get(self, **kwargs):
+        self.warmed.append((kwargs['url'], kwargs['headers']['Range']))
+        return FakeResponse()
+
+
+class FakeView:
+    """Player view with a fixed remaining time"""
+
+    def __init__(self):
+        self.media = []
+        self.replaced = []
+
+    def set_controller_callback(self, callback_fn):
+        pass
+
+    def set_monitor_callback(self, callback_fn):
+        pass
+
+    def add_media(self, media):
+        self.media.append(media.stream_url)
+
+    def replace_media(self, stream_url, new_url):
+        self.replaced.append((stream_url, new_url))
+        return True
+
+
+def test_prefetch_warms_next_loaded_song():
+    client = FakeClient()
+    controller = JioSaavnSongController(model=JioSaavnSongModel(client), view=FakeView())
+    queue = controller.model.queue
+    playing = Song(name='one', id='1', stream_url='https://cdn/1.mp4', status='Loaded')
+    upcoming = Song(name='two', id='2', stream_url='https://cdn/2.mp4', status='Loaded')
+    queue.add(playing)
+    queue.add(upcoming)
+    queue.update_qstatus('Played', playing.stream_url)
+    assert queue.get_next_song() is upcoming
+    controller.prefetch_next_song(remaining=120)
+    assert not client.warmed
+    controller.prefetch_next_song(remaining=20)
+    controller.prefetch_next_song(remaining=10)
+    assert client.warmed == [('https://cdn/2.mp4', 'bytes=0-262143')]
+
+
+def test_prefetch_renews_an_expiring_stream_url():
+    client = FakeClient()
+    model = JioSaavnSongModel(client, url_cache=StreamUrlCache(expiry_margin=120))
+    view = FakeView()
+    controller = JioSaavnSongController(model=model, view=view)
+    expiring = f"https://cdn/2.mp4?Expires={int(time.time()) + 60}"
+    fresh = f"https://cdn/2.mp4?Expires={int(time.time()) + 3600}"
+    model.stream_provider.select_song = lambda token, **kwargs: fresh
+    playing = Song(name='one', id='1', stream_url='https://cdn/1.mp4', status='Loaded')
+    upcoming = Song(name='two', id='2', token='enc-2', stream_url=expiring, status='Loaded')
+    model.queue.add(playing)
+    model.queue.add(upcoming)
+    model.queue.update_qstatus('Played', playing.stream_url)
+    controller.prefetch_next_song(remaining=20)
+    assert view.replaced == [(expiring, fresh)]
+    assert upcoming.stream_url == fresh and model.queue.update_qstatus('Played', fresh) is upcoming
+    assert client.warmed == [(fresh, 'bytes=0-262143')]
@@ -0,0 +1,107 @@
+"""Tests: Background recommendations - batched, ranked, deduplicated by song id & capped"""
+
+import threading
+from rkstreamer.controllers import JioSaavnSongController
+from rkstreamer.models import JioSaavnSongModel
+from rkstreamer.models.data import Song
+from rkstreamer.services.network import AsyncPyRequests
+from rkstreamer.services.resilience import Resilience, RetryPolicy
+from rkstreamer.services.replay import RewriteProvider
+from rkstreamer.services.headless import HeadlessPlayer
+from rkstreamer.services.recommend import SeenSongs, RecommendationWorker, rank, RQUEUE_SIZE
+from rkstreamer.views import JioSaavnSongView
+from tests.mock_server import MockJioSaavnServer
+
+
+def raw(song_id, artists='Artist'):
+    return {'id': song_id, 'name': f"Song {song_id}", 'artists': artists}
+
+
+def test_seen_songs_bounded_lru():
+    seen = SeenSongs(size=3)
+    assert seen.add('a') and seen.add('b') and seen.add('c')
+    assert not seen.add('a')  # refreshed - 'b' is now the oldest.
+    assert seen.add('d')
+    assert len(seen) == 3 and 'b' not in seen and 'a' in seen
+
+
+def test_rank_votes_and_artist_diversity():
+    older = [raw('x', 'One'), raw('y', 'One'), raw('z', 'Two')]
+    newer = [raw('y', 'One'), raw('w', 'One'), raw('v', 'Three')]
+    ranked = [song['id'] for song in rank([older, newer])]
+    assert ranked[0] == 'y'  # recommended by both seeds.
+    assert sorted(ranked) == ['v', 'w', 'x', 'y', 'z']
+    assert ranked.index('v') < ranked.index('w')  # 'One' already picked.
+
+
+def test_rqueue_dedupes_by_id_and_is_capped():
+    model = JioSaavnSongModel(network_provider=None)
+    queue = model.queue
+    queue.add(Song(name='Queued', id='q1', stream_url='https://cdn/q1.mp4'))
+    first = model._create_recomm_song(  # pylint: disable=protected-access
+        [raw('q1'), {'id': 'r1', 'name': 'Same name'}, {'id': 'r2', 'name': 'Same name'}])
+    assert [song.id for song in first.values()] == ['r1', 'r2']
+    queue.update_rqueue(first)
+    assert not model._create_recomm_song([raw('r1'), raw('r2')])  # pylint: disable=protected-access
+    batch = model._create_recomm_song(  # pylint: disable=protected-access
+        [raw(f"s{number}") for number in range(RQUEUE_SIZE)])
+    assert len(batch) == RQUEUE_SIZE - 2  # as many as there's room for.
+    batch[0] = Song(name='Late', id='late')  # room taken meanwhile - not taken.
+    queue.update_rqueue(batch)
+    rsongs = queue.get_rsongs
+    assert len(rsongs) == RQUEUE_SIZE and next(iter(rsongs.values())).id == 'r1'
+    assert 'late' not in queue.rsongs_seen and 's48' not in queue.rsongs_seen
+    rsongs.clear()  # a copy - the RQueue is unchanged.
+    assert len(queue.get_rsongs) == RQUEUE_SIZE
+    assert not model._create_recomm_song([raw('s49')])  # pylint: disable=protected-access
+
+
+def test_worker_batches_waiting_seeds():
+    started, release, batches, sunk = threading.Event(), threading.Event(), [], []
+
+    def fetch(seeds):
+        batches.append(seeds)
+        started.set()
+        release.wait(5)
+        return {len(batches): seeds}
+
+    worker = RecommendationWorker(fetch, sunk.append, batch=4)
+    worker.submit('a')
+    assert started.wait(5)
+    for seed in ('b', 'c', 'b', 'd', 'e', 'f'):  # submitted while 'a' is fetched.
+        worker.submit(seed)
+    release.set()
+    worker.join()
+    assert batches == [['a'], ['b', 'c', 'd'], ['e', 'f']]
+    assert len(sunk) == worker.batches == 3
+
+
+def test_related_songs_batch_from_server():
+    with MockJioSaavnServer() as server:
+        client = RewriteProvider(
+            AsyncPyRequests(resilience=Resilience(retry=RetryPolicy(attempts=1))), server.hosts)
+        model = JioSaavnSongModel(client)
+        rsongs = model.get_related_songs_batch(['s1', 's2', 's3'])
+        assert server.requests['webradio.createEntityStation'] == 3
+        assert server.requests['webradio.getSong'] == 3
+        ids = [song.id for song in rsongs.values()]
+        assert 10 <= len(ids) <= 15 and len(set(ids)) == len(ids)
+        model.queue.update_rqueue(rsongs)
+        more = model.get_related_songs_batch(['s4']) or {}  # k is random - may reach further.
+        assert not set(ids) & {song.id for song in more.values()}  # seen songs aren't repeated.
+
+
+def test_playing_song_seeds_the_worker():
+    with MockJioSaavnServer() as server:
+        client = RewriteProvider(
+            AsyncPyRequests(resilience=Resilience(retry=RetryPolicy(attempts=1))), server.hosts)
+        player = HeadlessPlayer()
+        controller = JioSaavnSongController(
+            model=JioSaavnSongModel(client), view=JioSaavnSongView(player=player))
+        controller.handle_input('track -n:3')
+        controller.handle_input('1')
+        player.clock.run(secs=1)  # delivers the Playing event.
+        controller.recommender.join()
+        rsongs = controller.model.queue.get_rsongs
+        assert 10 <= len(rsongs) <= 15 and controller.recommender.batches == 1
+        assert controller.model.queue.fetch(1).id not in {song.id for song in rsongs.values()}
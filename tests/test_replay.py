@@ -0,0 +1,70 @@
+"""Tests: Offline record & replay against the stand-in JioSaavn server"""
+
+import pytest
+from rkstreamer.models import JioSaavnSongModel, JioSaavnAlbumModel, JioSaavnPlaylistModel
+from rkstreamer.services.exceptions import NetworkError
+from rkstreamer.services.network import AsyncPyRequests
+from rkstreamer.services.resilience import Resilience, RetryPolicy
+from rkstreamer.services.replay import Cassette, RecordingProvider, ReplayProvider, RewriteProvider
+from tests.mock_server import MockJioSaavnServer
+
+
+def client_for(server, attempts=1):
+    return RewriteProvider(
+        AsyncPyRequests(resilience=Resilience(retry=RetryPolicy(attempts=attempts, base=0))),
+        server.hosts)
+
+
+def song_flow(client):
+    model = JioSaavnSongModel(client)
+    results = model.search('track', num=3)
+    song = model.select(1)
+    rsongs = model.get_related_songs(song.id)
+    return [s.name for s in results.values()], song.stream_url, len(rsongs)
+
+
+def test_song_flow_served_offline(tmp_path):
+    with MockJioSaavnServer() as server:
+        names, stream_url, rsongs = song_flow(client_for(server))
+        assert names == ['Track 1', 'Track 2', 'Track 3']
+        assert stream_url.startswith(f"{server.base_url}/cdn/") and stream_url.endswith('_320.mp4')
+        assert 10 <= rsongs <= 15
+        assert server.requests['song.generateAuthToken'] == 1
+
+
+def test_record_then_replay_without_server(tmp_path):
+    cassette = Cassette(str(tmp_path / 'flows.json'))
+    with MockJioSaavnServer() as server:
+        recorded = song_flow(RecordingProvider(client_for(server), cassette))
+        album = JioSaavnAlbumModel(RecordingProvider(client_for(server), cassette))
+        album.search('vaaranam')
+        recorded_album = [song.name for song in album.select(1).songs.values()]
+    cassette.save()
+
+    replay = ReplayProvider(Cassette(str(tmp_path / 'flows.json')))
+    assert song_flow(replay) == recorded
+    album = JioSaavnAlbumModel(replay)
+    album.search('vaaranam')
+    assert [song.name for song in album.select(1).songs.values()] == recorded_album
+    with pytest.raises(NetworkError):
+        replay.get(url='https://www.jiosaavn.com/api.php?__call=unknown')
+
+
+def test_playlist_pages_with_latency():
+    with MockJioSaavnServer(latency=0.01, playlist_size=500) as server:
+        model = JioSaavnPlaylistModel(client_for(server))
+        model.search('hits')
+        playlist = model.select(1)
+        songs = playlist.songs + [song for page in model.load_pages() for song in page]
+        assert len(songs) == 500 and songs[-1].name.endswith('#499')
+        assert server.requests['webapi.get'] == 10
+
+
+def test_error_injection():
+    with MockJioSaavnServer(errors={'webradio.': 503}) as server:
+        model = JioSaavnSongModel(client_for(server, attempts=2))
+        model.search('track')
+        assert model.select(1).stream_url
+        with pytest.raises(NetworkError):
+            model.get_related_songs('sNg0001xY')
+        assert server.requests['webradio.createEntityStation'] == 2  # retried once.
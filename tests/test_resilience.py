@@ -0,0 +1,72 @@
+"""Tests: Retries, timeouts & circuit breakers"""
+
+import pytest
+import requests
+from rkstreamer.services.exceptions import NetworkError, CircuitOpenError
+from rkstreamer.services.resilience import Resilience, RetryPolicy, CircuitBreaker
+
+API = 'https://www.jiosaavn.com/api.php?__call=webradio.getSong'
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(response=response)
+
+
+class Flaky:
+    """Fails with the given exceptions, then returns 'ok'"""
+
+    def __init__(self, *failures):
+        self.failures = list(failures)
+        self.calls = []
+
+    def __call__(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.failures:
+            raise self.failures.pop(0)
+        return 'ok'
+
+
+def make(**kwargs):
+    return Resilience(retry=RetryPolicy(attempts=3, base=0), **kwargs)
+
+
+def test_transient_failures_retried_with_endpoint_timeout():
+    resilience = make()
+    request = Flaky(http_error(503), requests.exceptions.ConnectionError())
+    assert resilience.call(request, url=API) == 'ok'
+    assert len(request.calls) == 3 and request.calls[0]['timeout'] == (3.05, 8)
+    assert resilience.stats['webradio.getSong', 'retries'] == 2
+
+
+def test_client_errors_not_retried():
+    resilience = make()
+    request = Flaky(http_error(404))
+    with pytest.raises(NetworkError):
+        resilience.call(request, url=API)
+    assert len(request.calls) == 1
+    assert resilience.breaker('webradio.getSong').state == 'closed'
+
+
+def test_breaker_opens_then_half_opens(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr('rkstreamer.services.resilience.time.monotonic', lambda: clock[0])
+    resilience = make(threshold=3, reset=30)
+    with pytest.raises(NetworkError):
+        resilience.call(Flaky(*[requests.exceptions.Timeout()] * 3), url=API)
+    with pytest.raises(CircuitOpenError):
+        resilience.call(Flaky(), url=API)
+    assert resilience.stats['webradio.getSong', 'trips'] == 1
+    assert resilience.stats['webradio.getSong', 'rejected'] == 1
+    clock[0] = 31
+    assert resilience.call(Flaky(), url=API) == 'ok'
+    assert resilience.breaker('webradio.getSong').state == 'closed'
+    assert 'webradio.getSong [closed]' in resilience.summary()
+
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker(threshold=1, reset=0)
+    assert breaker.failure()
+    assert breaker.allow() and not breaker.allow()  # one trial at a time.
+    assert breaker.failure()
@@ -0,0 +1,32 @@
+"""Tests: Response cache"""
+
+from rkstreamer.services.cache import SQLiteResponseCache, CachedResponse, normalize_request
+
+API_BASE = "https://www.jiosaavn.com/api.php"
+
+
+def test_normalize_request():
+    call, key = normalize_request(f"{API_BASE}?q=Pokkal+Pokkum&__call=search.getResults&n=3")
+    _, same_key = normalize_request(API_BASE, {'__call': 'search.getResults', 'n': 3, 'q': 'pokkal  pokkum'})
+    assert call == 'search.getResults'
+    assert key == same_key
+
+
+def test_cache_hit_and_ttl():
+    cache = SQLiteResponseCache(path=':memory:')
+    params = {'__call': 'webapi.get', 'token': 'qKErkhPpdTE_', 'type': 'album'}
+    cache.store(API_BASE, params, CachedResponse(b'{"list": []}', 200, {}))
+    assert cache.fetch(API_BASE, params).json() == {'list': []}
+    # one-shot calls are never cached
+    auth = {'__call': 'song.generateAuthToken', 'url': 'token'}
+    cache.store(API_BASE, auth, CachedResponse(b'{}', 200, {}))
+    assert cache.fetch(API_BASE, auth) is None
+
+
+def test_cache_lru_eviction():
+    cache = SQLiteResponseCache(path=':memory:', max_entries=2)
+    for token in ('a', 'b', 'c'):
+        cache.store(API_BASE, {'__call': 'webapi.get', 'token': token},
+                    CachedResponse(b'{}', 200, {}))
+    assert cache.fetch(API_BASE, {'__call': 'webapi.get', 'token': 'a'}) is None
+    assert cache.fetch(API_BASE, {'__call': 'webapi.get', 'token': 'c'}) is not None
@@ -0,0 +1,118 @@
+"""Tests: Modes share one player engine, each with its own media list"""
+
+from rkstreamer.services.player import PyVLCEngine, PyVLCPlayer
+
+
+class FakeEvents:
+    """libvlc event manager - keeps the attached handlers"""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def event_attach(self, event_type, callback, *args):
+        self.handlers[event_type] = (callback, args)
+
+
+class FakeMediaPlayer:
+    """Media player - plays nothing"""
+
+    def event_manager(self):
+        return FakeEvents()
+
+    def get_media(self):
+        return self
+
+    def get_mrl(self):
+        return None
+
+
+class FakeMediaListPlayer:
+    """Media list player - records the loaded media list"""
+
+    def __init__(self):
+        self.media_list = None
+        self.events = FakeEvents()
+        self.media_player = FakeMediaPlayer()
+
+    def get_media_player(self):
+        return self.media_player
+
+    def event_manager(self):
+        return self.events
+
+    def set_media_list(self, media_list):
+        self.media_list = media_list
+
+    def play_item_at_index(self, _index):
+        return 0
+
+
+class FakeMediaList:
+    """Media list - records the items in place"""
+
+    def __init__(self):
+        self.items = []
+        self.edits = 0
+
+    def lock(self):
+        pass
+
+    def unlock(self):
+        pass
+
+    def add_media(self, mrl):
+        self.items.append(mrl)
+        self.edits += 1
+
+    def remove_index(self, index):
+        del self.items[index]
+        self.edits += 1
+
+
+class FakeInstance:
+    """libvlc instance - counts the players created"""
+
+    def __init__(self):
+        self.players = []
+
+    def media_list_player_new(self):
+        self.players.append(FakeMediaListPlayer())
+        return self.players[-1]
+
+    def media_list_new(self):
+        return FakeMediaList()
+
+
+def test_modes_share_engine_and_swap_media_lists():
+    instance = FakeInstance()
+    engine = PyVLCEngine(instance)
+    song, album = PyVLCPlayer(engine=engine), PyVLCPlayer(engine=engine)
+    assert len(instance.players) == 1
+    assert song.mplayer_controls is album.mplayer_controls
+
+    song.mlplayer_factory.add_media('https://cdn/1.mp4')
+    album.mlplayer_factory.add_medias(['https://cdn/a.mp4', 'https://cdn/b.mp4'])
+    assert engine.player.media_list is None  # nothing played yet.
+
+    album.mlplayer_factory.play_media('https://cdn/b.mp4')
+    assert engine.player.media_list.items == ['https://cdn/a.mp4', 'https://cdn/b.mp4']
+    song.mlplayer_factory.add_media('https://cdn/2.mp4')
+    assert engine.player.media_list.items == ['https://cdn/a.mp4', 'https://cdn/b.mp4']
+
+    song.mlplayer_controls.play_index(0)
+    assert engine.player.media_list.items == ['https://cdn/1.mp4', 'https://cdn/2.mp4']
+    assert engine.active is song.mlplayer_factory
+
+
+def test_media_list_edited_in_place():
+    mlplayer = PyVLCPlayer(engine=PyVLCEngine(FakeInstance())).mlplayer_factory
+    media_list = mlplayer.media_list
+    for number in range(300):
+        mlplayer.add_media(f"https://cdn/{number}.mp4")
+    mlplayer.add_media('https://cdn/7.mp4')  # already queued.
+    mlplayer.remove_media('https://cdn/5.mp4')
+    mlplayer.add_media('https://cdn/new.mp4')
+    assert mlplayer.media_list is media_list and media_list.edits == 302
+    assert mlplayer.position('https://cdn/6.mp4') == 5
+    assert mlplayer.position('https://cdn/new.mp4') == 299
+    assert mlplayer.position('https://cdn/5.mp4') is None
@@ -0,0 +1,69 @@
+"""Tests: Indexed song queue"""
+
+import threading
+import pytest
+from rkstreamer.models.song import JioSaavnSongQueue, PLAYED
+from rkstreamer.models.data import Song
+from rkstreamer.models.exceptions import GetMediaError
+from rkstreamer.utils.indexed import IndexedList
+
+
+def make_song(number, status='Loaded'):
+    return Song(name=f"song {number}", id=str(number),
+                stream_url=f"https://cdn/{number}.mp4", status=status)
+
+
+def test_indexed_list_order_statistics():
+    items = IndexedList(key=lambda item: item)
+    for item in range(100):
+        items.append(item)
+    for item in range(0, 100, 3):
+        items.remove(item)
+    remaining = [item for item in range(100) if item % 3]
+    assert list(items) == remaining
+    assert [items[rank] for rank in range(len(items))] == remaining
+    assert items.index(50) == remaining.index(50)
+    items.mark(10)
+    items.mark(80)
+    assert items.next_marked(10) == 80
+    assert items.marked_before(80) == [10]
+    assert not items.append(10)
+
+
+def test_queue_indexes_and_status_counts():
+    queue = JioSaavnSongQueue()
+    songs = [make_song(number) for number in range(1, 6)]
+    for song in songs:
+        queue.add(song)
+    queue.add(make_song(3))  # same song id - not added again.
+    assert queue.fetch(3) is songs[2]
+    assert queue.remove(['2', '4']) == [songs[1], songs[3]]
+    assert list(queue.get_indexed_queue.values()) == [songs[0], songs[2], songs[4]]
+    with pytest.raises(GetMediaError):
+        queue.fetch(4)
+
+    assert queue.update_qstatus(PLAYED, songs[0].stream_url) is songs[0]
+    assert queue.get_next_song() is songs[2]
+    queue.change_loaded_status_before(songs[4])
+    assert songs[2].status == PLAYED and songs[4].status == 'Loaded'
+    assert not queue.check_status(queue.get_queue)
+    queue.change_loaded_status()
+    assert queue.check_status(queue.get_queue)
+    assert queue.status_counts[PLAYED] == 3
+    assert queue.get_next_song() is None
+
+
+def test_queue_extended_while_songs_play():
+    queue = JioSaavnSongQueue()
+    first = [make_song(number) for number in range(200)]
+    queue.extend(first)
+    pages = [[make_song(number) for number in range(start, start + 50)]
+             for start in range(200, 2200, 50)]
+    loader = threading.Thread(target=lambda: [queue.extend(page) for page in pages])
+    loader.start()
+    for song in first:
+        assert queue.update_qstatus(PLAYED, song.stream_url) is song
+    loader.join()
+    assert len(queue.get_queue.songs) == 2200
+    assert queue.status_counts[PLAYED] == 200 and queue.status_counts['Loaded'] == 2000
+    assert queue.get_next_song().name == 'song 200'
@@ -0,0 +1,38 @@
+"""Tests: Slotted song records"""
+
+from rkstreamer.models.data import Song, SongSearch
+from rkstreamer.models._model import to_dict, update
+from rkstreamer.models.song import JioSaavnSongModel
+
+
+def test_song_has_no_instance_dict():
+    song = Song(name='one', id='1', stream_url='https://cdn/1.mp4')
+    assert not hasattr(song, '__dict__')
+    assert song == Song(name='one') and hash(song) == hash(Song(name='one'))
+
+
+def test_repeated_metadata_interned():
+    artists = ''.join(['Artist ', 'One'])
+    first = SongSearch(name='one', artists=artists, album_name='Album')
+    second = SongSearch(name='two', artists=''.join(['Artist ', 'One']), album_name='Album')
+    assert first.artists is second.artists
+
+
+def test_update_and_copy_without_dict():
+    selected = SongSearch(name='one', id='1', token='t1', language='tamil')
+    update(selected, status='Loaded')
+    song = Song(**to_dict(selected), stream_url='https://cdn/1.mp4')
+    assert (song.id, song.token, song.status) == ('1', 't1', 'Loaded')
+
+
+def test_select_builds_song_from_search_record():
+    class Provider:
+        @staticmethod
+        def select_song(token, **kwargs):
+            return f"https://cdn/{token}.mp4"
+
+    model = JioSaavnSongModel(None)
+    model.stream_provider = Provider()
+    model.indexed_search_songs = {1: SongSearch(name='one', id='1', token='t1')}
+    song = model.select(1)
+    assert (song.stream_url, song.status) == ('https://cdn/t1.mp4', 'Loaded')
@@ -0,0 +1,39 @@
+"""Tests: Stream url cache"""
+
+import time
+from rkstreamer.services.cache import StreamUrlCache, parse_url_expiry
+
+
+def test_parse_url_expiry():
+    assert parse_url_expiry("https://aac.saavncdn.com/1/a_320.mp4?Expires=1700000000&Signature=x") == 1700000000
+    assert parse_url_expiry("https://aac.saavncdn.com/1/a_320.mp4?__gda__=1700000000_9f8e") == 1700000000
+    assert parse_url_expiry("https://aac.saavncdn.com/1/a_320.mp4?hdnea=st=1~exp=1700000000~acl=/*") == 1700000000
+    assert parse_url_expiry("https://aac.saavncdn.com/1/a_320.mp4") is None
+
+
+def test_expiry_margin():
+    cache = StreamUrlCache(expiry_margin=120)
+    fresh = f"https://cdn/a.mp4?Expires={int(time.time()) + 3600}"
+    expiring = f"https://cdn/b.mp4?Expires={int(time.time()) + 60}"
+    cache.set('enc-a', 320, fresh)
+    cache.set('enc-b', 320, expiring)
+    assert cache.get('enc-a', 320) == fresh
+    assert cache.get('enc-a', 160) is None
+    assert cache.get('enc-b', 320) is None  # within the margin of its expiry.
+    assert cache.expiring(expiring) and not cache.expiring(fresh)
+    assert not cache.expiring("https://cdn/c.mp4")  # unsigned.
+
+
+def test_lru_eviction():
+    cache = StreamUrlCache(max_entries=2)
+    for token in ('a', 'b', 'c'):
+        cache.set(token, 320, f"https://cdn/{token}.mp4")
+    assert cache.get('a', 320) is None
+    assert len(cache) == 2 and cache.get('b', 320) and cache.get('c', 320)
+
+
+def test_set_drops_expired_entries():
+    cache = StreamUrlCache(expiry_margin=0)
+    cache.set('old', 320, f"https://cdn/old.mp4?Expires={int(time.time()) - 1}")
+    cache.set('new', 320, "https://cdn/new.mp4")
+    assert len(cache) == 1 and cache.get('new', 320)
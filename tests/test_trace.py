@@ -0,0 +1,66 @@
+"""Tests: Tracing spans & counters"""
+
+import json
+import pytest
+from rkstreamer.models import JioSaavnSongModel
+from rkstreamer.services.network import AsyncPyRequests
+from rkstreamer.services.resilience import Resilience
+from rkstreamer.services.replay import RewriteProvider
+from rkstreamer.utils.trace import Tracer, tracer, traced
+from tests.mock_server import MockJioSaavnServer
+
+
+@pytest.fixture(name='tracing')
+def fixture_tracing(tmp_path):
+    path = tmp_path / 'trace.jsonl'
+    tracer.reset()
+    tracer.enable(str(path))
+    yield path
+    tracer.disable()
+    tracer.path = None
+    tracer.reset()
+
+
+def test_disabled_spans_are_shared_no_ops():
+    quiet = Tracer()
+    assert quiet.span('network.get') is quiet.span('parse', 'decode')
+    with quiet.span('network.get'):
+        quiet.count('network.cache', 'hit')
+    assert not quiet.stats and not quiet.counters
+    assert 'No spans' in quiet.summary()
+
+
+def test_nested_spans_exported_as_json_lines(tracing):
+    @traced('queue')
+    def add(value):
+        with tracer.span('player', 'add_media'):
+            return value
+
+    assert add(1) == 1
+    with pytest.raises(ValueError), tracer.span('parse', 'decode'):
+        raise ValueError
+    tracer.count('network.cache', 'hit', 2)
+    tracer.flush()
+    records = [json.loads(line) for line in tracing.read_text().splitlines()]
+    assert [record['span'] for record in records] == ['player', 'queue', 'parse']
+    assert records[0]['parent'].startswith('queue ') and records[1]['parent'] is None
+    assert records[2]['error'] == 'ValueError'
+    summary = tracer.summary()
+    assert 'player add_media' in summary and '(1 failed)' in summary
+    assert 'network.cache hit: 2' in summary
+
+
+def test_song_flow_spans(tracing):
+    with MockJioSaavnServer() as server:
+        client = RewriteProvider(AsyncPyRequests(resilience=Resilience()), server.hosts)
+        model = JioSaavnSongModel(client)
+        model.search('track', num=3)
+        model.queue.add(model.select(1))
+    spans = set(tracer.stats)
+    assert ('network.request', 'song.generateAuthToken') in spans
+    assert ('parse', 'JioSaavnSongProvider._parse_song_url') in spans
+    assert ('network.redirect', None) in spans
+    assert tracer.stats['parse', 'JioSaavnSongProvider._parse_song_url'][1] < \
+        tracer.stats['network.redirect', None][1]  # the redirect isn't counted as parse.
+    assert ('parse', 'decode') in spans and ('queue', 'JioSaavnSongQueue.add') in spans
+    assert tracer.stats['network.get', None][0] == 3  # search, auth token & its redirect.